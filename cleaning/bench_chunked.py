@@ -0,0 +1,138 @@
+import json
+import os
+import random
+import subprocess
+import sys
+import tempfile
+import pandas as pd
+
+'''
+Benchmark for the chunked mode of the cleaning scripts: clean_crime_log, clean_usc_crime_log,
+virginiatech_clean.clean_csv and clean_time.process_csv on synthetic logs (with multi-line
+entries for the two that merge them), each run once loading the whole file and once with
+chunksize, in a fresh interpreter so the reported peak is that run's own. Reports time,
+peak memory on top of the interpreter and its imports, and whether the outputs are the same.
+The two that merge rows are slow per row, so they get a tenth of the rows.
+
+Usage: python bench_chunked.py [rows] [chunksize]
+'''
+
+INCIDENTS = ['THEFT FROM BUILDING', 'Simple Assault', 'Burglary', 'Vandalism/Criminal Mischief',
+             'Liquor Law Violation', 'HARASSMENT', 'Trespass Warning', 'Drug Violation']
+PLACES = ['Hill Hall', '3300 Chestnut St', 'Parking Lot 12', 'Student Center', 'Main Library',
+          '1084 Shennecossett Rd', 'Towers Residence Hall', 'Stadium Garage']
+DISPOSITIONS = ['Active', 'Closed', 'Cleared By Arrest', 'Pending', 'Unfounded', 'Referred']
+DAYS = ['MON', 'TUE', 'WED', 'THU', 'FRI', 'SAT', 'SUN']
+# Share of entries continued on a second row
+CONTINUED = 0.2
+
+# Run in a fresh interpreter: prints {"seconds", "peak"} for cleaning the input, peak being the
+# highest resident memory above that at the start in KB (sampled, as ru_maxrss would include
+# the interpreter's own peak while importing)
+MEASURE = '''
+import contextlib, io, json, os, sys, threading, time
+import {module}
+def rss():
+    with open('/proc/self/statm') as f:
+        return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE') // 1024
+baseline = peak = rss()
+done = threading.Event()
+def sample():
+    global peak
+    while not done.wait(0.002):
+        peak = max(peak, rss())
+sampler = threading.Thread(target=sample)
+sampler.start()
+start = time.perf_counter()
+with contextlib.redirect_stdout(io.StringIO()):
+    {module}.{function}(*sys.argv[1:3], **json.loads(sys.argv[3]))
+seconds = time.perf_counter() - start
+done.set()
+sampler.join()
+print(json.dumps({{"seconds": seconds, "peak": max(peak, rss()) - baseline}}))
+'''
+
+
+def date(i):
+    return f"{i % 12 + 1:02d}/{i % 28 + 1:02d}/25"
+
+
+def crime_log(rows):
+    """clean_crime_log input: entries whose location or incident type runs on into a row without a case number"""
+    records = []
+    while len(records) < rows:
+        i = len(records)
+        records.append({'Case Number': f"25-{i:06d}", 'Incident Type': random.choice(INCIDENTS),
+                        'Date/Time Reported': f"{date(i)} {random.randint(0, 23):02d}:{random.randint(0, 59):02d}",
+                        'Location': random.choice(PLACES), 'Disposition': random.choice(DISPOSITIONS)})
+        if random.random() < CONTINUED:
+            records.append({'Location': f"Room {random.randint(100, 499)}"})
+    return pd.DataFrame(records)
+
+
+def usc_log(rows):
+    """clean_usc_crime_log input: report title, header row, entries with continuation rows"""
+    records = [['Daily Crime and Fire Log'] + [''] * 7,
+               ['Date Reported', 'Event # Case # Offense', 'Initial Incident', 'Final Incident',
+                'Date From', 'Date To', 'Location', 'Disposition']]
+    while len(records) < rows:
+        i = len(records)
+        records.append([f"{date(i)} - {random.choice(DAYS)} at {random.randint(0, 23):02d}:00",
+                        f"25-{i:06d}", random.choice(INCIDENTS), random.choice(INCIDENTS), date(i), date(i),
+                        random.choice(PLACES) + ' - On Campus', random.choice(DISPOSITIONS)])
+        if random.random() < CONTINUED:
+            records.append(['', f"{random.randint(2500000, 2599999)}", '', '', '', '', f"Room {i}", ''])
+    return pd.DataFrame(records)
+
+
+def virginiatech_log(rows):
+    """virginiatech_clean and clean_time input: dates and times in separate columns"""
+    times = [f"{random.randint(0, 23):02d}{random.randint(0, 59):02d}" for _ in range(rows)]
+    return pd.DataFrame({
+        'Case#': [f"2025-00 {i:06d}" for i in range(rows)],
+        'Date Reported': [date(i) for i in range(rows)],
+        'Criminal Offense': [random.choice(INCIDENTS) for _ in range(rows)],
+        'Location': [random.choice(PLACES) for _ in range(rows)],
+        'Occurrence Date(s)': [date(i) for i in range(rows)],
+        'Time(s)': [time if i % 10 else f"{time}-{times[i - 1]}" for i, time in enumerate(times)],
+        'Disposition': [random.choice(DISPOSITIONS) for _ in range(rows)],
+    })
+
+
+# (module, function, input maker, to_csv options, share of the rows)
+CASES = [
+    ('reformatting_clean', 'clean_crime_log', crime_log, {}, 0.1),
+    ('usc_clean', 'clean_usc_crime_log', usc_log, {'header': False}, 0.1),
+    ('virginiatech_clean', 'clean_csv', virginiatech_log, {}, 1),
+    ('clean_time', 'process_csv', virginiatech_log, {}, 1),
+]
+
+
+def measure(module, function, input_file, output_file, kwargs):
+    result = subprocess.run([sys.executable, '-c', MEASURE.format(module=module, function=function),
+                             input_file, output_file, json.dumps(kwargs)],
+                            cwd=os.path.dirname(os.path.abspath(__file__)), check=True, capture_output=True, text=True)
+    return json.loads(result.stdout)
+
+
+def main():
+    rows = int(sys.argv[1]) if len(sys.argv) > 1 else 200000
+    chunksize = int(sys.argv[2]) if len(sys.argv) > 2 else 2000
+    random.seed(0)
+    with tempfile.TemporaryDirectory() as folder:
+        print(f"chunksize {chunksize}; peak memory above the interpreter and imports")
+        for module, function, make_input, to_csv, share in CASES:
+            input_file = os.path.join(folder, f"{function}.csv")
+            make_input(int(rows * share)).to_csv(input_file, index=False, **to_csv)
+            outputs = [os.path.join(folder, f"{function}-{mode}.csv") for mode in ('whole', 'chunked')]
+            whole = measure(module, function, input_file, outputs[0], {})
+            chunked = measure(module, function, input_file, outputs[1], {'chunksize': chunksize})
+            with open(outputs[0], 'rb') as a, open(outputs[1], 'rb') as b:
+                same = a.read() == b.read()
+            print(f"  {module + '.' + function:<38} {int(rows * share):>7} rows   whole {whole['seconds']:6.2f}s {whole['peak'] / 1024:6.1f} MB   "
+                  f"chunked {chunked['seconds']:6.2f}s {chunked['peak'] / 1024:6.1f} MB   "
+                  f"{'same output' if same else 'OUTPUTS DIFFER'}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,79 @@
+import random
+import sys
+import time
+import pandas as pd
+from column_classifier import ROLES, classify_columns
+
+'''
+Throughput benchmark for column_classifier.py on wide tables shaped like camelot/PDF output:
+numbered columns, the real fields in a shuffled order, plus page furniture, blank spacer
+columns and split cells. Reports time per table, columns and cells per second, and how many
+roles were assigned to the right column.
+
+Usage: python bench_column_classifier.py [rows] [repeats]
+'''
+
+WIDTHS = [8, 16, 32, 64]
+
+INCIDENTS = ['Theft From Building', 'Simple Assault', 'Burglary', 'Vandalism/Criminal Mischief',
+             'Liquor Law Violation', 'Harassment', 'Trespass Warning', 'Drug Violation']
+PLACES = ['Hill Hall', '3300 Chestnut St', 'Parking Lot 12', 'Student Center', 'Main Library',
+          '1084 Shennecossett Rd', 'Towers Residence Hall', 'Stadium Garage']
+DISPOSITIONS = ['Active', 'Closed', 'Cleared By Arrest', 'Pending Investigation', 'Unfounded', 'Referred']
+NARRATIVES = ['A student reported that their bicycle was stolen from the rack outside the library.',
+              'Officers responded to a report of an intoxicated person and provided medical assistance.']
+FILLER = [lambda i: f"Page {i % 9 + 1} of 9", lambda i: "", lambda i: str(i % 7),
+          lambda i: random.choice(['Y', 'N', '']), lambda i: f"{random.randint(1, 99)}.{random.randint(0, 9)}",
+          lambda i: random.choice(['Officer', 'Dispatcher', 'Sgt.'])]
+
+
+def synthetic_table(rows, width, seed=0):
+    """Wide PDF-like table with the role columns at random positions. Returns (df, {role: column})"""
+    random.seed(seed)
+    fields = {
+        'case_number': [f"25-{i:05d}" for i in range(rows)],
+        'incident_type': [random.choice(INCIDENTS) for _ in range(rows)],
+        'occurred': [f"{random.randint(1, 12)}/{random.randint(1, 28)}/25 {random.randint(0, 23)}:{random.randint(0, 59):02d}"
+                     for _ in range(rows)],
+        'reported': [f"{random.randint(1, 12)}/{random.randint(1, 28)}/2025" for _ in range(rows)],
+        'location': [random.choice(PLACES) for _ in range(rows)],
+        'disposition': [random.choice(DISPOSITIONS) for _ in range(rows)],
+        'narrative': [random.choice(NARRATIVES) for _ in range(rows)],
+    }
+    columns = list(fields.values())
+    roles = list(fields)
+    while len(columns) < width:
+        make = random.choice(FILLER)
+        columns.append([make(i) for i in range(rows)])
+        roles.append(None)
+
+    order = list(range(width))
+    random.shuffle(order)
+    df = pd.DataFrame({str(pos): columns[i] for pos, i in enumerate(order)})
+    truth = {roles[i]: str(pos) for pos, i in enumerate(order) if roles[i]}
+    return df, truth
+
+
+def main():
+    rows = int(sys.argv[1]) if len(sys.argv) > 1 else 5000
+    repeats = int(sys.argv[2]) if len(sys.argv) > 2 else 3
+
+    print(f"{rows} rows per table")
+    print(f"{'columns':>8}{'best time (ms)':>16}{'columns/s':>12}{'cells/s':>14}{'correct':>10}")
+    for width in WIDTHS:
+        df, truth = synthetic_table(rows, width)
+        best = float('inf')
+        for _ in range(repeats):
+            start = time.perf_counter()
+            assignment = classify_columns(df)
+            best = min(best, time.perf_counter() - start)
+        correct = sum(assignment.get(role) == column for role, column in truth.items()
+                      if role not in ('occurred', 'reported'))
+        dates = {truth['occurred'], truth['reported']}
+        correct += sum(assignment.get(role) in dates for role in ('occurred', 'reported'))
+        print(f"{width:>8}{best * 1000:>16.1f}{width / best:>12.0f}{width * rows / best:>14.0f}"
+              f"{f'{correct}/{len(ROLES)}':>10}")
+
+
+if __name__ == "__main__":
+    main()
@@ -15,8 +15,10 @@ def process_csv(input_file, output_file, columns):
     df.to_csv(output_file, index=False)
     print(f"Processed file saved as: {output_file}")
 
-input_csv = "UniversityOfSouthCarolina_cleaned.csv"
-output_csv = "output.csv"
-columns_to_process = ["Initial_Incident", "Location"]
 
-process_csv(input_csv, output_csv, columns_to_process)
+if __name__ == "__main__":
+    input_csv = "UniversityOfSouthCarolina_cleaned.csv"
+    output_csv = "output.csv"
+    columns_to_process = ["Initial_Incident", "Location"]
+
+    process_csv(input_csv, output_csv, columns_to_process)
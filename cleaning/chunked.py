@@ -0,0 +1,60 @@
+import codecs
+import pandas as pd
+
+'''
+Helpers for the chunked mode of the cleaning scripts (clean_crime_log, clean_usc_crime_log,
+virginiatech_clean.clean_csv, clean_time.process_csv with chunksize=...): the input is read
+with read_csv(chunksize=...) and every cleaned chunk appended to the output, so memory is
+bounded by the chunk size rather than the size of the log. Chunks are read with dtype=str:
+pandas infers types per chunk, so a column of times that is all digits in one chunk would
+otherwise come back as floats ("1510.0") there and as text in the next.
+
+Cleaners that merge continuation rows into the entry before them can't cut the input at an
+arbitrary row, so entry_chunks holds back the last, possibly unfinished, entry of each chunk
+and puts it in front of the next one.
+'''
+
+# Bytes read at a time when checking a file's encoding
+BLOCK_SIZE = 1 << 20
+
+
+def detect_encoding(input_file):
+    """'utf-8' if the whole file decodes as UTF-8, else 'latin1' (read block by block)"""
+    decoder = codecs.getincrementaldecoder('utf-8')()
+    try:
+        with open(input_file, 'rb') as f:
+            while block := f.read(BLOCK_SIZE):
+                decoder.decode(block)
+        decoder.decode(b'', final=True)
+        return 'utf-8'
+    except UnicodeDecodeError:
+        return 'latin1'
+
+
+def append_csv(df, output_file, first):
+    """Write the first chunk with the header, append the others"""
+    df.to_csv(output_file, mode='w' if first else 'a', header=first, index=False)
+
+
+def entry_chunks(chunks, starts_entry):
+    """
+    Re-cut chunks so that none ends in the middle of an entry.
+
+    Args:
+        chunks: DataFrames in file order
+        starts_entry: function(DataFrame) -> boolean Series, True for rows that begin a new
+            entry (rows after it up to the next start belong to it)
+    Yields:
+        DataFrames ending just before an entry start, then the rest
+    """
+    held = None
+    for chunk in chunks:
+        df = chunk if held is None else pd.concat([held, chunk])
+        starts = [i for i, start in enumerate(starts_entry(df)) if start]
+        if not starts or starts[-1] == 0:
+            held = df
+            continue
+        yield df.iloc[:starts[-1]]
+        held = df.iloc[starts[-1]:]
+    if held is not None:
+        yield held
@@ -1,5 +1,6 @@
 import pandas as pd
 import re
+from chunked import append_csv
 
 
 INPUT_FILE = "UVA.csv"
@@ -81,27 +82,29 @@ def format_time_in_string(full_string):
     return result
 
 
-def process_csv(input_file, output_file, column_name=None):
+def process_csv(input_file, output_file, column_name=None, chunksize=None):
     """
     Read a CSV file, format times in the specified column, and save to a new CSV.
+    With chunksize, the file is read and written chunksize rows at a time.
     """
     try:
         # Read the CSV file
-        df = pd.read_csv(input_file)
-
-        if column_name is None:
-            # Process all columns
-            for column in df.columns:
-                df[column] = df[column].apply(format_time_in_string)
-        elif column_name in df.columns:
-            # Process only the specified column
-            df[column_name] = df[column_name].apply(format_time_in_string)
-        else:
-            # Column not found
-            return False
-
-        # Save the modified dataframe to a new CSV file
-        df.to_csv(output_file, index=False)
+        chunks = pd.read_csv(input_file, dtype=str, chunksize=chunksize) if chunksize else [pd.read_csv(input_file)]
+
+        for position, df in enumerate(chunks):
+            if column_name is None:
+                # Process all columns
+                for column in df.columns:
+                    df[column] = df[column].apply(format_time_in_string)
+            elif column_name in df.columns:
+                # Process only the specified column
+                df[column_name] = df[column_name].apply(format_time_in_string)
+            else:
+                # Column not found
+                return False
+
+            # Save the modified dataframe to a new CSV file (appending after the first chunk)
+            append_csv(df, output_file, first=position == 0)
 
         return True
 
@@ -0,0 +1,178 @@
+import re
+import numpy as np
+import pandas as pd
+
+'''
+Content-based column classifier, generalized from upenn_clean.identify_columns. Instead of
+testing a few values per column with first-match-wins, it:
+- samples up to SAMPLE_SIZE non-empty values from every column and stacks them, so each
+  compiled pattern runs once over the whole table
+- scores every (role, column) pair from the share of values that look like dates, case
+  numbers, crime terms, locations, dispositions or free text
+- picks the assignment with the highest total score, so each role gets at most one column
+  and a column that's a slightly better date than case number doesn't steal the wrong role
+
+Works on tables without usable headers (e.g. camelot/PDF output with columns 0..n), so new
+universities can be onboarded without a hand-written column mapping.
+'''
+
+ROLES = ['case_number', 'incident_type', 'occurred', 'reported', 'location', 'disposition', 'narrative']
+SAMPLE_SIZE = 200
+MIN_SCORE = 0.3
+LONG_TEXT = 80      # characters; longer values are narrative, not a type or location
+MISSING = ['', 'nan', 'none', '-']
+
+DATE_RE = re.compile(r'(?<!\d)(?:\d{1,2}/\d{1,2}/\d{2,4}|\d{1,2}-\d{1,2}-\d{4}|\d{4}-\d{2}-\d{2}'
+                     r'|\d{1,2}-[A-Za-z]{3}-\d{2,4})(?!\d)')
+# Leading token with at least 4 digits: "25-00123", "R250429047", "MP 25-703643", "25-1-OF",
+# "202500008640/32". Separators are required between digit runs to keep backtracking linear.
+CASE_RE = re.compile(r'(?=(?:\D*\d){4})(?:[A-Za-z]{1,3} ?)?\d{2,}(?:[-/ ]\d+|[-/ ]?[A-Za-z]{2,3}(?:\d+|\b))*(?=\s|$)')
+# Sentences rather than labels
+NARRATIVE_RE = re.compile(r'\.\s*$|^(?:\S+\s+){11}')
+
+CRIME_TERMS = [
+    'theft', 'larceny', 'assault', 'battery', 'burglary', 'robbery', 'harassment', 'trespass',
+    'vandalism', 'criminal mischief', 'damage', 'fraud', 'stalking', 'drug', 'narcotic', 'marijuana',
+    'alcohol', 'liquor', 'dui', 'dwi', 'intoxicat', 'weapon', 'rape', 'sexual', 'fondling',
+    'disorderly', 'shoplifting', 'stolen', 'arson', 'fire alarm', 'suspicious', 'welfare check',
+    'medical', 'warrant', 'hit and run', 'accident', 'motor vehicle', 'threat', 'domestic', 'info',
+]
+LOCATION_TERMS = [
+    'street', 'st', 'ave', 'avenue', 'road', 'rd', 'blvd', 'dr', 'drive', 'ln', 'lane', 'way',
+    'hall', 'building', 'bldg', 'lot', 'garage', 'parking', 'center', 'library', 'apartments',
+    'apt', 'house', 'residence', 'dorm', 'stadium', 'campus', 'gym', 'tower', 'plaza', 'quad',
+]
+STATUS_TERMS = [
+    'active', 'inactive', 'closed', 'open', 'pending', 'investigation', 'arrest', 'cleared',
+    'unfounded', 'referred', 'exceptionally', 'suspended', 'report taken', 'no report',
+    'citation', 'cited', 'warning', 'administratively', 'inactivated', 'gone on arrival',
+    'completed', 'filed', 'area checked', 'services rendered', 'resolved', 'no action',
+]
+# Header words only break ties between columns whose content looks the same (e.g. two dates)
+HEADER_HINTS = {'occurred': 'occur', 'reported': 'report'}
+HEADER_HINT_BONUS = 0.05
+
+
+def _term_pattern(terms, whole_words=False):
+    """Case-insensitive alternation of terms, matched at the start of a word (or as whole words)"""
+    end = r'\b' if whole_words else ''
+    return re.compile(r'\b(?:' + '|'.join(re.escape(term) for term in terms) + r')' + end, re.IGNORECASE)
+
+
+CRIME_RE = _term_pattern(CRIME_TERMS)
+# Whole words, so "DR2025-01053" isn't a "Dr" and "Stalking" isn't a "St"
+LOCATION_RE = _term_pattern(LOCATION_TERMS, whole_words=True)
+STATUS_RE = _term_pattern(STATUS_TERMS)
+ADDRESS_RE = re.compile(r'^\d+\s+[A-Za-z]')
+
+
+def sample_values(df, sample_size=SAMPLE_SIZE):
+    """
+    Up to sample_size non-empty values per column, stacked as (column position, value).
+
+    Returns:
+        (stacked sample, share of non-empty cells per column position)
+    """
+    values = df.astype(str).apply(lambda col: col.str.strip())
+    values.columns = range(len(df.columns))
+    stacked = values.melt(var_name='column', value_name='value')
+    stacked = stacked[~stacked['value'].str.lower().isin(MISSING)]
+    coverage = stacked.groupby('column').size().reindex(values.columns, fill_value=0) / max(len(df), 1)
+    return stacked.groupby('column', sort=False).head(sample_size), coverage
+
+
+def score_columns(df, sample_size=SAMPLE_SIZE, roles=ROLES):
+    """
+    Score how well each column fits each role.
+
+    Returns:
+        DataFrame with one row per role and one column per column of df, scores in [0, 1]
+    """
+    stacked, coverage = sample_values(df, sample_size)
+    text = stacked['value']
+    features = pd.DataFrame({
+        'column': stacked['column'],
+        'date': text.str.contains(DATE_RE),
+        'case': text.str.match(CASE_RE),
+        'crime': text.str.contains(CRIME_RE),
+        'location': text.str.contains(LOCATION_RE) | text.str.contains(ADDRESS_RE),
+        'status': text.str.contains(STATUS_RE),
+        'long': (text.str.len() > LONG_TEXT) | text.str.contains(NARRATIVE_RE),
+    })
+    features['case'] &= ~features['date'] & ~features['location']
+
+    shares = features.groupby('column').mean()
+    uniqueness = stacked.groupby('column')['value'].nunique() / stacked.groupby('column').size()
+    shares = shares.reindex(range(len(df.columns)), fill_value=0.0)
+    uniqueness = uniqueness.reindex(range(len(df.columns)), fill_value=0.0)
+
+    short = 1 - shares['long']
+    not_date = 1 - shares['date']
+    scores = pd.DataFrame({
+        'case_number': shares['case'] * (0.5 + 0.5 * uniqueness),
+        'incident_type': shares['crime'] * short * not_date,
+        'occurred': shares['date'],
+        'reported': shares['date'],
+        'location': shares['location'] * short * not_date * (1 - shares['case']),
+        'disposition': shares['status'] * short * not_date * (1 - 0.5 * uniqueness),
+        'narrative': shares['long'],
+    })
+    # A mostly blank column is a worse pick than a full one with the same content
+    scores = scores.mul(np.sqrt(coverage), axis=0).T
+
+    headers = [str(col).lower() for col in df.columns]
+    for role, word in HEADER_HINTS.items():
+        bonus = np.array([HEADER_HINT_BONUS if word in header else 0.0 for header in headers])
+        scores.loc[role] += bonus * (scores.loc[role] > 0)
+
+    scores.columns = df.columns
+    return scores.loc[list(roles)].clip(upper=1.0)
+
+
+def assign_roles(scores, min_score=MIN_SCORE):
+    """
+    Best one-to-one assignment of roles to columns: maximizes the total score, each role
+    gets at most one column and each column at most one role. Pairs below min_score are
+    never used. Exact dynamic program over columns and the set of roles already taken.
+
+    Returns:
+        {role: column}
+    """
+    roles = list(scores.index)
+    values = scores.to_numpy()
+    best = {0: (0.0, ())}   # roles-taken bitmask -> (total score, ((role index, column index), ...))
+
+    for j in range(values.shape[1]):
+        candidates = [i for i in range(len(roles)) if values[i, j] >= min_score]
+        if not candidates:
+            continue
+        step = dict(best)
+        for mask, (total, picks) in best.items():
+            for i in candidates:
+                if mask & (1 << i):
+                    continue
+                new_mask, new_total = mask | (1 << i), total + values[i, j]
+                if new_mask not in step or new_total > step[new_mask][0]:
+                    step[new_mask] = (new_total, picks + ((i, j),))
+        best = step
+
+    _, picks = max(best.values(), key=lambda entry: entry[0])
+    return {roles[i]: scores.columns[j] for i, j in sorted(picks)}
+
+
+def classify_columns(df, roles=ROLES, sample_size=SAMPLE_SIZE, min_score=MIN_SCORE):
+    """
+    Guess which column of a raw table holds each role.
+
+    Args:
+        df: raw table (any headers, values as read)
+        roles: roles to look for, a subset of ROLES
+        sample_size: non-empty values sampled per column
+        min_score: weakest match that still gets assigned
+
+    Returns:
+        {role: column name}
+    """
+    if df.empty:
+        return {}
+    return assign_roles(score_columns(df, sample_size, roles), min_score)
@@ -11,4 +11,6 @@ def combine_columns(input_csv, output_csv, col1, col2, new_col_name):
 
     df.to_csv(output_csv, index=False)
 
-combine_columns("UCon.csv", "UConn.csv", "Date/Time Occurred", "TimeO", "Date/Time Occurred")
+
+if __name__ == "__main__":
+    combine_columns("UCon.csv", "UConn.csv", "Date/Time Occurred", "TimeO", "Date/Time Occurred")
@@ -1,46 +1,52 @@
 import pandas as pd
 
 # Used for specific cases to combine rows up
-df = pd.read_csv('crimelog.csv', header=None)
+HEADER_ROW = ['Nature | Classification', 'Case Number', 'Date/Time Reported', 'Date/Time Occured', 'Location Name', 'Street Name', 'Disposition']
 
-header_row = ['Nature | Classification', 'Case Number', 'Date/Time Reported', 'Date/Time Occured', 'Location Name', 'Street Name', 'Disposition']
 
-df.dropna(how='all', inplace=True)
-df.reset_index(drop=True, inplace=True)
+def combine_up(input_file, output_file, header_row=None):
+    header_row = HEADER_ROW if header_row is None else header_row
+    df = pd.read_csv(input_file, header=None)
 
-header_indices = df[df.apply(lambda row: row.tolist() == header_row, axis=1)].index
-if len(header_indices) > 1:
-    df.drop(header_indices[1:], inplace=True)
+    df.dropna(how='all', inplace=True)
     df.reset_index(drop=True, inplace=True)
 
-rows_to_drop = set()
-i = 1
-while i < len(df):
-    row = df.iloc[i]
-    num_nulls = row.isnull().sum()
-    if num_nulls > 2:
-        for col_index, value in row.items():
-            if pd.notnull(value):
-                prev_value = str(df.at[i - 1, col_index]) if pd.notnull(df.at[i - 1, col_index]) else ''
-                df.at[i - 1, col_index] = (prev_value + ' ' + str(value)).strip()
-        rows_to_drop.add(i)
-        if i + 1 < len(df):
-            next_row = df.iloc[i + 1]
-            next_nulls = next_row.isnull().sum()
-            if next_nulls > 2:
-                for col_index, value in next_row.items():
-                    if pd.notnull(value):
-                        prev_value = str(df.at[i - 1, col_index]) if pd.notnull(df.at[i - 1, col_index]) else ''
-                        df.at[i - 1, col_index] = (prev_value + ' ' + str(value)).strip()
-                rows_to_drop.add(i + 1)
-                i += 1
-    i += 1
-
-df.drop(list(rows_to_drop), inplace=True)
-df.reset_index(drop=True, inplace=True)
-
-df.columns = df.iloc[0]
-df = df[1:].reset_index(drop=True)
-
-df.to_csv('cleaned_file.csv', index=False)
+    header_indices = df[df.apply(lambda row: row.tolist() == header_row, axis=1)].index
+    if len(header_indices) > 1:
+        df.drop(header_indices[1:], inplace=True)
+        df.reset_index(drop=True, inplace=True)
+
+    rows_to_drop = set()
+    i = 1
+    while i < len(df):
+        row = df.iloc[i]
+        num_nulls = row.isnull().sum()
+        if num_nulls > 2:
+            for col_index, value in row.items():
+                if pd.notnull(value):
+                    prev_value = str(df.at[i - 1, col_index]) if pd.notnull(df.at[i - 1, col_index]) else ''
+                    df.at[i - 1, col_index] = (prev_value + ' ' + str(value)).strip()
+            rows_to_drop.add(i)
+            if i + 1 < len(df):
+                next_row = df.iloc[i + 1]
+                next_nulls = next_row.isnull().sum()
+                if next_nulls > 2:
+                    for col_index, value in next_row.items():
+                        if pd.notnull(value):
+                            prev_value = str(df.at[i - 1, col_index]) if pd.notnull(df.at[i - 1, col_index]) else ''
+                            df.at[i - 1, col_index] = (prev_value + ' ' + str(value)).strip()
+                    rows_to_drop.add(i + 1)
+                    i += 1
+        i += 1
+
+    df.drop(list(rows_to_drop), inplace=True)
+    df.reset_index(drop=True, inplace=True)
+
+    df.columns = df.iloc[0]
+    df = df[1:].reset_index(drop=True)
+
+    df.to_csv(output_file, index=False)
+
 
+if __name__ == "__main__":
+    combine_up('crimelog.csv', 'cleaned_file.csv')
@@ -3,6 +3,7 @@ import pandas as pd
 import numpy as np
 import re
 import os
+from chunked import append_csv, detect_encoding, entry_chunks
 
 '''
 Can be used for files with null values in rows that should be all one row. Used for cleaning:
@@ -12,32 +13,36 @@ Can be used for files with null values in rows that should be all one row. Used
 '''
 
 
-def clean_crime_log(input_file, output_file=None, config=None):
+DEFAULT_CONFIG = {
+    "case_id_patterns": ["case", "event", "incident", "#", "number", "report"],
+    "location_patterns": ["location", "address", "place"],
+    "date_patterns": ["date", "time", "occur", "reported", "from", "to"],
+    "crime_patterns": ["crime", "type", "offense", "incident", "event"],
+    "disposition_patterns": ["disposition", "status"],
+    "metadata_patterns": [
+        r"\*MANUALLY ADDED / EDITED", r"Page \d+ of \d+", r"APDC  \(Rev\.",
+        r"Print Date:", r"\*\*VAWA PROTECTION"
+    ],
+    "standardize_disposition": True,
+    "remove_dates_from_disposition": True,
+    "title_case": False,
+    "min_header_matches": 2
+}
+
+
+def clean_crime_log(input_file, output_file=None, config=None, chunksize=None):
+    """
+    Clean a crime log CSV. Returns the cleaned DataFrame, or with chunksize (rows read at a
+    time, for logs too large to load at once) the number of rows written.
+    """
     if output_file is None:
         file_name, file_ext = os.path.splitext(input_file)
         output_file = f"{file_name}_cleaned{file_ext}"
 
-    default_config = {
-        "case_id_patterns": ["case", "event", "incident", "#", "number", "report"],
-        "location_patterns": ["location", "address", "place"],
-        "date_patterns": ["date", "time", "occur", "reported", "from", "to"],
-        "crime_patterns": ["crime", "type", "offense", "incident", "event"],
-        "disposition_patterns": ["disposition", "status"],
-        "metadata_patterns": [
-            r"\*MANUALLY ADDED / EDITED", r"Page \d+ of \d+", r"APDC  \(Rev\.",
-            r"Print Date:", r"\*\*VAWA PROTECTION"
-        ],
-        "standardize_disposition": True,
-        "remove_dates_from_disposition": True,
-        "title_case": False,
-        "min_header_matches": 2
-    }
-
-    if config:
-        default_config.update(config)
-
-    config = default_config
+    config = {**DEFAULT_CONFIG, **(config or {})}
     print(f"Reading file: {input_file}")
+    if chunksize:
+        return clean_crime_log_chunked(input_file, output_file, config, chunksize)
 
     df = read_csv_file(input_file)
     if df is None:
@@ -53,6 +58,30 @@ def clean_crime_log(input_file, output_file=None, config=None):
     return cleaned_df
 
 
+def clean_crime_log_chunked(input_file, output_file, config, chunksize):
+    """
+    clean_crime_log a chunk at a time, appending to output_file. Rows are only cut between
+    entries, so continuation rows are merged into their entry even across chunk boundaries.
+    """
+    def starts_entry(df):
+        case_column = identify_case_column(df, config["case_id_patterns"])
+        if not case_column:
+            return pd.Series(False, index=df.index)
+        return df[case_column].notna() & (df[case_column].astype(str).str.strip() != '')
+
+    chunks = pd.read_csv(input_file, encoding=detect_encoding(input_file), dtype=str, chunksize=chunksize)
+    original_rows = cleaned_rows = 0
+    for df in entry_chunks((prepare_crime_log(chunk, config) for chunk in chunks), starts_entry):
+        cleaned_df = merge_and_clean(df, config)
+        append_csv(cleaned_df, output_file, first=not original_rows)
+        original_rows += len(df)
+        cleaned_rows += len(cleaned_df)
+
+    print(f"Rows after removing metadata: {original_rows}, cleaned rows: {cleaned_rows}")
+    print(f"Cleaned data saved to: {output_file}")
+    return cleaned_rows
+
+
 def read_csv_file(input_file):
     try:
         df = pd.read_csv(input_file, encoding='utf-8')
@@ -80,13 +109,23 @@ def read_csv_file(input_file):
             return None
 
 
-def process_crime_log(df, config):
+def process_crime_log(df, config=None):
+    config = {**DEFAULT_CONFIG, **(config or {})}
+    return merge_and_clean(prepare_crime_log(df, config), config)
+
+
+def prepare_crime_log(df, config):
+    """The row by row part of process_crime_log: column names, metadata and repeated headers"""
     unnamed_cols = [col for col in df.columns if 'Unnamed' in str(col) or str(col).strip() == '']
     if unnamed_cols:
         df = df.drop(columns=unnamed_cols)
 
     df.columns = clean_column_names(df.columns)
-    df = remove_metadata_and_headers(df, config)
+    return remove_metadata_and_headers(df, config)
+
+
+def merge_and_clean(df, config):
+    """The rest of process_crime_log: merging continuation rows into their entries and cleaning values"""
     case_column = identify_case_column(df, config["case_id_patterns"])
     cleaned_df = combine_related_entries(df, case_column, config)
     cleaned_df = perform_additional_cleaning(cleaned_df, config)
@@ -112,7 +151,8 @@ def remove_metadata_and_headers(df, config):
     rows_to_remove = []
 
     for i, row in df.iterrows():
-        row_values = [str(val).strip() for val in row.values if pd.notna(val)]
+        # Blank cells are in every column name, so they don't count as header matches
+        row_values = [str(val).strip() for val in row.values if pd.notna(val) and str(val).strip()]
         row_text = ' '.join(row_values)
 
         if any(re.search(pattern, row_text) for pattern in config["metadata_patterns"]):
@@ -1,50 +1,116 @@
 import pandas as pd
 import re
+from collections import OrderedDict
 from datetime import datetime
+from chunked import append_csv
 
 
-def clean_usc_crime_log(input_file, output_file):
+# Rows searched for the header row
+HEADER_SEARCH_ROWS = 20
+DEFAULT_HEADERS = ['Date_Reported', 'Event_Case_Offense', 'Initial_Incident',
+                   'Final_Incident', 'Date_From', 'Date_To', 'Location',
+                   'Disposition', 'Extra1', 'Extra2']
+# Rows remembered for dropping duplicates across chunks
+DUPLICATE_WINDOW = 10_000
+
+
+def clean_usc_crime_log(input_file, output_file, chunksize=None):
+    """
+    Clean a USC crime log export. With chunksize, it's read (chunksize rows at a time),
+    cleaned and appended to output_file a chunk at a time, carrying the entry being merged
+    and the last DUPLICATE_WINDOW rows written (for dropping duplicates) from one chunk to
+    the next, so memory doesn't grow with the file. A duplicate of a row written further
+    back than that is kept; the log is in report order, so repeats (page splits, re-exported
+    days) are close together.
+    """
     # Read the CSV file
-    df = pd.read_csv(input_file, header=None)
+    if chunksize:
+        chunks = pd.read_csv(input_file, header=None, dtype=str, chunksize=max(chunksize, HEADER_SEARCH_ROWS))
+    else:
+        chunks = [pd.read_csv(input_file, header=None)]
 
+    columns = None
+    current_entry = {}
+    written = OrderedDict()
+    original_rows = cleaned_rows = 0
+    missing = {}
+
+    def write(entries):
+        nonlocal cleaned_rows
+        clean_df = clean_entries(entries, columns, written)
+        # Save cleaned data (the header with the first rows, or alone if there are none)
+        append_csv(clean_df, output_file, first=not cleaned_rows)
+        cleaned_rows += len(clean_df)
+        for col in clean_df.columns:
+            missing[col] = missing.get(col, 0) + clean_df[col].isna().sum()
+
+    for df in chunks:
+        if columns is None:
+            df = set_headers(df)
+            columns = df.columns
+        else:
+            df.columns = columns
+        original_rows += len(df)
+
+        # Process rows, handling multi-line entries
+        entries, current_entry = combine_entries(df, current_entry)
+        write(entries)
+
+    # Add the last entry
+    if current_entry:
+        write([current_entry])
+    print(f"Cleaned data saved to {output_file}")
+
+    # Print summary statistics
+    print(f"Original rows: {original_rows}")
+    print(f"Cleaned rows: {cleaned_rows}")
+    print(f"Removed rows: {original_rows - cleaned_rows}")
+    print("\nMissing values by column:")
+    for col, count in missing.items():
+        print(f"  {col}: {count} ({count / max(cleaned_rows, 1) * 100:.1f}%)")
+
+
+def set_headers(df):
+    """Name the columns from the log's header row and drop the rows up to it"""
     # Identify the actual header rows (appears to be row 7 based on analysis)
     header_row_index = None
-    for i in range(min(20, len(df))):
+    for i in range(min(HEADER_SEARCH_ROWS, len(df))):
         if isinstance(df.iloc[i, 0], str) and "Date Reported" in df.iloc[i, 0]:
             header_row_index = i
             break
 
     if header_row_index is None:
         print("Could not find header row. Using default headers.")
-        df.columns = ['Date_Reported', 'Event_Case_Offense', 'Initial_Incident',
-                      'Final_Incident', 'Date_From', 'Date_To', 'Location',
-                      'Disposition', 'Extra1', 'Extra2']
-    else:
-        # Extract the actual headers
-        headers = []
-        for col in range(df.shape[1]):
-            if col < len(df.iloc[header_row_index]) and pd.notna(df.iloc[header_row_index, col]):
-                header = df.iloc[header_row_index, col]
-                # Clean up header if needed
-                header = re.sub(r'\s+', '_', header.strip())
-                header = re.sub(r'[^a-zA-Z0-9_]', '', header)
-                # Convert to title case for headers
-                header = header.title()
-                headers.append(header)
-            else:
-                headers.append(f'Extra{col}')
-
-        # Set column names
-        df.columns = headers
-
-        # Remove header rows and other non-data rows
-        df = df.iloc[header_row_index + 1:].reset_index(drop=True)
-
-    # Create a new dataframe to store clean data
-    clean_df = pd.DataFrame(columns=df.columns)
-
-    # Process rows, handling multi-line entries
-    current_entry = {}
+        df.columns = DEFAULT_HEADERS
+        return df
+
+    # Extract the actual headers
+    headers = []
+    for col in range(df.shape[1]):
+        if col < len(df.iloc[header_row_index]) and pd.notna(df.iloc[header_row_index, col]):
+            header = df.iloc[header_row_index, col]
+            # Clean up header if needed
+            header = re.sub(r'\s+', '_', header.strip())
+            header = re.sub(r'[^a-zA-Z0-9_]', '', header)
+            # Convert to title case for headers
+            header = header.title()
+            headers.append(header)
+        else:
+            headers.append(f'Extra{col}')
+
+    # Set column names
+    df.columns = headers
+
+    # Remove header rows and other non-data rows
+    return df.iloc[header_row_index + 1:].reset_index(drop=True)
+
+
+def combine_entries(df, current_entry):
+    """
+    Merge multi-line entries. Returns (entries completed in df, the entry still open at its
+    end, which the next chunk may continue)
+    """
+    entries = []
     for i in range(len(df)):
         row = df.iloc[i]
 
@@ -52,7 +118,7 @@ def clean_usc_crime_log(input_file, output_file):
         if isinstance(row.iloc[0], str) and re.match(r'\d{2}/\d{2}/\d{2}\s+-\s+[A-Z]{3}', str(row.iloc[0])):
             # Save previous entry if it exists
             if current_entry:
-                clean_df = pd.concat([clean_df, pd.DataFrame([current_entry])], ignore_index=True)
+                entries.append(current_entry)
 
             # Start a new entry
             current_entry = {col: row.iloc[idx] for idx, col in enumerate(df.columns)}
@@ -67,9 +133,16 @@ def clean_usc_crime_log(input_file, output_file):
                         # Set new value
                         current_entry[col] = row.iloc[idx]
 
-    # Add the last entry
-    if current_entry:
-        clean_df = pd.concat([clean_df, pd.DataFrame([current_entry])], ignore_index=True)
+    return entries, current_entry
+
+
+def clean_entries(entries, columns, written, window=DUPLICATE_WINDOW):
+    """
+    Clean merged entries, dropping duplicates of each other and of the rows in written
+    (an OrderedDict keyed by the hashes of the last window rows output, which it updates)
+    """
+    # Create a new dataframe to store clean data
+    clean_df = pd.DataFrame(entries, columns=columns, dtype=object)
 
     # Clean up specific fields
     date_cols = [col for col in clean_df.columns if 'date' in col.lower()]
@@ -102,8 +175,14 @@ def clean_usc_crime_log(input_file, output_file):
             ~clean_df[date_reported_col].astype(str).str.lower().str.contains('date reported|daily crime|from:',
                                                                               na=False)]
 
-    # Drop duplicate rows
+    # Drop duplicate rows, including those of earlier chunks
     clean_df = clean_df.drop_duplicates().reset_index(drop=True)
+    hashes = pd.util.hash_pandas_object(clean_df.astype(str), index=False)
+    new = ~hashes.isin(written.keys())
+    clean_df = clean_df[new.to_numpy()].reset_index(drop=True)
+    written.update(dict.fromkeys(hashes[new]))
+    while len(written) > window:
+        written.popitem(last=False)
 
     # Remove any "#NAME?" values (likely Excel errors)
     clean_df = clean_df.replace("#NAME?", None)
@@ -114,18 +193,7 @@ def clean_usc_crime_log(input_file, output_file):
             lambda x: convert_to_proper_case(x) if isinstance(x, str) else x
         )
 
-    # Save cleaned data
-    clean_df.to_csv(output_file, index=False)
-    print(f"Cleaned data saved to {output_file}")
-
-    # Print summary statistics
-    print(f"Original rows: {len(df)}")
-    print(f"Cleaned rows: {len(clean_df)}")
-    print(f"Removed rows: {len(df) - len(clean_df)}")
-    print("\nMissing values by column:")
-    for col in clean_df.columns:
-        missing = clean_df[col].isna().sum()
-        print(f"  {col}: {missing} ({missing / len(clean_df) * 100:.1f}%)")
+    return clean_df
 
 
 def convert_to_proper_case(text):
@@ -44,6 +44,7 @@ import pandas as pd
 import sys
 import re
 from datetime import datetime
+from chunked import append_csv
 
 
 def combine_date_time(date_str, time_str):
@@ -94,17 +95,78 @@ def combine_date_time(date_str, time_str):
         return date_str
 
 
-def clean_csv(input_file, output_file):
+def clean_dataframe(df):
+    """
+    The Virginia Tech cleaning on a DataFrame already read in (what clean_csv does between
+    reading and saving), so it can run as an in-memory stage.
+
+    Returns:
+    DataFrame: The cleaned data
+    """
+    # Rename columns to match the desired format
+    column_mapping = {
+        "Date Reported": "Date/Time Reported",
+        "Criminal Offense": "Incident Type",
+        "Occurrence Date(s)": "Date/Time Occurr"
+    }
+
+    # Check if the expected columns exist
+    for old_col in column_mapping.keys():
+        if old_col not in df.columns:
+            print(f"Warning: Column '{old_col}' not found in the CSV")
+
+    # Only rename columns that exist
+    rename_dict = {k: v for k, v in column_mapping.items() if k in df.columns}
+    df = df.rename(columns=rename_dict)
+
+    # Strip whitespace from all string columns
+    for col in df.columns:
+        if df[col].dtype == 'object':
+            df[col] = df[col].str.strip()
+
+    # Format the Time(s) column if it exists
+    if "Time(s)" in df.columns:
+        df["Time(s)"] = df["Time(s)"].astype(str).apply(lambda x: format_time(x))
+
+        # Combine Date/Time Occurr with the formatted Time(s) if both columns exist
+        if "Date/Time Occurr" in df.columns:
+            df["Date/Time Occurr"] = df.apply(
+                lambda row: combine_date_time(row["Date/Time Occurr"], row["Time(s)"]),
+                axis=1
+            )
+
+            # Remove the Time(s) column as it's now part of Date/Time Occurr
+            df = df.drop(columns=["Time(s)"])
+        elif "Occurrence Date(s)" in df.columns:
+            # If we haven't renamed yet
+            df["Occurrence Date(s)"] = df.apply(
+                lambda row: combine_date_time(row["Occurrence Date(s)"], row["Time(s)"]),
+                axis=1
+            )
+            df = df.rename(columns={"Occurrence Date(s)": "Date/Time Occurr"})
+            df = df.drop(columns=["Time(s)"])
+
+    # Handle the Case# formatting (if column exists)
+    if "Case#" in df.columns:
+        df["Case#"] = df["Case#"].str.replace(" ", " ")  # This line ensures consistent spacing
+
+    return df
+
+
+def clean_csv(input_file, output_file, chunksize=None):
     """
     Clean and reformat the Virginia Tech CSV file according to the preferred format.
 
     Parameters:
     input_file (str): Path to the input CSV file
     output_file (str): Path to save the cleaned CSV file
+    chunksize (int): Rows to read, clean and append at a time, for files too large to load at once
     """
     try:
         # Read the CSV file with more robust error handling
         print(f"Reading file: {input_file}")
+        if chunksize:
+            return clean_csv_chunked(input_file, output_file, chunksize)
 
         # Try different parsing options to handle potential issues
         try:
@@ -135,52 +197,7 @@ def clean_csv(input_file, output_file):
         print(f"Original shape: {df.shape}")
         print(f"Original columns: {list(df.columns)}")
 
-        # Rename columns to match the desired format
-        column_mapping = {
-            "Date Reported": "Date/Time Reported",
-            "Criminal Offense": "Incident Type",
-            "Occurrence Date(s)": "Date/Time Occurr"
-        }
-
-        # Check if the expected columns exist
-        for old_col in column_mapping.keys():
-            if old_col not in df.columns:
-                print(f"Warning: Column '{old_col}' not found in the CSV")
-
-        # Only rename columns that exist
-        rename_dict = {k: v for k, v in column_mapping.items() if k in df.columns}
-        df = df.rename(columns=rename_dict)
-
-        # Strip whitespace from all string columns
-        for col in df.columns:
-            if df[col].dtype == 'object':
-                df[col] = df[col].str.strip()
-
-        # Format the Time(s) column if it exists
-        if "Time(s)" in df.columns:
-            df["Time(s)"] = df["Time(s)"].astype(str).apply(lambda x: format_time(x))
-
-            # Combine Date/Time Occurr with the formatted Time(s) if both columns exist
-            if "Date/Time Occurr" in df.columns:
-                df["Date/Time Occurr"] = df.apply(
-                    lambda row: combine_date_time(row["Date/Time Occurr"], row["Time(s)"]),
-                    axis=1
-                )
-
-                # Remove the Time(s) column as it's now part of Date/Time Occurr
-                df = df.drop(columns=["Time(s)"])
-            elif "Occurrence Date(s)" in df.columns:
-                # If we haven't renamed yet
-                df["Occurrence Date(s)"] = df.apply(
-                    lambda row: combine_date_time(row["Occurrence Date(s)"], row["Time(s)"]),
-                    axis=1
-                )
-                df = df.rename(columns={"Occurrence Date(s)": "Date/Time Occurr"})
-                df = df.drop(columns=["Time(s)"])
-
-        # Handle the Case# formatting (if column exists)
-        if "Case#" in df.columns:
-            df["Case#"] = df["Case#"].str.replace(" ", " ")  # This line ensures consistent spacing
+        df = clean_dataframe(df)
 
         # Save the cleaned data
         print(f"Saving cleaned file to: {output_file}")
@@ -199,6 +216,19 @@ def clean_csv(input_file, output_file):
         return False
 
 
+def clean_csv_chunked(input_file, output_file, chunksize):
+    """clean_csv a chunk at a time (standard parsing only), appending to output_file"""
+    rows = 0
+    for position, chunk in enumerate(pd.read_csv(input_file, dtype=str, chunksize=chunksize)):
+        df = clean_dataframe(chunk)
+        append_csv(df, output_file, first=position == 0)
+        rows += len(df)
+
+    print(f"Saved cleaned file to: {output_file}")
+    print(f"Cleaned rows: {rows}")
+    return True
+
+
 if __name__ == "__main__":
     # Check if command line arguments are provided
     if len(sys.argv) >= 3:
@@ -1,50 +1,15 @@
 // Global variables
 let globalData = {};
-let availableFiles = [
-  "ArizonaStateUniversity.csv",
-  "BostonUniversity.csv",
-  "BrownUniversity.csv",
-  "DrexelUniversity.csv",
-  "EmoryUniversity.csv",
-  "FIU.csv",
-  "GeorgiaTech.csv",
-  "HarvardUniversity.csv",
-  "IndianaUniversity.csv",
-  "MichiganStateUniversity.csv",
-  "NYU.csv",
-  "NortheasternUniversity.csv",
-  "OhioStateUniversity.csv",
-  "PennState.csv",
-  "PrincetonUniversity.csv",
-  "PurdueUniversity.csv",
-  "QuinnipiacUniversity.csv",
-  "RutgersUniversity.csv",
-  "TempleUniversity.csv",
-  "TexasA&M.csv",
-  "UCBerkley.csv",
-  "UCDavis.csv",
-  "UCF.csv",
-  "UCLA.csv",
-  "UCRiverside.csv",
-  "UCSD.csv",
-  "UChicago.csv",
-  "UConn.csv",
-  "UMassAmherst.csv",
-  "UVA.csv",
-  "UniversityOfAlabama.csv",
-  "UniversityOfArizona.csv",
-  "UniversityOfFlorida.csv",
-  "UniversityOfMichigan.csv",
-  "UniversityOfMinnesota.csv",
-  "UniversityOfNewMexico.csv",
-  "UniversityOfPennsylvania.csv",
-  "UniversityOfSouthCalifornia.csv",
-  "UniversityOfSouthCarolina.csv",
-  "UniversityOfWashington.csv",
-  "UniversityOfWisconsin-Madison.csv",
-  "UniversityofCincinnati.csv",
-  "VirginiaTech.csv"
-];
+let availableFiles = [];   // file names, from the manifest
+let manifest = null;
+
+// Written by pipeline/build_manifest.py: every data file with its content hash, size,
+// row count and date range
+const MANIFEST_PATH = 'data/manifest.json';
+
+// Name of the combined aggregate bundle written by pipeline/build_aggregates.py
+const COMBINED_BUNDLE = 'all';
+const WEEKDAYS = ['Monday', 'Tuesday', 'Wednesday', 'Thursday', 'Friday', 'Saturday', 'Sunday'];
 
 // Initialize the dashboard
 document.addEventListener('DOMContentLoaded', function() {
@@ -228,11 +193,43 @@ function createErrorContainer() {
     }
 }
 
-// Load available CSV files from hardcoded array
+// Load the list of available CSV files from the data manifest
 function loadAvailableFiles() {
     console.log("Loading available files...");
-    
-    // Populate the file selector dropdown
+
+    loadManifest()
+        .then(data => {
+            manifest = data;
+            availableFiles = manifest.daily.map(entry => entry.file);
+            populateFileSelector();
+        })
+        .catch(error => {
+            console.error('Error loading manifest:', error);
+            document.getElementById('loadingMessage').style.display = 'none';
+            const errorContainer = document.getElementById('errorContainer');
+            errorContainer.textContent = `Error: could not load ${MANIFEST_PATH} (${error.message}). Run pipeline/build_manifest.py.`;
+            errorContainer.style.display = 'block';
+        });
+}
+
+// Fetch the data manifest, always revalidating it since the file URLs it lists are versioned
+function loadManifest() {
+    return fetch(MANIFEST_PATH, { cache: 'no-cache' }).then(response => {
+        if (!response.ok) {
+            throw new Error(`${response.status}: ${response.statusText}`);
+        }
+        return response.json();
+    });
+}
+
+// Versioned URL for a manifest entry, so browsers can cache data files until their content changes
+function manifestUrl(entry) {
+    const path = entry.path.split('/').map(encodeURIComponent).join('/');
+    return `${path}?v=${entry.hash}`;
+}
+
+// Populate the file selector dropdown from availableFiles
+function populateFileSelector() {
     const fileSelector = document.getElementById('fileSelector');
     fileSelector.innerHTML = ''; // Clear existing options
     
@@ -276,12 +273,12 @@ function handleFileSelection() {
     // Load the selected data file
     loadData(selectedFile)
         .then(data => {
-            if (!data || !data.records || data.records.length === 0) {
+            if (!data || !data.records) {
                 throw new Error('No valid data records were loaded');
             }
-            
+
             globalData = data;
-            console.log("Data loaded successfully:", data.records.length, "records");
+            console.log("Data loaded successfully:", data.records, "records");
             
             // Debug data
             debugData(data);
@@ -305,12 +302,121 @@ function handleFileSelection() {
         });
 }
 
-// Load data from CSV file
+// Load the aggregate bundle for a file (or all files), falling back to the raw CSVs
 function loadData(filename) {
+    const name = filename === 'Combine All Files' ? COMBINED_BUNDLE : filename.replace('.csv', '');
+
+    return loadBundle(name)
+        .catch(error => {
+            console.warn(`No aggregate bundle for ${name} (${error.message}), aggregating the CSV data instead`);
+            return loadRecords(filename).then(data => aggregateRecords(data.records, name));
+        });
+}
+
+// Fetch a precomputed aggregate bundle, if the manifest lists one
+function loadBundle(name) {
+    const entry = (manifest.aggregates || {})[name];
+    if (!entry) {
+        return Promise.reject(new Error('not built'));
+    }
+
+    const path = manifestUrl(entry);
+    return fetch(path).then(response => {
+        if (!response.ok) {
+            throw new Error(`${response.status}: ${response.statusText}`);
+        }
+        console.log(`Loaded aggregate bundle from ${path}`);
+        return response.json();
+    });
+}
+
+/**
+ * Aggregate raw records into the same bundle shape build_aggregates.py writes,
+ * so the charts only ever deal with bundles
+ * @param {Array} records - Records from loadSingleFile
+ * @param {string} name - University name or COMBINED_BUNDLE
+ * @return {Object} - The aggregate bundle
+ */
+function aggregateRecords(records, name) {
+    const bundle = {
+        university: name,
+        records: records.length,
+        months: {},
+        hours: {},
+        days: 0,
+        weekdays: {},
+        locations: [],
+        dispositions: {},
+        dollars: {},
+        types: {}
+    };
+    WEEKDAYS.forEach(day => { bundle.weekdays[day] = 0; });
+
+    const allDates = new Set();
+    const typeDates = {};
+    const locationCounts = {};
+
+    records.forEach(record => {
+        const type = record['Incident Type'];
+        const entry = bundle.types[type] || (bundle.types[type] = { count: 0 });
+        entry.count++;
+
+        locationCounts[record['Location']] = (locationCounts[record['Location']] || 0) + 1;
+        bundle.dispositions[record['Disposition']] = (bundle.dispositions[record['Disposition']] || 0) + 1;
+
+        if (typeof type === 'string' && type.includes('$')) {
+            const matches = type.match(/\$(\d+(?:,\d+)*(?:\.\d+)?)/);
+            const amount = matches ? parseFloat(matches[1].replace(/,/g, '')) : NaN;
+            if (!isNaN(amount)) {
+                bundle.dollars[type] = (bundle.dollars[type] || 0) + amount;
+            }
+        }
+
+        if (!record['Date/Time Occurred']) return;
+        const { date, time } = extractDateTimeParts(record['Date/Time Occurred']);
+
+        const parsedDate = date ? safeDateParse(date) : null;
+        if (parsedDate) {
+            const month = `${parsedDate.getFullYear()}-${String(parsedDate.getMonth() + 1).padStart(2, '0')}`;
+            bundle.months[month] = (bundle.months[month] || 0) + 1;
+            entry.months = entry.months || {};
+            entry.months[month] = (entry.months[month] || 0) + 1;
+
+            const weekday = ['Sunday', 'Monday', 'Tuesday', 'Wednesday', 'Thursday', 'Friday', 'Saturday'][parsedDate.getDay()];
+            bundle.weekdays[weekday]++;
+
+            allDates.add(date);
+            (typeDates[type] = typeDates[type] || new Set()).add(date);
+        }
+
+        const hour = time ? extractHour(time) : null;
+        if (hour !== null) {
+            bundle.hours[hour] = (bundle.hours[hour] || 0) + 1;
+            entry.hours = entry.hours || {};
+            entry.hours[hour] = (entry.hours[hour] || 0) + 1;
+        }
+    });
+
+    bundle.days = allDates.size;
+    Object.entries(typeDates).forEach(([type, dates]) => { bundle.types[type].days = dates.size; });
+    bundle.locations = Object.entries(locationCounts)
+        .sort((a, b) => b[1] - a[1])
+        .slice(0, 15);
+
+    const months = Object.keys(bundle.months).sort();
+    bundle.first_month = months[0] || null;
+    bundle.last_month = months[months.length - 1] || null;
+
+    return bundle;
+}
+
+// Load raw records from CSV file(s)
+function loadRecords(filename) {
     return new Promise((resolve, reject) => {
         if (filename === 'Combine All Files') {
-            // Load and combine all files from the availableFiles array
-            const allFilesPromises = availableFiles.map(file => {
+            // Load and combine all files that have records, per the manifest
+            const files = manifest.daily.filter(entry => entry.rows > 0).map(entry => entry.file);
+            const allFilesPromises = files.map(file => {
                 return loadSingleFile(file).catch(error => {
                     console.warn(`Error loading ${file}:`, error);
                     return []; // Return empty array for this file
@@ -341,134 +447,116 @@ function loadData(filename) {
 // Helper function to load a single file
 function loadSingleFile(filename) {
     return new Promise((resolve, reject) => {
-        // Try multiple possible paths
-        const possiblePaths = [
-            `data/daily/${filename}`,
-            `./data/daily/${filename}`,
-            `../data/daily/${filename}`,
-        ];
-        
-        console.log(`Trying to load ${filename} from possible paths:`, possiblePaths);
-        
-        // Function to try loading from different paths
-        function tryNextPath(pathIndex) {
-            if (pathIndex >= possiblePaths.length) {
-                reject(new Error(`Failed to load ${filename} from all attempted paths`));
-                return;
-            }
-            
-            const path = possiblePaths[pathIndex];
-            console.log(`Attempting to load from ${path}`);
-            
-            fetch(path)
-                .then(response => {
-                    if (!response.ok) {
-                        console.warn(`Failed to load ${filename} from ${path} (${response.status}: ${response.statusText})`);
-                        return tryNextPath(pathIndex + 1);
+        const entry = manifest.daily.find(item => item.file === filename);
+        if (!entry) {
+            reject(new Error(`${filename} is not listed in ${MANIFEST_PATH}`));
+            return;
+        }
+
+        const path = manifestUrl(entry);
+        console.log(`Attempting to load ${filename} from ${path}`);
+
+        fetch(path)
+            .then(response => {
+                if (!response.ok) {
+                    throw new Error(`Failed to load ${filename} from ${path} (${response.status}: ${response.statusText})`);
+                }
+                console.log(`Successfully loaded ${filename} from ${path}`);
+                return response.text();
+            })
+            .then(text => {
+                console.log(`Parsing CSV data for ${filename} (first 100 chars):`, text.substring(0, 100));
+                
+                try {
+                    // Detect and handle BOM (Byte Order Mark) if present
+                    // Some CSV exports from Excel/database programs include BOM characters
+                    if (text.charCodeAt(0) === 0xFEFF) {
+                        text = text.substring(1);
                     }
-                    console.log(`Successfully loaded ${filename} from ${path}`);
-                    return response.text();
-                })
-                .then(text => {
-                    if (!text) return; // Skip if previous step returned undefined 
                     
-                    console.log(`Parsing CSV data for ${filename} (first 100 chars):`, text.substring(0, 100));
-                    
-                    try {
-                        // Detect and handle BOM (Byte Order Mark) if present
-                        // Some CSV exports from Excel/database programs include BOM characters
-                        if (text.charCodeAt(0) === 0xFEFF) {
-                            text = text.substring(1);
+                    // Parse CSV data using Papa Parse with more robust options
+                    const result = Papa.parse(text, { 
+                        header: true, 
+                        dynamicTyping: true, 
+                        skipEmptyLines: true,
+                        delimitersToGuess: [',', '\t', '|', ';'], // Try different delimiters
+                        transformHeader: header => header ? header.trim() : 'Unknown', // Trim headers automatically
+                        error: (error) => {
+                            console.error("PapaParse error:", error);
                         }
-                        
-                        // Parse CSV data using Papa Parse with more robust options
-                        const result = Papa.parse(text, { 
-                            header: true, 
-                            dynamicTyping: true, 
-                            skipEmptyLines: true,
-                            delimitersToGuess: [',', '\t', '|', ';'], // Try different delimiters
-                            transformHeader: header => header ? header.trim() : 'Unknown', // Trim headers automatically
-                            error: (error) => {
-                                console.error("PapaParse error:", error);
+                    });
+                    
+                    if (result.errors && result.errors.length > 0) {
+                        console.warn(`Warnings parsing ${filename}:`, result.errors);
+                    }
+                    
+                    // Clean up column names by trimming whitespace
+                    if (result.meta && result.meta.fields) {
+                        const trimmedFieldsMap = {};
+                        result.meta.fields.forEach(field => {
+                            if (field) { // Only process non-null fields
+                                trimmedFieldsMap[field] = field.trim();
                             }
                         });
                         
-                        if (result.errors && result.errors.length > 0) {
-                            console.warn(`Warnings parsing ${filename}:`, result.errors);
-                        }
-                        
-                        // Clean up column names by trimming whitespace
-                        if (result.meta && result.meta.fields) {
-                            const trimmedFieldsMap = {};
-                            result.meta.fields.forEach(field => {
-                                if (field) { // Only process non-null fields
-                                    trimmedFieldsMap[field] = field.trim();
+                        // Apply trimmed field names to data
+                        result.data = result.data.map(record => {
+                            const cleanedRecord = {};
+                            Object.keys(record).forEach(key => {
+                                if (key) { // Only process non-null keys
+                                    const cleanKey = key.trim();
+                                    cleanedRecord[cleanKey] = record[key];
                                 }
                             });
-                            
-                            // Apply trimmed field names to data
-                            result.data = result.data.map(record => {
-                                const cleanedRecord = {};
-                                Object.keys(record).forEach(key => {
-                                    if (key) { // Only process non-null keys
-                                        const cleanKey = key.trim();
-                                        cleanedRecord[cleanKey] = record[key];
-                                    }
-                                });
-                                return cleanedRecord;
-                            });
-                        }
+                            return cleanedRecord;
+                        });
+                    }
+                    
+                    const validRecords = result.data
+                        .filter(record => record && Object.keys(record).length > 1)
+                        .map(record => {
+                            // Add source file and ensure all records have the same structure
+                            return {
+                                ...record, 
+                                'Source File': filename,
+                                // Ensure critical fields exist with fallback values
+                                'Incident Type': record['Incident Type'] || 'Unknown',
+                                'Date/Time Occurred': record['Date/Time Occurred'] || null,
+                                'Location': record['Location'] || 'Unknown',
+                                'Disposition': record['Disposition'] || 'Unknown'
+                            };
+                        });
                         
-                        const validRecords = result.data
-                            .filter(record => record && Object.keys(record).length > 1)
-                            .map(record => {
-                                // Add source file and ensure all records have the same structure
-                                return {
-                                    ...record, 
-                                    'Source File': filename,
-                                    // Ensure critical fields exist with fallback values
-                                    'Incident Type': record['Incident Type'] || 'Unknown',
-                                    'Date/Time Occurred': record['Date/Time Occurred'] || null,
-                                    'Location': record['Location'] || 'Unknown',
-                                    'Disposition': record['Disposition'] || 'Unknown'
-                                };
-                            });
-                            
-                        if (validRecords.length === 0) {
-                            console.error(`File ${filename} was loaded but contains no valid data records`);
-                            reject(new Error(`File ${filename} contains no valid data records`));
-                        } else {
-                            console.log(`Successfully parsed ${validRecords.length} records from ${filename}`);
-                            resolve(validRecords);
-                        }
-                    } catch (parseError) {
-                        console.error(`Error parsing CSV data for ${filename}:`, parseError);
-                        reject(new Error(`Error parsing CSV file: ${parseError.message}`));
+                    if (validRecords.length === 0) {
+                        console.error(`File ${filename} was loaded but contains no valid data records`);
+                        reject(new Error(`File ${filename} contains no valid data records`));
+                    } else {
+                        console.log(`Successfully parsed ${validRecords.length} records from ${filename}`);
+                        resolve(validRecords);
                     }
-                })
-                .catch(error => {
-                    console.error(`Network error loading ${filename} from ${path}:`, error);
-                    tryNextPath(pathIndex + 1);
-                });
-        }
-        
-        tryNextPath(0);
+                } catch (parseError) {
+                    console.error(`Error parsing CSV data for ${filename}:`, parseError);
+                    reject(new Error(`Error parsing CSV file: ${parseError.message}`));
+                }
+            })
+            .catch(error => {
+                console.error(`Error loading ${filename} from ${path}:`, error);
+                reject(error);
+            });
     });
 }
 
 // Debugging helper function
 function debugData(data) {
-    console.log("Data sample:", data.records.slice(0, 3));
-    console.log("Number of records:", data.records.length);
-    
-    if (data.records.length > 0) {
-        console.log("Available fields:", Object.keys(data.records[0]));
+    console.log("Bundle:", data.university);
+    console.log("Number of records:", data.records);
 
-        const requiredFields = ['Incident Type', 'Date/Time Occurred', 'Location', 'Disposition'];
-        const missingFields = requiredFields.filter(field => !Object.keys(data.records[0]).includes(field));
-        
-        if (missingFields.length > 0) {
-            console.warn("Missing required fields:", missingFields);
+    if (data.records > 0) {
+        console.log("Incident types:", Object.keys(data.types).length);
+        console.log("Months:", data.first_month, "to", data.last_month);
+
+        if (Object.keys(data.months).length === 0) {
+            console.warn("No parseable Date/Time Occurred values");
         }
     } else {
         console.error("No records loaded!");
@@ -499,11 +587,8 @@ function displayNoDataMessage(chartId, message) {
 
 function populateCrimeTypes(data) {
     // Get all unique incident types, filter out nulls and empty strings
-    const crimeTypes = [...new Set(
-        data.records
-            .map(record => record['Incident Type'])
-            .filter(type => type !== null && type !== undefined && type !== '')
-    )];
+    const crimeTypes = Object.keys(data.types)
+        .filter(type => type !== null && type !== undefined && type !== '');
     crimeTypes.sort();
 
     const crimeTypeSelector = document.getElementById('crimeTypeSelector');
@@ -533,30 +618,16 @@ function populateCrimeTypes(data) {
 
 
 function setupDateSelectors(data) {
-    // Extract dates and find min/max, handling possible null values
-    const dates = data.records
-        .map(record => {
-            if (!record['Date/Time Occurred']) return null;
-            
-            // Use our helper function to extract date part
-            const { date } = extractDateTimeParts(record['Date/Time Occurred']);
-            if (!date) return null;
-            
-            // Parse the date safely
-            const parsedDate = safeDateParse(date);
-            return parsedDate; // Will be null if invalid
-        })
-        .filter(date => date !== null);
-    
-    dates.sort((a, b) => a - b);
-    
-    if (dates.length === 0) {
+    // First and last month come precomputed in the bundle
+    if (!data.first_month || !data.last_month) {
         console.warn("No valid dates found in the data");
         return;
     }
-    
-    const minDate = dates[0];
-    const maxDate = dates[dates.length - 1];
+
+    const [minYear, minMonth] = data.first_month.split('-').map(Number);
+    const [maxYear, maxMonth] = data.last_month.split('-').map(Number);
+    const minDate = new Date(minYear, minMonth - 1, 1);
+    const maxDate = new Date(maxYear, maxMonth - 1, 1);
     
     // Generate array of year-month strings
     const months = [];
@@ -631,27 +702,18 @@ function updateVisualizations() {
     const startDate = document.getElementById('startDateSelector').value;
     const endDate = document.getElementById('endDateSelector').value;
 
-    createIncidentTypeDistribution(globalData.records);
-    createReportsPerMonth(globalData.records, selectedCrimeType, startDate, endDate);
-    createLocationHeatmap(globalData.records);
-    createDayOfWeekAnalysis(globalData.records);
-    createTimeAnalysis(globalData.records, selectedTimeCrimeType);
-    createIncidentStatusBreakdown(globalData.records);
-    createDollarAmountVisualization(globalData.records);
+    createIncidentTypeDistribution(globalData);
+    createReportsPerMonth(globalData, selectedCrimeType, startDate, endDate);
+    createLocationHeatmap(globalData);
+    createDayOfWeekAnalysis(globalData);
+    createTimeAnalysis(globalData, selectedTimeCrimeType);
+    createIncidentStatusBreakdown(globalData);
+    createDollarAmountVisualization(globalData);
 }
 
 function createIncidentTypeDistribution(data) {
-    const incidentCounts = {};
-    data.forEach(record => {
-        // Skip if incident type is missing
-        if (!record['Incident Type']) return;
-        
-        const type = record['Incident Type'];
-        incidentCounts[type] = (incidentCounts[type] || 0) + 1;
-    });
-
-    const plotData = Object.entries(incidentCounts)
-        .map(([type, count]) => ({ type, count }))
+    const plotData = Object.entries(data.types)
+        .map(([type, entry]) => ({ type, count: entry.count }))
         .filter(item => item.count > 1)
         .sort((a, b) => b.count - a.count);
     
@@ -704,32 +766,8 @@ function createIncidentTypeDistribution(data) {
 }
 
 function createReportsPerMonth(data, crimeType, startDate, endDate) {
-    // Filter by crime type if specified, ensuring we skip null values
-    if (crimeType) {
-        data = data.filter(record => record['Incident Type'] === crimeType);
-    }
-    
-    const monthCounts = {};
-    data.forEach(record => {
-        // Skip if date is missing or invalid
-        if (!record['Date/Time Occurred']) return;
-        
-        // Handle potential date parsing issues
-        try {
-            const dateTimeStr = record['Date/Time Occurred'];
-            const { date } = extractDateTimeParts(dateTimeStr);
-            
-            if (!date) return;
-            
-            const parsedDate = safeDateParse(date);
-            if (!parsedDate) return;
-            
-            const month = `${parsedDate.getFullYear()}-${String(parsedDate.getMonth() + 1).padStart(2, '0')}`;
-            monthCounts[month] = (monthCounts[month] || 0) + 1;
-        } catch (e) {
-            console.warn("Error parsing date:", record['Date/Time Occurred']);
-        }
-    });
+    // Monthly counts are pre-bucketed per crime type
+    const monthCounts = crimeType ? ((data.types[crimeType] || {}).months || {}) : data.months;
 
     let months = Object.keys(monthCounts).sort();
     if (startDate) {
@@ -785,19 +823,8 @@ function createReportsPerMonth(data, crimeType, startDate, endDate) {
 
 
 function createLocationHeatmap(data) {
-    const locationCounts = {};
-    data.forEach(record => {
-        // Skip if location is missing
-        if (!record['Location']) return;
-        
-        const location = record['Location'];
-        locationCounts[location] = (locationCounts[location] || 0) + 1;
-    });
-
-    const plotData = Object.entries(locationCounts)
-        .map(([location, count]) => ({ location, count }))
-        .sort((a, b) => b.count - a.count)
-        .slice(0, 15);
+    const plotData = data.locations
+        .map(([location, count]) => ({ location, count }));
     
     // If no data, display a message
     if (plotData.length === 0) {
@@ -857,38 +884,8 @@ function createLocationHeatmap(data) {
 }
 
 function createDayOfWeekAnalysis(data) {
-    const weekdayCounts = {
-        'Sunday': 0,
-        'Monday': 0,
-        'Tuesday': 0,
-        'Wednesday': 0,
-        'Thursday': 0,
-        'Friday': 0,
-        'Saturday': 0
-    };
-    
-    let hasValidDates = false;
-    
-    data.forEach(record => {
-        // Skip if date is missing or invalid
-        if (!record['Date/Time Occurred']) return;
-        
-        try {
-            const dateTimeStr = record['Date/Time Occurred'];
-            const { date } = extractDateTimeParts(dateTimeStr);
-            
-            if (!date) return;
-            
-            const parsedDate = safeDateParse(date);
-            if (!parsedDate || isNaN(parsedDate.getTime())) return; // Skip invalid dates
-            
-            hasValidDates = true;
-            const weekday = ['Sunday', 'Monday', 'Tuesday', 'Wednesday', 'Thursday', 'Friday', 'Saturday'][parsedDate.getDay()];
-            weekdayCounts[weekday]++;
-        } catch (e) {
-            console.warn("Error parsing date for day of week:", record['Date/Time Occurred']);
-        }
-    });
+    const weekdayCounts = data.weekdays;
+    const hasValidDates = Object.values(weekdayCounts).some(count => count > 0);
 
     // If no valid dates, display a message
     if (!hasValidDates) {
@@ -896,8 +893,8 @@ function createDayOfWeekAnalysis(data) {
         return;
     }
 
-    const weekdays = ['Monday', 'Tuesday', 'Wednesday', 'Thursday', 'Friday', 'Saturday', 'Sunday'];
-    
+    const weekdays = WEEKDAYS;
+
     const plotlyData = [{
         x: weekdays,
         y: weekdays.map(day => weekdayCounts[day]),
@@ -927,33 +924,14 @@ function createDayOfWeekAnalysis(data) {
 
 
 function createTimeAnalysis(data, crimeType) {
-    // Filter by crime type if specified
-    if (crimeType) {
-        data = data.filter(record => record['Incident Type'] === crimeType);
-    }
+    // Hourly counts and the number of distinct days are pre-bucketed per crime type
+    const counts = crimeType ? (data.types[crimeType] || {}) : data;
 
     const hourlyCounts = Array(24).fill(0);
     let validTimeCount = 0;
-    
-    data.forEach(record => {
-        // Skip if date/time is missing
-        if (!record['Date/Time Occurred']) return;
-        
-        // More robust handling of the date/time string
-        try {
-            const dateTimeStr = record['Date/Time Occurred'];
-            const { time } = extractDateTimeParts(dateTimeStr);
-            
-            if (!time) return; // No time component
-            
-            const hour = extractHour(time);
-            if (hour !== null) {
-                hourlyCounts[hour]++;
-                validTimeCount++;
-            }
-        } catch (e) {
-            console.warn("Error parsing time:", record['Date/Time Occurred']);
-        }
+    Object.entries(counts.hours || {}).forEach(([hour, count]) => {
+        hourlyCounts[hour] = count;
+        validTimeCount += count;
     });
 
     // If no valid times, display a message
@@ -962,15 +940,7 @@ function createTimeAnalysis(data, crimeType) {
         return;
     }
 
-    // Calculate days based on unique dates to avoid division by zero
-    const uniqueDates = new Set();
-    data.forEach(record => {
-        if (record['Date/Time Occurred']) {
-            const { date } = extractDateTimeParts(record['Date/Time Occurred']);
-            if (date) uniqueDates.add(date);
-        }
-    });
-    const numDays = Math.max(1, uniqueDates.size); // Ensure at least 1 to avoid division by zero
+    const numDays = Math.max(1, counts.days || 0); // Ensure at least 1 to avoid division by zero
     
     const avgOccurrencesPerHour = hourlyCounts.map(count => (count / numDays).toFixed(2));
 
@@ -1007,17 +977,8 @@ function createTimeAnalysis(data, crimeType) {
 
 
 function createIncidentStatusBreakdown(data) {
-    const statusCounts = {};
-    let hasValidStatus = false;
-    
-    data.forEach(record => {
-        // Skip if disposition is missing
-        if (!record['Disposition']) return;
-        
-        const status = record['Disposition'];
-        statusCounts[status] = (statusCounts[status] || 0) + 1;
-        hasValidStatus = true;
-    });
+    const statusCounts = data.dispositions;
+    const hasValidStatus = Object.keys(statusCounts).length > 0;
 
     // If no valid status, display a message
     if (!hasValidStatus) {
@@ -1052,50 +1013,14 @@ function createIncidentStatusBreakdown(data) {
 
 
 function createDollarAmountVisualization(data) {
-    // Extract dollar amount incidents
-    const dollarIncidents = data.filter(record => record['Incident Type'] && record['Incident Type'].includes('$'));
-    
-    if (dollarIncidents.length === 0) {
-        displayNoDataMessage('dollarAmountChart', 'No dollar amount data available');
-        return;
-    }
-
-    const theftData = [];
-    
-    dollarIncidents.forEach(record => {
-        const incidentType = record['Incident Type'];
-        // Improved regex to handle various dollar amount formats
-        const matches = incidentType.match(/\$(\d+(?:,\d+)*(?:\.\d+)?)/);
-        
-        if (matches) {
-            try {
-                // Remove commas and convert to float
-                const amountString = matches[1].replace(/,/g, '');
-                const amount = parseFloat(amountString);
-                
-                if (!isNaN(amount)) {
-                    theftData.push({
-                        type: incidentType,
-                        amount: amount
-                    });
-                }
-            } catch (e) {
-                console.warn("Error parsing dollar amount:", incidentType);
-            }
-        }
-    });
+    // Total amount per incident type, parsed from the "$" in the type name
+    const groupedData = data.dollars;
 
-    // If no valid theft data, display a message
-    if (theftData.length === 0) {
-        displayNoDataMessage('dollarAmountChart', 'No valid dollar amount data could be extracted');
+    if (Object.keys(groupedData).length === 0) {
+        displayNoDataMessage('dollarAmountChart', 'No dollar amount data available');
         return;
     }
 
-    const groupedData = {};
-    theftData.forEach(item => {
-        groupedData[item.type] = (groupedData[item.type] || 0) + item.amount;
-    });
-
     const plotData = Object.entries(groupedData)
         .map(([type, amount]) => ({ type, amount }))
         .sort((a, b) => b.amount - a.amount);
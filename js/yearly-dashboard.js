@@ -1,14 +1,11 @@
 // Global variables
 let globalData = {};
-let availableFiles = [
-  "BentleyUniversity.csv",
-  "GCU.csv",
-  "GeorgiaState.csv",
-  "ProvidenceCollege.csv",
-  "StanfordUniversity.csv",
-  "UMiami.csv",
-  "UniversityOfColorado.csv"
-];
+let availableFiles = [];   // file names, from the manifest
+let manifest = null;
+
+// Written by pipeline/build_manifest.py: every data file with its content hash, size,
+// row count and date range
+const MANIFEST_PATH = 'data/manifest.json';
 
 // Initialize the dashboard
 document.addEventListener('DOMContentLoaded', function() {
@@ -47,11 +44,43 @@ function createErrorContainer() {
     }
 }
 
-// Load available CSV files from hardcoded array
+// Load the list of available CSV files from the data manifest
 function loadAvailableFiles() {
     console.log("Loading available files...");
-    
-    // Populate the file selector dropdown
+
+    loadManifest()
+        .then(data => {
+            manifest = data;
+            availableFiles = manifest.yearly.map(entry => entry.file);
+            populateFileSelector();
+        })
+        .catch(error => {
+            console.error('Error loading manifest:', error);
+            document.getElementById('loadingMessage').style.display = 'none';
+            const errorContainer = document.getElementById('errorContainer');
+            errorContainer.textContent = `Error: could not load ${MANIFEST_PATH} (${error.message}). Run pipeline/build_manifest.py.`;
+            errorContainer.style.display = 'block';
+        });
+}
+
+// Fetch the data manifest, always revalidating it since the file URLs it lists are versioned
+function loadManifest() {
+    return fetch(MANIFEST_PATH, { cache: 'no-cache' }).then(response => {
+        if (!response.ok) {
+            throw new Error(`${response.status}: ${response.statusText}`);
+        }
+        return response.json();
+    });
+}
+
+// Versioned URL for a manifest entry, so browsers can cache data files until their content changes
+function manifestUrl(entry) {
+    const path = entry.path.split('/').map(encodeURIComponent).join('/');
+    return `${path}?v=${entry.hash}`;
+}
+
+// Populate the file selector dropdown from availableFiles
+function populateFileSelector() {
     const fileSelector = document.getElementById('fileSelector');
     fileSelector.innerHTML = ''; // Clear existing options
     
@@ -160,70 +189,54 @@ function loadData(filename) {
 // Helper function to load a single file
 function loadSingleFile(filename) {
     return new Promise((resolve, reject) => {
-        // Try multiple possible paths
-        const possiblePaths = [
-            `data/yearly/${filename}`,
-            `./data/yearly/${filename}`,
-            `../data/yearly/${filename}`,
-        ];
-        
-        console.log(`Trying to load ${filename} from possible paths:`, possiblePaths);
-        
-        // Function to try loading from different paths
-        function tryNextPath(pathIndex) {
-            if (pathIndex >= possiblePaths.length) {
-                reject(new Error(`Failed to load ${filename} from all attempted paths`));
-                return;
-            }
-            
-            const path = possiblePaths[pathIndex];
-            console.log(`Attempting to load from ${path}`);
-            
-            fetch(path)
-                .then(response => {
-                    if (!response.ok) {
-                        console.warn(`Failed to load ${filename} from ${path} (${response.status}: ${response.statusText})`);
-                        return tryNextPath(pathIndex + 1);
-                    }
-                    console.log(`Successfully loaded ${filename} from ${path}`);
-                    return response.text();
-                })
-                .then(text => {
-                    if (!text) return; // Skip if previous step returned undefined (went to next path)
+        const entry = manifest.yearly.find(item => item.file === filename);
+        if (!entry) {
+            reject(new Error(`${filename} is not listed in ${MANIFEST_PATH}`));
+            return;
+        }
+
+        const path = manifestUrl(entry);
+        console.log(`Attempting to load ${filename} from ${path}`);
+
+        fetch(path)
+            .then(response => {
+                if (!response.ok) {
+                    throw new Error(`Failed to load ${filename} from ${path} (${response.status}: ${response.statusText})`);
+                }
+                console.log(`Successfully loaded ${filename} from ${path}`);
+                return response.text();
+            })
+            .then(text => {
+                console.log(`Parsing CSV data for ${filename} (first 100 chars):`, text.substring(0, 100));
+                
+                try {
+                    // Parse CSV data using Papa Parse
+                    const result = Papa.parse(text, { header: true, dynamicTyping: true });
                     
-                    console.log(`Parsing CSV data for ${filename} (first 100 chars):`, text.substring(0, 100));
+                    if (result.errors && result.errors.length > 0) {
+                        console.warn(`Warnings parsing ${filename}:`, result.errors);
+                    }
                     
-                    try {
-                        // Parse CSV data using Papa Parse
-                        const result = Papa.parse(text, { header: true, dynamicTyping: true });
-                        
-                        if (result.errors && result.errors.length > 0) {
-                            console.warn(`Warnings parsing ${filename}:`, result.errors);
-                        }
+                    const validRecords = result.data.filter(record => 
+                        record && Object.keys(record).length > 1)
+                        .map(record => ({...record, 'Source File': filename}));
                         
-                        const validRecords = result.data.filter(record => 
-                            record && Object.keys(record).length > 1)
-                            .map(record => ({...record, 'Source File': filename}));
-                            
-                        if (validRecords.length === 0) {
-                            console.error(`File ${filename} was loaded but contains no valid data records`);
-                            reject(new Error(`File ${filename} contains no valid data records`));
-                        } else {
-                            console.log(`Successfully parsed ${validRecords.length} records from ${filename}`);
-                            resolve(validRecords);
-                        }
-                    } catch (parseError) {
-                        console.error(`Error parsing CSV data for ${filename}:`, parseError);
-                        reject(new Error(`Error parsing CSV file: ${parseError.message}`));
+                    if (validRecords.length === 0) {
+                        console.error(`File ${filename} was loaded but contains no valid data records`);
+                        reject(new Error(`File ${filename} contains no valid data records`));
+                    } else {
+                        console.log(`Successfully parsed ${validRecords.length} records from ${filename}`);
+                        resolve(validRecords);
                     }
-                })
-                .catch(error => {
-                    console.error(`Network error loading ${filename} from ${path}:`, error);
-                    tryNextPath(pathIndex + 1);
-                });
-        }
-        
-        tryNextPath(0);
+                } catch (parseError) {
+                    console.error(`Error parsing CSV data for ${filename}:`, parseError);
+                    reject(new Error(`Error parsing CSV file: ${parseError.message}`));
+                }
+            })
+            .catch(error => {
+                console.error(`Error loading ${filename} from ${path}:`, error);
+                reject(error);
+            });
     });
 }
 
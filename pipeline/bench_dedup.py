@@ -0,0 +1,68 @@
+import sys
+import time
+import numpy as np
+import pandas as pd
+import daily_data
+import dedup
+
+'''
+Benchmark for dedup.py at scale: the real daily rows are copied under renamed universities
+until there are ROWS of them (1M by default), then a share of them get a near-duplicate
+injected (case number dropped, a location word removed, minutes shifted, or an exact copy).
+Reports time per stage and how many injected duplicates ended up in their original's cluster.
+
+Usage: python bench_dedup.py [rows] [duplicate share]
+'''
+
+
+def inject(df, share, rng):
+    """df plus near-duplicates of a random share of its rows; returns (frame, original of each copy)"""
+    originals = np.sort(rng.choice(len(df), int(len(df) * share), replace=False))
+    copies = df.iloc[originals].copy().reset_index(drop=True)
+    kind = rng.integers(0, 4, len(copies))
+
+    copies.loc[kind == 0, 'case_number'] = pd.NA
+    words = copies.loc[kind == 1, 'location'].astype(object).fillna('').str.split()
+    copies.loc[kind == 1, 'location'] = words.map(lambda parts: ' '.join(parts[:-1]) if len(parts) > 1 else ' '.join(parts))
+    shift = pd.to_timedelta(rng.integers(-20, 21, len(copies)), unit='m')
+    copies.loc[kind == 2, 'occurred'] = copies.loc[kind == 2, 'occurred'] + shift[kind == 2]
+    # kind 3 stays an exact copy
+
+    combined = pd.concat([df, copies], ignore_index=True)
+    for column in daily_data.CATEGORICAL_COLUMNS:
+        combined[column] = combined[column].astype('category')
+    return combined, originals
+
+
+def main():
+    rows = int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000
+    share = float(sys.argv[2]) if len(sys.argv) > 2 else 0.05
+    rng = np.random.default_rng(0)
+
+    base = daily_data.load_daily()
+    frames = []
+    for copy in range(-(-int(rows / (1 + share)) // len(base))):
+        frames.append(base.assign(university=base['university'].astype(str) + f"_{copy}"))
+    df = pd.concat(frames, ignore_index=True).iloc[:int(rows / (1 + share))]
+    df, originals = inject(df, share, rng)
+    print(f"{len(df)} rows, {len(originals)} injected near-duplicates")
+
+    start = time.perf_counter()
+    signature = dedup.signatures(df)
+    signature_time = time.perf_counter() - start
+    left, right = dedup.candidate_pairs(signature, blocks=dedup.blocks(df, dedup.RULES))
+    pairs_time = time.perf_counter() - start - signature_time
+    ok = dedup.accept(df, signature, left, right, dedup.RULES)
+    labels = dedup.clusters(len(df), left[ok], right[ok])
+    merged = dedup.merge(df, labels)
+    total = time.perf_counter() - start
+
+    copies = np.arange(len(df) - len(originals), len(df))
+    found = (labels[copies] == labels[originals]).mean()
+    print(f"signatures {signature_time:.1f}s, candidates {pairs_time:.1f}s ({len(left)} pairs, {int(ok.sum())} "
+          f"accepted), total {total:.1f}s: {len(df) / total:,.0f} rows/s")
+    print(f"{len(df)} -> {len(merged)} rows; {found:.1%} of injected duplicates merged with their original")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,93 @@
+import contextlib
+import io
+import json
+import os
+import sys
+import tempfile
+import time
+import pandas as pd
+import daily_data
+import runner
+
+'''
+Benchmark for frame stages in runner.py: the VirginiaTech and UniversityOfMinnesota
+pipelines run uncached as file stages (each cleaning script reads its input CSV and writes
+its output CSV), as frame stages handing DataFrames along in memory (their recipes), and as
+frame stages with a Feather cache boundary after the clean stage. The raw inputs are made
+from the daily files (VirginiaTech split back into its date and time columns), optionally
+repeated, in a temporary folder so nothing in data/ is touched.
+
+Usage: python bench_handoff.py [copies] [repeats]
+'''
+
+# The same pipelines, file stage by file stage
+FILE_FUNCTIONS = {
+    'virginiatech_clean.clean_dataframe': 'virginiatech_clean.clean_csv',
+    'reformatting_clean.process_crime_log': 'reformatting_clean.clean_crime_log',
+    'stages.normalize_frame': 'stages.normalize',
+}
+UNIVERSITIES = ['VirginiaTech', 'UniversityOfMinnesota']
+
+
+def raw_input(university, copies):
+    df = daily_data.read_raw(os.path.join(daily_data.DAILY_DIR, f"{university}.csv"))
+    if university == 'VirginiaTech':
+        occurred = df['Date/Time Occurred'].str.split(' ', n=1, expand=True)
+        df = pd.DataFrame({
+            'Case#': df['Case#'], 'Date Reported': df['Date/Time Reported'], 'Criminal Offense': df['Incident Type'],
+            'Location': df['Location'], 'Occurrence Date(s)': occurred[0],
+            'Time(s)': occurred[1].fillna('').str.replace(':', ''), 'Disposition': df['Disposition']})
+    return pd.concat([df] * copies, ignore_index=True)
+
+
+def variants(recipe):
+    as_files = {'stages': [{**stage, 'function': FILE_FUNCTIONS[stage['function']], 'frame': False}
+                           for stage in recipe['stages']]}
+    boundary = {'stages': [{**stage, 'cache': position == 0} for position, stage in enumerate(recipe['stages'])]}
+    return {'CSV between stages': as_files, 'in memory': recipe, 'Feather boundary': boundary}
+
+
+def time_recipe(folder, label, university, recipe, repeats):
+    """Best of repeats uncached runs: (seconds, {stage: seconds})"""
+    recipe_folder = os.path.join(folder, label)
+    os.makedirs(recipe_folder, exist_ok=True)
+    path = runner.recipe_path(university, recipe_folder)
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(recipe, f)
+    best = None
+    for repeat in range(repeats):
+        stage_dir = os.path.join(recipe_folder, f"stages{repeat}")
+        start = time.perf_counter()
+        # The cleaning scripts print their progress
+        with contextlib.redirect_stdout(io.StringIO()):
+            report = runner.run_recipe(path, stage_dir, recipe_folder)
+        elapsed = time.perf_counter() - start
+        if best is None or elapsed < best[0]:
+            best = (elapsed, {name: seconds for name, _, seconds in report['stages']})
+    return best
+
+
+def main():
+    copies = int(sys.argv[1]) if len(sys.argv) > 1 else 1
+    repeats = int(sys.argv[2]) if len(sys.argv) > 2 else 5
+    with tempfile.TemporaryDirectory() as folder:
+        for university in UNIVERSITIES:
+            raw_file = os.path.join(folder, f"{university}.csv")
+            raw = raw_input(university, copies)
+            raw.to_csv(raw_file, index=False)
+            recipe = runner.load_recipe(runner.recipe_path(university))
+            recipe['stages'][0]['inputs'] = [raw_file]
+            recipe = {'stages': [{key: stage[key] for key in ('name', 'function', 'frame', 'inputs', 'config')}
+                                 for stage in recipe['stages']]}
+
+            print(f"{university} ({len(raw)} rows)")
+            baseline = None
+            for label, variant in variants(recipe).items():
+                elapsed, stages = time_recipe(folder, f"{university}-{label}", university, variant, repeats)
+                baseline = baseline or elapsed
+                print(f"  {label:<20} {elapsed * 1000:8.0f} ms  saved {(baseline - elapsed) * 1000:6.0f} ms  ("
+                      + ', '.join(f"{name} {seconds * 1000:.0f}" for name, seconds in stages.items()) + ")")
+
+
+if __name__ == "__main__":
+    main()
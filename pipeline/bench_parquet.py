@@ -0,0 +1,88 @@
+import glob
+import os
+import sys
+import time
+import pandas as pd
+import build_parquet
+import daily_data
+
+'''
+Benchmark for build_parquet.py. Compares loading the daily data from the CSVs against the
+Parquet dataset for:
+- a full scan of every university
+- one university for one month (what a dashboard filter asks for)
+- a two-week window across all universities
+
+The CSV paths have to read and normalize every file before they can filter; the Parquet paths
+push the filter down to partitions and row-group statistics.
+
+Usage: python bench_parquet.py [parquet folder] [repeats]
+The dataset is built first if the folder doesn't exist yet.
+'''
+
+UNIVERSITY = "UCLA"
+MONTH_START, MONTH_END = "2025-03-01", "2025-04-01"
+WINDOW_START, WINDOW_END = "2025-03-01", "2025-03-15"
+
+
+def best_time(func, repeats):
+    best = float('inf')
+    for _ in range(repeats):
+        start = time.perf_counter()
+        result = func()
+        best = min(best, time.perf_counter() - start)
+    return best, len(result)
+
+
+def csv_raw():
+    """What the analyses do today: pandas over every CSV, no normalization"""
+    return pd.concat([daily_data.read_raw(path) for path in daily_data.daily_files()], ignore_index=True)
+
+
+def csv_filtered(universities, start, end):
+    df = daily_data.load_daily()
+    mask = (df['occurred'] >= pd.Timestamp(start)) & (df['occurred'] < pd.Timestamp(end))
+    if universities is not None:
+        mask &= df['university'].isin(universities)
+    return df[mask]
+
+
+def main():
+    output_dir = sys.argv[1] if len(sys.argv) > 1 else build_parquet.PARQUET_DIR
+    repeats = int(sys.argv[2]) if len(sys.argv) > 2 else 5
+
+    if not os.path.exists(output_dir):
+        print(f"Building {output_dir}")
+        build_parquet.build(output_dir)
+
+    csv_bytes = sum(os.path.getsize(path) for path in daily_data.daily_files())
+    parquet_bytes = sum(os.path.getsize(path)
+                        for path in glob.glob(os.path.join(output_dir, '**', '*.parquet'), recursive=True))
+    print(f"CSV: {csv_bytes / 1024:.0f} KB, Parquet: {parquet_bytes / 1024:.0f} KB")
+
+    cases = {
+        'full scan': (
+            ('csv raw', csv_raw),
+            ('csv normalized', daily_data.load_daily),
+            ('parquet', lambda: build_parquet.load(output_dir=output_dir)),
+        ),
+        f'{UNIVERSITY}, one month': (
+            ('csv normalized', lambda: csv_filtered([UNIVERSITY], MONTH_START, MONTH_END)),
+            ('parquet', lambda: build_parquet.load(UNIVERSITY, MONTH_START, MONTH_END, output_dir=output_dir)),
+        ),
+        'all universities, two weeks': (
+            ('csv normalized', lambda: csv_filtered(None, WINDOW_START, WINDOW_END)),
+            ('parquet', lambda: build_parquet.load(None, WINDOW_START, WINDOW_END, output_dir=output_dir)),
+        ),
+    }
+
+    for case, methods in cases.items():
+        print(f"\n{case}")
+        print(f"{'method':<20}{'best time (ms)':>16}{'rows':>10}")
+        for method, func in methods:
+            seconds, rows = best_time(func, repeats)
+            print(f"{method:<20}{seconds * 1000:>16.1f}{rows:>10}")
+
+
+if __name__ == "__main__":
+    main()
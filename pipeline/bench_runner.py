@@ -0,0 +1,75 @@
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+import daily_data
+import runner
+
+'''
+Benchmark for runner.py: the same recipes run as one interpreter per recipe (what chaining
+the scripts by hand amounts to), in this one warm process, in the process pool, and again
+with every stage cached. Each recipe is a two-stage chain over one of the daily CSVs (title
+casing its text columns, then normalizing it), written to a temporary folder so nothing in
+data/ is touched.
+
+Usage: python bench_runner.py [jobs]
+'''
+
+
+def write_recipes(folder):
+    paths = []
+    for path in daily_data.daily_files():
+        university = daily_data.university_name(path)
+        recipe = {'stages': [
+            {'name': 'capitalize', 'function': 'stages.map_values', 'inputs': [os.path.abspath(path)],
+             'config': {'function': 'capitalize.correct_capitalization'}},
+            # A few daily files have no case numbers
+            {'name': 'normalize', 'function': 'stages.normalize', 'config': {'allow_missing': ['case_number']}},
+        ]}
+        paths.append(runner.recipe_path(university, folder))
+        with open(paths[-1], 'w', encoding='utf-8') as f:
+            json.dump(recipe, f)
+    return paths
+
+
+def timed(label, count, func):
+    start = time.perf_counter()
+    reports, errors = func()
+    elapsed = time.perf_counter() - start
+    if errors:
+        raise SystemExit(f"{label}: {errors}")
+    print(f"{label:<28} {elapsed:6.2f}s  ({elapsed / count * 1000:.0f} ms per recipe)")
+    return reports
+
+
+def main():
+    jobs = int(sys.argv[1]) if len(sys.argv) > 1 else runner.JOBS
+    with tempfile.TemporaryDirectory() as folder:
+        paths = write_recipes(folder)
+        daily_dir = os.path.join(folder, "daily")
+        os.makedirs(daily_dir)
+        print(f"{len(paths)} recipes")
+
+        def cold():
+            stage_dir = os.path.join(folder, "cold")
+            for path in paths:
+                subprocess.run([sys.executable, "-c", "import sys, runner; "
+                                f"sys.exit(bool(runner.run([{path!r}], 1, {stage_dir!r}, {daily_dir!r})[1]))"],
+                               cwd=os.path.dirname(os.path.abspath(__file__)), check=True, capture_output=True)
+            return [], {}
+
+        timed("one interpreter per recipe", len(paths), cold)
+        timed("one warm process", len(paths),
+              lambda: runner.run(paths, 1, os.path.join(folder, "warm"), daily_dir))
+        timed(f"process pool ({jobs} jobs)", len(paths),
+              lambda: runner.run(paths, jobs, os.path.join(folder, "pool"), daily_dir))
+        reports = timed("all stages cached", len(paths),
+                        lambda: runner.run(paths, 1, os.path.join(folder, "warm"), daily_dir))
+        print(f"{sum(status == 'cached' for report in reports for _, status, _ in report['stages'])} "
+              f"of {sum(len(report['stages']) for report in reports)} stages cached on the rerun")
+
+
+if __name__ == "__main__":
+    main()
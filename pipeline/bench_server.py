@@ -0,0 +1,147 @@
+import asyncio
+import json
+import os
+import random
+import socket
+import subprocess
+import sys
+import time
+from urllib.parse import urlencode, urlsplit
+import numpy as np
+
+'''
+Load test for serve.py. Starts the server on a free port (or uses a running one), then keeps
+CONNECTIONS keep-alive connections busy with a random mix of /aggregate queries and reports
+throughput and p50/p99 latency, first with every query distinct (cache misses) and then
+drawing from a small set of repeated queries (mostly cache hits), like dashboard users
+flipping between the same filters.
+
+Usage: python bench_server.py [requests] [server url]
+'''
+
+CONNECTIONS = 16
+HOT_QUERIES = 50
+STARTUP_TIMEOUT = 120
+RECENT_DAYS = 730
+
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+async def request(reader, writer, host, path):
+    writer.write(f"GET {path} HTTP/1.1\r\nHost: {host}\r\n\r\n".encode('latin-1'))
+    await writer.drain()
+    head = await reader.readuntil(b'\r\n\r\n')
+    lines = head.decode('latin-1').split('\r\n')
+    status = int(lines[0].split(' ')[1])
+    length = next(int(line.split(':', 1)[1]) for line in lines if line.lower().startswith('content-length:'))
+    return status, await reader.readexactly(length)
+
+
+async def get(host, port, path):
+    reader, writer = await asyncio.open_connection(host, port)
+    try:
+        return await request(reader, writer, host, path)
+    finally:
+        writer.close()
+
+
+async def wait_for_server(host, port, process=None):
+    deadline = time.monotonic() + STARTUP_TIMEOUT
+    while time.monotonic() < deadline:
+        if process is not None and process.poll() is not None:
+            raise RuntimeError("serve.py exited during startup")
+        try:
+            status, body = await get(host, port, '/meta')
+            if status == 200:
+                return json.loads(body)
+        except OSError:
+            pass
+        await asyncio.sleep(0.25)
+    raise RuntimeError(f"No response from {host}:{port} after {STARTUP_TIMEOUT}s")
+
+
+def random_query(meta, days, rng):
+    """An /aggregate path with a random subset of the filters the dashboards use"""
+    params = []
+    if rng.random() < 0.8:
+        params.append(('university', rng.choice(meta['universities'])))
+    if rng.random() < 0.4:
+        params.append(('type', rng.choice(meta['types'])))
+    if rng.random() < 0.5:
+        start, end = sorted(rng.sample(days, 2))
+        params += [('start', start), ('end', end)]
+    params.append(('groupby', rng.choice(meta['groupby'])))
+    return '/aggregate?' + urlencode(params)
+
+
+async def run(host, port, paths):
+    """Send paths over CONNECTIONS connections; returns (latencies in seconds, wall time)"""
+    queue = asyncio.Queue()
+    for path in paths:
+        queue.put_nowait(path)
+    latencies = []
+
+    async def client():
+        reader, writer = await asyncio.open_connection(host, port)
+        try:
+            while not queue.empty():
+                path = queue.get_nowait()
+                start = time.perf_counter()
+                status, _ = await request(reader, writer, host, path)
+                latencies.append(time.perf_counter() - start)
+                if status != 200:
+                    raise RuntimeError(f"{path}: HTTP {status}")
+        finally:
+            writer.close()
+
+    start = time.perf_counter()
+    await asyncio.gather(*(client() for _ in range(CONNECTIONS)))
+    return np.array(latencies), time.perf_counter() - start
+
+
+def report(name, latencies, elapsed):
+    p50, p99 = np.percentile(latencies, [50, 99]) * 1000
+    print(f"{name:<16}{len(latencies):>10}{len(latencies) / elapsed:>12.0f}{p50:>10.2f}{p99:>10.2f}"
+          f"{latencies.max() * 1000:>10.2f}")
+
+
+async def bench(host, port, requests, process=None):
+    meta = await wait_for_server(host, port, process)
+    rng = random.Random(0)
+    # Recent dates; a few records have typo'd years far in the future
+    last = min(np.datetime64(meta['last_day']), np.datetime64('today'))
+    days = [str(day) for day in np.arange(last - RECENT_DAYS, last + 1)]
+    # Random filters rarely repeat, so almost every request is computed
+    cold = [random_query(meta, days, rng) for _ in range(requests)]
+    hot_set = [random_query(meta, days, rng) for _ in range(HOT_QUERIES)]
+    hot = [rng.choice(hot_set) for _ in range(requests)]
+
+    print(f"{meta['records']} records, {CONNECTIONS} connections")
+    print(f"{'queries':<16}{'requests':>10}{'req/s':>12}{'p50 ms':>10}{'p99 ms':>10}{'max ms':>10}")
+    report('distinct', *await run(host, port, cold))
+    report(f'{HOT_QUERIES} repeated', *await run(host, port, hot))
+
+
+def main():
+    requests = int(sys.argv[1]) if len(sys.argv) > 1 else 5000
+    if len(sys.argv) > 2:
+        url = urlsplit(sys.argv[2])
+        asyncio.run(bench(url.hostname, url.port or 80, requests))
+        return
+
+    port = free_port()
+    serve = os.path.join(os.path.dirname(os.path.abspath(__file__)), "serve.py")
+    process = subprocess.Popen([sys.executable, serve, str(port)], stdout=subprocess.DEVNULL)
+    try:
+        asyncio.run(bench('127.0.0.1', port, requests, process))
+    finally:
+        process.terminate()
+        process.wait()
+
+
+if __name__ == "__main__":
+    main()
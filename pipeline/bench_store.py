@@ -0,0 +1,81 @@
+import os
+import sys
+import tempfile
+import time
+import numpy as np
+import pandas as pd
+import daily_data
+import store
+
+'''
+Benchmark for store.py: bulk import throughput (store.replace_university: executemany,
+one transaction per university, FTS5 entries added in bulk) and query latency for the store's typical
+queries. The real daily rows are copied COPIES times under renamed universities to get a
+larger table; parsing the CSVs isn't timed.
+
+Usage: python bench_store.py [copies] [queries]
+'''
+
+SEARCH_TERMS = ['bicycle', 'stolen', 'alcohol', 'parking', 'hall', 'library', 'vehicle', 'medical']
+
+
+def percentiles(latencies):
+    p50, p99 = np.percentile(latencies, [50, 99]) * 1000
+    return f"{p50:>10.3f}{p99:>10.3f}"
+
+
+def main():
+    copies = int(sys.argv[1]) if len(sys.argv) > 1 else 40
+    queries = int(sys.argv[2]) if len(sys.argv) > 2 else 500
+
+    frames = [daily_data.load_file(path) for path in daily_data.daily_files()]
+    rng = np.random.default_rng(0)
+
+    with tempfile.TemporaryDirectory() as folder:
+        connection = store.connect(os.path.join(folder, "bench.sqlite"))
+        rows = 0
+        start = time.perf_counter()
+        for copy in range(copies):
+            for frame in frames:
+                frame = frame.assign(university=f"{frame['university'].iloc[0]}_{copy}")
+                rows += store.replace_university(connection, frame)
+        elapsed = time.perf_counter() - start
+        size = os.path.getsize(os.path.join(folder, "bench.sqlite")) / 2**20
+        print(f"Imported {rows} rows in {elapsed:.2f}s: {rows / elapsed:,.0f} rows/s, {size:.0f} MB")
+
+        universities = [u for (u,) in connection.execute("SELECT DISTINCT university FROM incidents")]
+        types = [t for (t,) in connection.execute(
+            "SELECT incident_type FROM incidents GROUP BY incident_type ORDER BY count(*) DESC LIMIT 200")]
+        cases = connection.execute(
+            "SELECT university, case_number FROM incidents WHERE case_number IS NOT NULL ORDER BY random() LIMIT ?",
+            (queries,)).fetchall()
+        months = pd.date_range('2023-01-01', '2025-04-01', freq='MS')
+
+        def month_range():
+            first = months[rng.integers(0, len(months) - 3)]
+            return first, first + pd.DateOffset(months=int(rng.integers(1, 4)))
+
+        workloads = {
+            'types by university': lambda: store.counts_by_type(connection, rng.choice(universities), *month_range()),
+            'universities by type': lambda: connection.execute(
+                "SELECT university, count(*) FROM incidents WHERE incident_type = ? AND occurred_ts >= ? "
+                "AND occurred_ts < ? GROUP BY university",
+                (str(rng.choice(types)), *(int(day.timestamp()) for day in month_range()))).fetchall(),
+            'case lookup': lambda: connection.execute(
+                "SELECT * FROM incidents WHERE university = ? AND case_number = ?",
+                cases[int(rng.integers(0, len(cases)))]).fetchall(),
+            'full-text search': lambda: store.search(connection, str(rng.choice(SEARCH_TERMS)), limit=50),
+        }
+        print(f"{'query':<24}{'p50 ms':>10}{'p99 ms':>10}")
+        for name, query in workloads.items():
+            latencies = []
+            for _ in range(queries):
+                start = time.perf_counter()
+                query()
+                latencies.append(time.perf_counter() - start)
+            print(f"{name:<24}{percentiles(latencies)}")
+        connection.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,84 @@
+import os
+import sys
+import tempfile
+import time
+import numpy as np
+from time_index import TimeIndex
+
+'''
+Benchmark for time_index.py on synthetic rows (10M by default): build, save and load times,
+then random date-range queries answered by a full NumPy mask scan and by the index, for one
+university and for all of them. Both must return the same rows.
+
+Usage: python bench_time_index.py [rows] [queries]
+'''
+
+UNIVERSITIES = 50
+YEARS = 10
+DAY_NS = 86_400 * 10**9
+
+
+def synthetic(rows, seed=0):
+    rng = np.random.default_rng(seed)
+    universities = np.array([f"University{i:02d}" for i in range(UNIVERSITIES)])[rng.integers(0, UNIVERSITIES, rows)]
+    start = np.datetime64('2016-01-01', 'ns').view('int64')
+    occurred = (start + rng.integers(0, YEARS * 365 * DAY_NS, rows)).view('datetime64[ns]')
+    return universities, occurred
+
+
+def timed(function, repeats):
+    start = time.perf_counter()
+    for _ in range(repeats):
+        result = function()
+    return result, (time.perf_counter() - start) / repeats
+
+
+def main():
+    rows = int(sys.argv[1]) if len(sys.argv) > 1 else 10_000_000
+    queries = int(sys.argv[2]) if len(sys.argv) > 2 else 20
+
+    universities, occurred = synthetic(rows)
+    start = time.perf_counter()
+    index = TimeIndex.build(universities, occurred)
+    build_time = time.perf_counter() - start
+
+    with tempfile.TemporaryDirectory() as folder:
+        path = os.path.join(folder, "time_index.npz")
+        _, save_time = timed(lambda: index.save(path), 1)
+        _, load_time = timed(lambda: TimeIndex.load(path), 1)
+        size = os.path.getsize(path) / 2**20
+    print(f"{rows} rows: build {build_time:.2f}s, save {save_time:.2f}s, load {load_time:.2f}s, {size:.0f} MB")
+
+    # What a mask scan needs, prepared once so only the comparisons are timed
+    codes = np.searchsorted(index.universities, universities)
+    times = occurred.view('int64')
+
+    rng = np.random.default_rng(1)
+    print(f"{'query':<20}{'rows':>12}{'scan ms':>12}{'index ms':>12}{'speedup':>10}")
+    for name, one_university in (('one university', True), ('all universities', False)):
+        found = scan_total = index_total = 0
+        for _ in range(queries):
+            first = np.datetime64('2016-01-01') + int(rng.integers(0, YEARS * 365))
+            last = first + int(rng.integers(7, 365))
+            university = index.universities[int(rng.integers(0, UNIVERSITIES))] if one_university else None
+            lo, hi = np.datetime64(first, 'ns').view('int64'), np.datetime64(last, 'ns').view('int64')
+
+            def scan():
+                mask = (times >= lo) & (times < hi)
+                if one_university:
+                    mask &= codes == index.position[university]
+                return np.flatnonzero(mask)
+
+            expected, scan_time = timed(scan, 1)
+            selected, index_time = timed(lambda: index.select(str(first), str(last),
+                                                              [university] if one_university else None), 1)
+            assert np.array_equal(np.sort(selected), expected)
+            found += len(selected)
+            scan_total += scan_time
+            index_total += index_time
+        print(f"{name:<20}{found // queries:>12}{scan_total / queries * 1000:>12.2f}"
+              f"{index_total / queries * 1000:>12.3f}{scan_total / index_total:>10.0f}x")
+
+
+if __name__ == "__main__":
+    main()
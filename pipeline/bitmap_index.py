@@ -0,0 +1,198 @@
+import sys
+import time
+import numpy as np
+import pandas as pd
+import daily_data
+
+'''
+Bitmap indexes over the combined daily records. For every distinct value of each facet
+(incident type, university, disposition, campus) there is one packed bitset of uint64 words,
+bit i set when row i has that value. Multi-facet filters are then an OR within each facet
+and an AND across facets over a few hundred words, followed by a popcount, instead of a
+scan over every record:
+
+    index = BitmapIndex.from_frame(daily_data.load_daily())
+    bits = index.select(university=['UCLA', 'UCSD'], incident_type='Burglary')
+    index.count(bits), index.rows(bits), index.counts('disposition', bits)
+
+Value dictionaries are built when the index is created and extended in append(), which only
+sets bits for the new rows.
+
+Usage: python bitmap_index.py [repeats]
+'''
+
+FACETS = ['incident_type', 'university', 'disposition', 'campus']
+WORD_BITS = 64
+
+if hasattr(np, 'bitwise_count'):
+    def popcount(words):
+        return np.bitwise_count(words)
+else:
+    _BYTE_COUNTS = np.unpackbits(np.arange(256, dtype=np.uint8)[:, None], axis=1).sum(axis=1)
+
+    def popcount(words):
+        """Set bits per uint64 word (NumPy < 2.0 has no bitwise_count)"""
+        counts = _BYTE_COUNTS[np.ascontiguousarray(words).view(np.uint8)]
+        return counts.reshape(*words.shape, 8).sum(axis=-1)
+
+
+class FacetIndex:
+    """Value dictionary and one bitset per value for a single column"""
+
+    def __init__(self):
+        self.labels = []        # code -> value
+        self.codes = {}         # value -> code
+        self.bits = np.zeros((0, 0), dtype=np.uint64)
+
+    def encode(self, values):
+        """Dictionary codes for values, adding codes for values not seen before; -1 for missing"""
+        values = pd.Series(values, dtype=object)
+        missing = values.isna()
+        for value in pd.unique(values[~missing]):
+            if value not in self.codes:
+                self.codes[value] = len(self.labels)
+                self.labels.append(value)
+        return values.map(self.codes).fillna(-1).to_numpy(dtype=np.int64)
+
+    def add(self, values, first_row, words):
+        """Set the bits of rows first_row.. for values, growing the bitsets to words words"""
+        codes = self.encode(values)
+        if self.bits.shape != (len(self.labels), words):
+            grown = np.zeros((len(self.labels), words), dtype=np.uint64)
+            grown[:self.bits.shape[0], :self.bits.shape[1]] = self.bits
+            self.bits = grown
+
+        rows = np.arange(first_row, first_row + len(codes))[codes >= 0]
+        codes = codes[codes >= 0]
+        if not len(codes):
+            return
+        # OR each row's bit into its (code, word) cell, one reduction per distinct cell
+        cells = codes * words + rows // WORD_BITS
+        order = np.argsort(cells, kind='stable')
+        cells = cells[order]
+        masks = np.left_shift(np.uint64(1), (rows[order] % WORD_BITS).astype(np.uint64))
+        starts = np.flatnonzero(np.r_[True, cells[1:] != cells[:-1]])
+        self.bits.reshape(-1)[cells[starts]] |= np.bitwise_or.reduceat(masks, starts)
+
+    def bitset(self, values, words):
+        """OR of the bitsets of values (a value or a list of values); unknown values match nothing"""
+        if isinstance(values, str) or not hasattr(values, '__iter__'):
+            values = [values]
+        codes = [self.codes[value] for value in values if value in self.codes]
+        if not codes:
+            return np.zeros(words, dtype=np.uint64)
+        return np.bitwise_or.reduce(self.bits[codes], axis=0)
+
+
+class BitmapIndex:
+    def __init__(self, facets=FACETS):
+        self.size = 0
+        self.words = 0
+        self.facets = {facet: FacetIndex() for facet in facets}
+
+    @classmethod
+    def from_frame(cls, df, facets=FACETS):
+        index = cls(facets)
+        index.append(df)
+        return index
+
+    def append(self, df):
+        """
+        Index rows appended after the ones already indexed (row ids continue from self.size).
+
+        Args:
+            df: canonical rows, as from daily_data.load_file
+        """
+        first_row = self.size
+        self.size += len(df)
+        # Grow by at least a quarter, so appending a few rows at a time doesn't copy every bitset
+        # on each append; more would waste memory on the thousands of incident types
+        needed = -(-self.size // WORD_BITS)
+        if needed > self.words:
+            self.words = max(needed, self.words + self.words // 4)
+        for facet, index in self.facets.items():
+            index.add(df[facet], first_row, self.words)
+
+    def all(self):
+        """Bitset with every indexed row set"""
+        bits = np.zeros(self.words, dtype=np.uint64)
+        full, rest = divmod(self.size, WORD_BITS)
+        bits[:full] = np.iinfo(np.uint64).max
+        if rest:
+            bits[full] = np.uint64((1 << rest) - 1)
+        return bits
+
+    def select(self, **filters):
+        """
+        Rows matching every filter, as a bitset.
+
+        Args:
+            filters: facet=value or facet=[values]; a facet matches any of its values
+
+        Returns:
+            uint64 array of self.words words
+        """
+        bits = self.all()
+        for facet, values in filters.items():
+            if facet not in self.facets:
+                raise KeyError(f"No bitmap index for {facet!r} (indexed: {', '.join(self.facets)})")
+            bits &= self.facets[facet].bitset(values, self.words)
+        return bits
+
+    def count(self, bits):
+        return int(popcount(bits).sum())
+
+    def rows(self, bits):
+        """Row ids set in bits, ascending"""
+        flags = np.unpackbits(bits.view(np.uint8), bitorder='little')
+        return np.flatnonzero(flags[:self.size])
+
+    def mask(self, bits):
+        """bits as a boolean mask over the rows, for indexing a DataFrame"""
+        return np.unpackbits(bits.view(np.uint8), bitorder='little')[:self.size].astype(bool)
+
+    def counts(self, facet, bits=None):
+        """{value: rows within bits} for every value of facet, largest first"""
+        index = self.facets[facet]
+        selected = index.bits if bits is None else index.bits & bits
+        counts = popcount(selected).sum(axis=1)
+        return {index.labels[i]: int(counts[i]) for i in np.argsort(-counts, kind='stable') if counts[i]}
+
+
+def main():
+    paths = daily_data.daily_files()
+    start = time.perf_counter()
+    frames = [daily_data.load_file(path) for path in paths]
+    df = pd.concat(frames, ignore_index=True)
+    load_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    index = BitmapIndex()
+    for frame in frames:
+        index.append(frame)
+    build_time = time.perf_counter() - start
+    print(f"Loaded {len(df)} rows in {load_time:.2f}s, indexed one file at a time in {build_time * 1000:.1f}ms")
+    for facet, facet_index in index.facets.items():
+        print(f"  {facet}: {len(facet_index.labels)} values, {facet_index.bits.nbytes / 1024:.0f} KB")
+
+    university = df['university'].value_counts().index[0]
+    incident_type = df.loc[df['university'] == university, 'incident_type'].value_counts().index[0]
+    filters = {'university': university, 'incident_type': incident_type}
+    repeats = int(sys.argv[1]) if len(sys.argv) > 1 else 200
+
+    start = time.perf_counter()
+    for _ in range(repeats):
+        expected = int(((df['university'] == university) & (df['incident_type'] == incident_type)).sum())
+    scan_time = (time.perf_counter() - start) / repeats
+    start = time.perf_counter()
+    for _ in range(repeats):
+        found = index.count(index.select(**filters))
+    index_time = (time.perf_counter() - start) / repeats
+
+    assert found == expected
+    print(f"{university} / {incident_type}: {found} rows; column scan {scan_time * 1e6:.0f}us, "
+          f"bitmap {index_time * 1e6:.0f}us")
+
+
+if __name__ == "__main__":
+    main()
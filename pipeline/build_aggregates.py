@@ -0,0 +1,155 @@
+import json
+import os
+import re
+import sys
+import time
+import daily_data
+import dedup
+
+'''
+Precomputed aggregate bundles for the daily dashboard. Instead of the browser downloading and
+Papa-parsing every raw row, then recounting everything on each filter change, this writes one
+small JSON file per university plus all.json for "Combine All Files":
+
+    data/aggregates/daily/UCLA.json
+
+Each bundle has exactly what the charts plot (incident type counts, reports per month, top
+locations, day of week, incidents per hour, dispositions, dollar amounts). Month and hour
+counts are also bucketed per incident type, so the crime type filters are lookups. Near-duplicate
+rows (dedup.py) are merged first, so the same incident isn't counted twice.
+
+Usage: python build_aggregates.py [output folder]
+'''
+
+AGGREGATES_DIR = os.path.join(daily_data.ROOT, "data", "aggregates", "daily")
+COMBINED = "all"
+TOP_LOCATIONS = 15
+UNKNOWN = "Unknown"
+WEEKDAYS = ['Monday', 'Tuesday', 'Wednesday', 'Thursday', 'Friday', 'Saturday', 'Sunday']
+DOLLAR_RE = re.compile(r'\$(\d+(?:,\d+)*(?:\.\d+)?)')
+
+
+def _counts(series):
+    """{value: count} with plain Python types, largest first"""
+    return {str(key): int(count) for key, count in series.value_counts().items()}
+
+
+def _hour_counts(hours):
+    """Sparse {hour: count}; most crime types only ever occur at a few hours"""
+    return {str(int(hour)): int(count) for hour, count in hours.value_counts().sort_index().items()}
+
+
+def _nested(counts):
+    """Series indexed by (incident type, bucket) to {incident type: {bucket: count}}"""
+    nested = {}
+    for (incident_type, bucket), count in counts.items():
+        key = str(int(bucket)) if isinstance(bucket, (int, float)) else str(bucket)
+        nested.setdefault(incident_type, {})[key] = int(count)
+    return nested
+
+
+def dollar_amount(incident_type):
+    match = DOLLAR_RE.search(incident_type)
+    return float(match.group(1).replace(',', '')) if match else None
+
+
+def make_bundle(df, name):
+    """
+    Aggregate canonical rows (from daily_data) into the bundle the dashboard plots.
+
+    Args:
+        df: canonical DataFrame, one or more universities
+        name: university name, or COMBINED
+
+    Returns:
+        dict ready for json.dump
+    """
+    types = df['incident_type'].astype(object).fillna(UNKNOWN)
+    occurred = df['occurred']
+    dated = occurred.notna()
+    timed = dated & df['occurred_has_time']
+    month = occurred.dt.strftime('%Y-%m')
+    day = occurred.dt.normalize()
+
+    months_by_type = _nested(month[dated].groupby(types[dated]).value_counts().sort_index())
+    hours_by_type = _nested(occurred.dt.hour[timed].groupby(types[timed]).value_counts().sort_index())
+    days_by_type = day[dated].groupby(types[dated]).nunique().to_dict()
+
+    by_type = {}
+    for incident_type, count in types.value_counts().items():
+        entry = {'count': int(count)}
+        if incident_type in months_by_type:
+            entry['months'] = months_by_type[incident_type]
+            entry['days'] = int(days_by_type[incident_type])
+        if incident_type in hours_by_type:
+            entry['hours'] = hours_by_type[incident_type]
+        by_type[str(incident_type)] = entry
+
+    locations = df['location'].astype(object).fillna(UNKNOWN).value_counts().head(TOP_LOCATIONS)
+    weekday = occurred[dated].dt.dayofweek.map(dict(enumerate(WEEKDAYS)))
+
+    dollars = {}
+    for incident_type, count in types.value_counts().items():
+        amount = dollar_amount(incident_type) if '$' in incident_type else None
+        if amount is not None:
+            dollars[incident_type] = round(amount * int(count), 2)
+
+    months = month[dated]
+    return {
+        'university': name,
+        'records': int(len(df)),
+        'first_month': months.min() if len(months) else None,
+        'last_month': months.max() if len(months) else None,
+        'months': {str(m): int(c) for m, c in months.value_counts().sort_index().items()},
+        'hours': _hour_counts(occurred.dt.hour[timed]),
+        'days': int(day[dated].nunique()),
+        'weekdays': {name: int((weekday == name).sum()) for name in WEEKDAYS},
+        'locations': [[str(location), int(count)] for location, count in locations.items()],
+        'dispositions': _counts(df['disposition'].astype(object).fillna(UNKNOWN)),
+        'dollars': dollars,
+        'types': by_type,
+    }
+
+
+def write_bundle(bundle, output_dir):
+    path = os.path.join(output_dir, f"{bundle['university']}.json")
+    temp_file = path + ".tmp"
+    with open(temp_file, 'w', encoding='utf-8') as f:
+        json.dump(bundle, f, separators=(',', ':'), ensure_ascii=False)
+    os.replace(temp_file, path)
+    return path
+
+
+def build(output_dir=AGGREGATES_DIR, paths=None):
+    """
+    Write a bundle per university and the combined bundle.
+
+    Returns:
+        {bundle name: bytes written}
+    """
+    os.makedirs(output_dir, exist_ok=True)
+    df = dedup.dedup_frame(daily_data.load_daily(paths))
+
+    sizes = {}
+    for university, rows in df.groupby('university', observed=True):
+        path = write_bundle(make_bundle(rows, university), output_dir)
+        sizes[university] = os.path.getsize(path)
+    path = write_bundle(make_bundle(df, COMBINED), output_dir)
+    sizes[COMBINED] = os.path.getsize(path)
+    return sizes
+
+
+def main():
+    output_dir = sys.argv[1] if len(sys.argv) > 1 else AGGREGATES_DIR
+    start = time.perf_counter()
+    sizes = build(output_dir)
+    elapsed = time.perf_counter() - start
+
+    csv_bytes = sum(os.path.getsize(path) for path in daily_data.daily_files())
+    print(f"Wrote {len(sizes)} bundles to {output_dir} in {elapsed:.2f}s")
+    print(f"Combined bundle: {sizes[COMBINED] / 1024:.0f} KB (all CSVs: {csv_bytes / 1024:.0f} KB)")
+    print(f"Largest university bundle: {max(size for name, size in sizes.items() if name != COMBINED) / 1024:.0f} KB")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,278 @@
+import io
+import json
+import os
+import shutil
+import sys
+import time
+import numpy as np
+import pandas as pd
+import daily_data
+
+'''
+Incident count cube: how many incidents each university recorded of each type, on each day,
+in each hour. Every daily dashboard chart is a marginal of it (types, per month, day of
+week, time of day, per university), so any chart for any filter is a slice and a sum over a
+memory-mapped array, without reading row data:
+
+    cube = Cube()
+    cube.marginal('hour', universities=['UCLA'], types=['Burglary'], start='2025-01-01')
+
+Incident types are nearly all specific to one university (4400 university/type pairs, 3900
+distinct types), so one dense university x type x day x hour array would be almost all
+zeros. The university axis is split instead: data/cube/daily/<university>.npy is a
+day x type x hour uint8 array (widened if a count ever overflows) with that university's
+own dictionary-encoded day and type axes, listed in axes.json. Rows without an occurred
+date aren't counted; HOURS has a last bucket (NO_TIME) for rows with a date but no time.
+
+Days are the outer axis so update() can add a day's new rows by appending a block to the
+file instead of rewriting it.
+
+Usage: python build_cube.py [output folder]
+'''
+
+CUBE_DIR = os.path.join(daily_data.ROOT, "data", "cube", "daily")
+AXES_FILE = "axes.json"
+NO_TIME = 24
+HOURS = NO_TIME + 1
+UNKNOWN = "Unknown"
+DTYPES = [np.uint8, np.uint16, np.uint32, np.uint64]
+MARGINALS = ['university', 'type', 'day', 'month', 'weekday', 'hour']
+WEEKDAYS = ['Monday', 'Tuesday', 'Wednesday', 'Thursday', 'Friday', 'Saturday', 'Sunday']
+
+
+def cells(df):
+    """Incident counts per (university, day, type, hour) for canonical rows"""
+    dated = df[df['occurred'].notna()]
+    hour = dated['occurred'].dt.hour.where(dated['occurred_has_time'].astype(bool), NO_TIME)
+    keys = pd.DataFrame({
+        'university': dated['university'].astype(str),
+        'day': dated['occurred'].dt.strftime('%Y-%m-%d'),
+        'type': dated['incident_type'].astype(object).fillna(UNKNOWN),
+        'hour': hour.astype(int),
+    })
+    return keys.groupby(['university', 'day', 'type', 'hour']).size().rename('count').reset_index()
+
+
+def fitting_dtype(largest):
+    return next(dtype for dtype in DTYPES if largest <= np.iinfo(dtype).max)
+
+
+def cube_path(output_dir, university):
+    return os.path.join(output_dir, f"{university}.npy")
+
+
+def load_axes(output_dir=CUBE_DIR):
+    with open(os.path.join(output_dir, AXES_FILE), encoding='utf-8') as f:
+        return json.load(f)
+
+
+def save_axes(axes, output_dir=CUBE_DIR):
+    path = os.path.join(output_dir, AXES_FILE)
+    with open(path + ".tmp", 'w', encoding='utf-8') as f:
+        json.dump(axes, f, ensure_ascii=False)
+    os.replace(path + ".tmp", path)
+
+
+def _header(shape, dtype):
+    buffer = io.BytesIO()
+    np.lib.format.write_array_header_1_0(buffer, {
+        'descr': np.lib.format.dtype_to_descr(np.dtype(dtype)), 'fortran_order': False, 'shape': shape})
+    return buffer.getvalue()
+
+
+def resize(path, shape, dtype):
+    """
+    Grow the array at path to shape (no axis shrinks) and at least dtype, keeping its counts.
+    When only the day axis grows, zeroed day blocks are appended and the header rewritten in
+    place; otherwise the file is rewritten.
+    """
+    old = np.load(path, mmap_mode='r')
+    dtype = np.promote_types(old.dtype, dtype)
+    if old.shape == tuple(shape) and old.dtype == dtype:
+        return
+    header = _header(tuple(shape), dtype)
+    if old.shape[1:] == tuple(shape[1:]) and old.dtype == dtype and len(header) == old.offset:
+        extra = (shape[0] - old.shape[0]) * old[0].nbytes
+        del old
+        with open(path, 'r+b') as f:
+            f.write(header)
+            f.seek(0, os.SEEK_END)
+            f.truncate(f.tell() + extra)
+        return
+
+    temp_file = path + ".tmp.npy"
+    new = np.lib.format.open_memmap(temp_file, mode='w+', dtype=dtype, shape=tuple(shape))
+    new[:old.shape[0], :old.shape[1]] = old
+    new.flush()
+    del new, old
+    os.replace(temp_file, path)
+
+
+def write_university(counts, output_dir):
+    """Write one university's cube from its cells(); returns its axes"""
+    days = sorted(counts['day'].unique())
+    types = sorted(counts['type'].unique())
+    day_codes = pd.Index(days).get_indexer(counts['day'])
+    type_codes = pd.Index(types).get_indexer(counts['type'])
+
+    cube = np.lib.format.open_memmap(cube_path(output_dir, counts['university'].iloc[0]), mode='w+',
+                                     dtype=fitting_dtype(counts['count'].max()), shape=(len(days), len(types), HOURS))
+    cube[day_codes, type_codes, counts['hour'].to_numpy()] = counts['count'].to_numpy()
+    cube.flush()
+    return {'days': days, 'types': types}
+
+
+def build(output_dir=CUBE_DIR, paths=None):
+    """Build the cube from every daily CSV, replacing any previous one. Returns axes"""
+    if os.path.exists(output_dir):
+        shutil.rmtree(output_dir)
+    os.makedirs(output_dir)
+
+    axes = {}
+    for university, counts in cells(daily_data.load_daily(paths)).groupby('university'):
+        axes[university] = write_university(counts, output_dir)
+    save_axes(axes, output_dir)
+    return axes
+
+
+def update(df, output_dir=CUBE_DIR):
+    """
+    Add newly arrived canonical rows to the cube. The rows must not have been counted
+    already (e.g. the rows a scraper just appended), since counts are added, not replaced.
+    New days are appended to a university's day axis and new types to its type axis.
+    """
+    axes = load_axes(output_dir)
+    for university, counts in cells(df).groupby('university'):
+        if university not in axes:
+            axes[university] = write_university(counts, output_dir)
+            continue
+
+        axis = axes[university]
+        path = cube_path(output_dir, university)
+        for name, column in (('days', 'day'), ('types', 'type')):
+            known = set(axis[name])
+            axis[name] += sorted(value for value in counts[column].unique() if value not in known)
+        day_codes = pd.Index(axis['days']).get_indexer(counts['day'])
+        type_codes = pd.Index(axis['types']).get_indexer(counts['type'])
+
+        # Widen the dtype first if the new counts could overflow it
+        current = np.load(path, mmap_mode='r')
+        existing = np.zeros(len(counts), dtype=np.int64)
+        inside = (day_codes < current.shape[0]) & (type_codes < current.shape[1])
+        existing[inside] = current[day_codes[inside], type_codes[inside], counts['hour'].to_numpy()[inside]]
+        largest = int((existing + counts['count'].to_numpy()).max())
+        del current
+
+        resize(path, (len(axis['days']), len(axis['types']), HOURS), fitting_dtype(largest))
+        cube = np.load(path, mmap_mode='r+')
+        np.add.at(cube, (day_codes, type_codes, counts['hour'].to_numpy()), counts['count'].to_numpy().astype(cube.dtype))
+        cube.flush()
+        del cube
+    save_axes(axes, output_dir)
+    return axes
+
+
+class Cube:
+    """Read-only view of a built cube; arrays are memory-mapped on first use"""
+
+    def __init__(self, output_dir=CUBE_DIR):
+        self.output_dir = output_dir
+        self.axes = load_axes(output_dir)
+        self._arrays = {}
+        self._days = {}
+        self._types = {}
+
+    @property
+    def universities(self):
+        return sorted(self.axes)
+
+    def array(self, university):
+        if university not in self._arrays:
+            self._arrays[university] = np.load(cube_path(self.output_dir, university), mmap_mode='r')
+            self._days[university] = np.array(self.axes[university]['days'], dtype='datetime64[D]')
+            self._types[university] = {t: i for i, t in enumerate(self.axes[university]['types'])}
+        return self._arrays[university]
+
+    def marginal(self, by, universities=None, types=None, start=None, end=None):
+        """
+        Incident counts for one chart.
+
+        Args:
+            by: one of MARGINALS
+            universities, types: lists to include, default all
+            start, end: inclusive dates, default open
+
+        Returns:
+            {label: count}, in axis order (days and months ascending, weekdays from Monday,
+            hours 0-23, dates without a time left out)
+        """
+        if by not in MARGINALS:
+            raise ValueError(f"by must be one of {', '.join(MARGINALS)}")
+        start = None if start is None else np.datetime64(pd.Timestamp(start).date(), 'D')
+        end = None if end is None else np.datetime64(pd.Timestamp(end).date(), 'D')
+
+        totals = {}
+        for university in self.universities if universities is None else universities:
+            if university not in self.axes:
+                continue
+            cube = self.array(university)
+            days = self._days[university]
+            day_index = np.ones(len(days), dtype=bool)
+            if start is not None:
+                day_index &= days >= start
+            if end is not None:
+                day_index &= days <= end
+            day_index = np.flatnonzero(day_index)
+            # A slice is a view of the mapped file; an index array would copy the selected days
+            if len(day_index) and day_index[-1] - day_index[0] == len(day_index) - 1:
+                day_index = slice(day_index[0], day_index[-1] + 1)
+            type_index = slice(None) if types is None else \
+                [self._types[university][t] for t in types if t in self._types[university]]
+
+            block = cube[day_index][:, type_index]
+            if by == 'university':
+                totals[university] = int(block.sum(dtype=np.int64))
+            elif by == 'type':
+                labels = self.axes[university]['types'] if types is None else \
+                    [t for t in types if t in self._types[university]]
+                for label, count in zip(labels, block.sum(axis=(0, 2), dtype=np.int64)):
+                    totals[label] = totals.get(label, 0) + int(count)
+            elif by == 'hour':
+                for hour, count in enumerate(block.sum(axis=(0, 1), dtype=np.int64)[:NO_TIME]):
+                    totals[hour] = totals.get(hour, 0) + int(count)
+            else:
+                per_day = block.sum(axis=(1, 2), dtype=np.int64)
+                selected = days[day_index]
+                if by == 'day':
+                    keys = selected.astype(str)
+                elif by == 'month':
+                    keys = selected.astype('datetime64[M]').astype(str)
+                else:
+                    keys = np.array(WEEKDAYS)[(selected.view('int64') + 3) % 7]
+                for key, count in zip(keys, per_day):
+                    if count:
+                        totals[key] = totals.get(key, 0) + int(count)
+
+        if by == 'hour':
+            return {hour: totals.get(hour, 0) for hour in range(NO_TIME)}
+        if by == 'weekday':
+            return {day: totals.get(day, 0) for day in WEEKDAYS}
+        if by in ('day', 'month'):
+            return dict(sorted(totals.items()))
+        return dict(sorted(totals.items(), key=lambda item: -item[1]))
+
+
+def main():
+    output_dir = sys.argv[1] if len(sys.argv) > 1 else CUBE_DIR
+    start = time.perf_counter()
+    axes = build(output_dir)
+    elapsed = time.perf_counter() - start
+
+    size = sum(os.path.getsize(cube_path(output_dir, university)) for university in axes)
+    cells_total = sum(len(axis['days']) * len(axis['types']) * HOURS for axis in axes.values())
+    print(f"Wrote {len(axes)} university cubes to {output_dir} in {elapsed:.2f}s: "
+          f"{cells_total} cells, {size / 2**20:.1f} MB")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,115 @@
+import hashlib
+import json
+import os
+import sys
+import pandas as pd
+import daily_data
+import schema
+from build_aggregates import AGGREGATES_DIR
+
+'''
+Data manifest for the dashboards. Scans data/daily and data/yearly (and the aggregate
+bundles, if built) and writes data/manifest.json with, per file:
+- the path relative to the site root and a content hash, used as a cache-busting ?v= query
+- byte size and row count
+- date range (first/last day for daily files, first/last year for yearly files)
+- the canonical schema: which header each canonical column comes from
+
+The dashboards read the file list from here instead of a hard-coded availableFiles array,
+fetch each file from exactly one URL, and only look for an aggregate bundle that exists.
+Rerun after adding or updating data.
+
+Usage: python build_manifest.py [output file]
+'''
+
+MANIFEST_FILE = os.path.join(daily_data.ROOT, "data", "manifest.json")
+HASH_LENGTH = 16
+YEAR_COLUMN = "Year"
+
+
+def content_hash(path):
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(1 << 20), b''):
+            digest.update(block)
+    return digest.hexdigest()[:HASH_LENGTH]
+
+
+def _url_path(path):
+    return os.path.relpath(path, daily_data.ROOT).replace(os.sep, '/')
+
+
+def file_entry(path):
+    """Fields shared by every manifest entry"""
+    return {
+        'file': os.path.basename(path),
+        'path': _url_path(path),
+        'hash': content_hash(path),
+        'bytes': os.path.getsize(path),
+    }
+
+
+def _day(timestamp):
+    return None if pd.isna(timestamp) else timestamp.strftime('%Y-%m-%d')
+
+
+def daily_entry(path):
+    raw = daily_data.read_raw(path)
+    mapping = schema.map_headers(raw.columns)['mapping']
+    df = daily_data.normalize(raw, daily_data.university_name(path), mapping)
+    # Date range from when incidents occurred, or when they were reported if that's all there is
+    dates = df['occurred'].fillna(df['reported'])
+
+    entry = file_entry(path)
+    entry.update({
+        'rows': int(len(df)),
+        'first_date': _day(dates.min()),
+        'last_date': _day(dates.max()),
+        # Sorted, as a mapping read back from the schema cache comes in a different order
+        'schema': dict(sorted(mapping.items())),
+    })
+    return entry
+
+
+def yearly_entry(path):
+    raw = daily_data.read_raw(path)
+    years = pd.to_numeric(raw[YEAR_COLUMN], errors='coerce') if YEAR_COLUMN in raw else pd.Series(dtype=float)
+
+    entry = file_entry(path)
+    entry.update({
+        'rows': int(len(raw)),
+        'first_year': None if years.isna().all() else int(years.min()),
+        'last_year': None if years.isna().all() else int(years.max()),
+        'columns': list(raw.columns),
+    })
+    return entry
+
+
+def build_manifest():
+    bundles = sorted(os.path.join(AGGREGATES_DIR, name) for name in os.listdir(AGGREGATES_DIR)
+                     if name.endswith('.json')) if os.path.isdir(AGGREGATES_DIR) else []
+    return {
+        'daily': [daily_entry(path) for path in daily_data.daily_files(daily_data.DAILY_DIR)],
+        'yearly': [yearly_entry(path) for path in daily_data.daily_files(daily_data.YEARLY_DIR)],
+        'aggregates': {os.path.splitext(os.path.basename(path))[0]: file_entry(path) for path in bundles},
+    }
+
+
+def write_manifest(manifest, path=MANIFEST_FILE):
+    temp_file = path + ".tmp"
+    with open(temp_file, 'w', encoding='utf-8') as f:
+        json.dump(manifest, f, indent=1, ensure_ascii=False)
+        f.write('\n')
+    os.replace(temp_file, path)
+
+
+def main():
+    path = sys.argv[1] if len(sys.argv) > 1 else MANIFEST_FILE
+    manifest = build_manifest()
+    write_manifest(manifest, path)
+    print(f"Wrote {path}: {len(manifest['daily'])} daily files, {len(manifest['yearly'])} yearly files, "
+          f"{len(manifest['aggregates'])} aggregate bundles")
+
+
+if __name__ == "__main__":
+    main()
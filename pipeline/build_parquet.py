@@ -0,0 +1,150 @@
+import os
+import shutil
+import sys
+import time
+import pandas as pd
+import pyarrow as pa
+import pyarrow.dataset as ds
+import pyarrow.parquet as pq
+import daily_data
+import dedup
+
+'''
+Columnar build of data/daily. Every daily CSV is normalized to the canonical schema, near-duplicate
+rows are merged (dedup.py), and the result is written to one Parquet dataset, partitioned by
+university and month of occurrence:
+
+    data/parquet/daily/university=UCLA/month=2025-03/part-0.parquet
+
+Columns are dictionary encoded, timestamps are typed, and each file is sorted by occurred time
+with row-group statistics, so a query for one university or a date range only opens the
+matching directories and skips row groups whose min/max don't overlap.
+
+Usage: python build_parquet.py [output folder]
+'''
+
+PARQUET_DIR = os.path.join(daily_data.ROOT, "data", "parquet", "daily")
+ROW_GROUP_SIZE = 64 * 1024
+UNKNOWN_MONTH = "unknown"
+
+# Plain strings in Arrow; Parquet dictionary-encodes them per column chunk. Writing Arrow
+# dictionaries instead would copy the full category list into every partition file.
+SCHEMA = pa.schema([
+    ('university', pa.string()),
+    ('case_number', pa.string()),
+    ('incident_type', pa.string()),
+    ('occurred', pa.timestamp('ms')),
+    ('reported', pa.timestamp('ms')),
+    ('location', pa.string()),
+    ('disposition', pa.string()),
+    ('campus', pa.string()),
+    ('narrative', pa.string()),
+    ('occurred_has_time', pa.bool_()),
+    ('month', pa.string()),
+])
+# Read back as Arrow dictionaries, i.e. pandas categoricals
+DICTIONARY_COLUMNS = ['incident_type', 'location', 'disposition', 'campus']
+
+PARTITIONING = ds.partitioning(
+    pa.schema([('university', pa.string()), ('month', pa.string())]), flavor='hive')
+
+
+def month_of(df):
+    """Partition month: when the incident occurred, or was reported if that's all we have"""
+    when = df['occurred'].fillna(df['reported'])
+    return when.dt.strftime('%Y-%m').fillna(UNKNOWN_MONTH)
+
+
+def to_table(df):
+    """Canonical DataFrame to an Arrow table with SCHEMA, sorted for tight row-group stats"""
+    df = df.assign(month=month_of(df))
+    df = df.sort_values(['university', 'month', 'occurred'], kind='stable')
+    return pa.Table.from_pandas(df, schema=SCHEMA, preserve_index=False)
+
+
+def build(output_dir=PARQUET_DIR, paths=None):
+    """
+    Rebuild the Parquet dataset from the daily CSVs.
+
+    Returns:
+        The Arrow table that was written
+    """
+    df = dedup.dedup_frame(daily_data.load_daily(paths))
+    table = to_table(df)
+
+    if os.path.exists(output_dir):
+        shutil.rmtree(output_dir)
+    file_options = ds.ParquetFileFormat().make_write_options(
+        compression='zstd', use_dictionary=True, write_statistics=True)
+    ds.write_dataset(
+        table, output_dir, format='parquet', partitioning=PARTITIONING,
+        file_options=file_options, max_rows_per_group=ROW_GROUP_SIZE,
+        max_rows_per_file=ROW_GROUP_SIZE * 16, existing_data_behavior='overwrite_or_ignore')
+    return table
+
+
+def dataset(output_dir=PARQUET_DIR):
+    file_format = ds.ParquetFileFormat(read_options={'dictionary_columns': DICTIONARY_COLUMNS})
+    return ds.dataset(output_dir, format=file_format, partitioning=PARTITIONING)
+
+
+def load(universities=None, start=None, end=None, columns=None, output_dir=PARQUET_DIR):
+    """
+    Load incidents from the Parquet dataset. Filters are pushed down, so only the matching
+    university/month directories are opened and row groups outside [start, end) are skipped.
+
+    Args:
+        universities: optional name or list of names, e.g. ["UCLA", "UCSD"]
+        start, end: optional bounds on occurred (end is exclusive)
+        columns: optional list of columns to read
+
+    Returns:
+        DataFrame with categoricals for the dictionary-encoded columns
+    """
+    condition = None
+
+    def both(expression):
+        return expression if condition is None else condition & expression
+
+    if universities is not None:
+        if isinstance(universities, str):
+            universities = [universities]
+        condition = both(ds.field('university').isin(list(universities)))
+    if start is not None:
+        start = pd.Timestamp(start)
+        condition = both((ds.field('month') >= start.strftime('%Y-%m')) & (ds.field('month') != UNKNOWN_MONTH))
+        condition = both(ds.field('occurred') >= pa.scalar(start.to_pydatetime(), pa.timestamp('ms')))
+    if end is not None:
+        end = pd.Timestamp(end)
+        condition = both(ds.field('month') <= end.strftime('%Y-%m'))
+        condition = both(ds.field('occurred') < pa.scalar(end.to_pydatetime(), pa.timestamp('ms')))
+
+    table = dataset(output_dir).to_table(columns=columns, filter=condition)
+    df = table.to_pandas()
+    for column in ('university', 'month'):
+        if column in df.columns:
+            df[column] = df[column].astype('category')
+    return df
+
+
+def describe(output_dir=PARQUET_DIR):
+    """Files, row groups and bytes on disk for the dataset"""
+    files = dataset(output_dir).files
+    row_groups = sum(pq.ParquetFile(path).num_row_groups for path in files)
+    size = sum(os.path.getsize(path) for path in files)
+    return {'files': len(files), 'row_groups': row_groups, 'bytes': size}
+
+
+def main():
+    output_dir = sys.argv[1] if len(sys.argv) > 1 else PARQUET_DIR
+    start = time.perf_counter()
+    table = build(output_dir)
+    elapsed = time.perf_counter() - start
+
+    stats = describe(output_dir)
+    print(f"Wrote {table.num_rows} rows from {len(daily_data.daily_files())} files to {output_dir} in {elapsed:.2f}s")
+    print(f"{stats['files']} Parquet files, {stats['row_groups']} row groups, {stats['bytes'] / 1024:.0f} KB")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,256 @@
+import json
+import os
+import time
+from datetime import datetime
+import numpy as np
+import pandas as pd
+import daily_data
+
+'''
+Change data capture for the daily CSVs. Scrapers rewrite a file whenever a case changes
+(e.g. a disposition going from Open to Closed), so instead of rediffing whole files each
+run compares every record against the previous run's snapshot and appends only what changed
+to a change log that rollups and the dashboard can consume:
+
+    data/cdc/changes.jsonl            one JSON object per line, append-only
+    data/cdc/daily/<university>.npz   snapshot: key hash -> record hash
+
+A record is keyed by (university, case number, case_seq), case_seq numbering the rows of a
+case in file order (daily_data.case_sequence); rows without a case number are keyed by their
+own content. Keys and records are hashed to 64 bits (pandas' vectorized row hashing), so a
+snapshot is 16 bytes per record plus the case numbers, and the diff is two hash-table
+lookups per record: linear in the rows of the file.
+
+Each change is {"seq", "run", "op": insert/update/delete, "university", "case_number",
+"case_seq", "key", "record"}; record is the canonical row for inserts and updates, null for
+deletes. A university's entries and its new snapshot are committed together: the snapshot is
+first saved as <university>.pending.npz along with the bytes to append and the log's size
+before them, then the entries are appended (and synced) and the snapshot moved into place.
+A run after a crash first rolls any pending snapshot forward, appending whatever part of its
+entries didn't reach the log, so every change is logged exactly once with the same seq.
+
+Usage: python cdc.py
+'''
+
+CDC_DIR = os.path.join(daily_data.ROOT, "data", "cdc")
+SNAPSHOT_DIR = os.path.join(CDC_DIR, "daily")
+LOG_FILE = os.path.join(CDC_DIR, "changes.jsonl")
+OPERATIONS = ['insert', 'update', 'delete']
+PENDING_SUFFIX = ".pending.npz"
+
+
+class Snapshot:
+    """One university's records as of the last run: parallel arrays, row order of the file"""
+
+    def __init__(self, keys, hashes, cases, seqs):
+        self.keys = keys
+        self.hashes = hashes
+        self.cases = cases
+        self.seqs = seqs
+
+    @classmethod
+    def from_frame(cls, df):
+        hashes = daily_data.record_hashes(df)
+        keys, cases, seqs = daily_data.record_keys(df, hashes)
+        return cls(keys, hashes, cases, seqs)
+
+    @classmethod
+    def empty(cls):
+        return cls(np.zeros(0, np.uint64), np.zeros(0, np.uint64), np.zeros(0, str), np.zeros(0, np.int32))
+
+    def save(self, path, **extra):
+        """Write atomically; extra arrays are stored alongside (load ignores them)"""
+        temp_file = path + ".tmp.npz"
+        np.savez_compressed(temp_file, keys=self.keys, hashes=self.hashes, cases=self.cases, seqs=self.seqs,
+                            **extra)
+        os.replace(temp_file, path)
+
+    @classmethod
+    def load(cls, path):
+        if not os.path.exists(path):
+            return cls.empty()
+        with np.load(path) as data:
+            return cls(data['keys'], data['hashes'], data['cases'], data['seqs'])
+
+
+def diff(old, new):
+    """
+    Positions of changed records.
+
+    Returns:
+        (inserted, updated, deleted): positions in new, in new and in old
+    """
+    # get_indexer builds a hash table over one side and probes it with the other
+    in_old = pd.Index(old.keys).get_indexer(new.keys)
+    in_new = pd.Index(new.keys).get_indexer(old.keys)
+    found = in_old >= 0
+    inserted = np.flatnonzero(~found)
+    updated = np.flatnonzero(found)[old.hashes[in_old[found]] != new.hashes[found]]
+    deleted = np.flatnonzero(in_new < 0)
+    return inserted, updated, deleted
+
+
+def _json_value(value):
+    if value is None or value is pd.NA or value is pd.NaT or (isinstance(value, float) and np.isnan(value)):
+        return None
+    if isinstance(value, pd.Timestamp):
+        return value.isoformat()
+    if isinstance(value, np.generic):
+        return value.item()
+    return value
+
+
+def _records(df, positions):
+    if not len(positions):
+        return []
+    rows = df.iloc[positions][daily_data.RECORD_COLUMNS].astype(object)
+    return [{column: _json_value(value) for column, value in zip(daily_data.RECORD_COLUMNS, row)}
+            for row in rows.itertuples(index=False, name=None)]
+
+
+def changes(university, df, old, new, run):
+    """Change log entries (without seq) for one university"""
+    inserted, updated, deleted = diff(old, new)
+    entries = []
+    for op, snapshot, positions, records in (
+            ('insert', new, inserted, _records(df, inserted)),
+            ('update', new, updated, _records(df, updated)),
+            ('delete', old, deleted, [None] * len(deleted))):
+        for position, record in zip(positions, records):
+            entries.append({
+                'run': run, 'op': op, 'university': university,
+                'case_number': str(snapshot.cases[position]) or None, 'case_seq': int(snapshot.seqs[position]),
+                'key': f"{int(snapshot.keys[position]):016x}", 'record': record,
+            })
+    return entries
+
+
+def last_seq(path=LOG_FILE):
+    """seq of the last entry in the log, 0 if it is empty"""
+    if not os.path.exists(path) or os.path.getsize(path) == 0:
+        return 0
+    with open(path, 'rb') as f:
+        f.seek(max(0, os.path.getsize(path) - 65536))
+        tail = f.read().rstrip(b'\n').rsplit(b'\n', 1)[-1]
+    return json.loads(tail)['seq']
+
+
+def encode_entries(entries, path=LOG_FILE):
+    """Entries numbered on from the last seq in the log, as the bytes to append"""
+    seq = last_seq(path)
+    return ''.join(json.dumps({'seq': seq + number, **entry}, ensure_ascii=False) + '\n'
+                   for number, entry in enumerate(entries, 1)).encode('utf-8')
+
+
+def append_bytes(data, path=LOG_FILE):
+    """Append to the log, synced to disk before returning"""
+    with open(path, 'ab') as f:
+        f.write(data)
+        f.flush()
+        os.fsync(f.fileno())
+
+
+def read_changes(offset=0, path=LOG_FILE):
+    """
+    Changes appended since a byte offset of the log, for consumers that keep their place.
+
+    Returns:
+        (entries, offset to pass next time)
+    """
+    if not os.path.exists(path):
+        return [], offset
+    with open(path, 'rb') as f:
+        f.seek(offset)
+        data = f.read()
+    # A line still being written has no newline yet; leave it for next time
+    complete = data[:data.rfind(b'\n') + 1]
+    return [json.loads(line) for line in complete.splitlines()], offset + len(complete)
+
+
+def snapshot_path(university, snapshot_dir=SNAPSHOT_DIR):
+    return os.path.join(snapshot_dir, f"{university}.npz")
+
+
+def log_size(path=LOG_FILE):
+    return os.path.getsize(path) if os.path.exists(path) else 0
+
+
+def commit(university, new, data, removed, snapshot_dir=SNAPSHOT_DIR, log_file=LOG_FILE):
+    """Append a university's encoded entries and move its snapshot to new (or remove it) as one step"""
+    pending = os.path.join(snapshot_dir, university + PENDING_SUFFIX)
+    new.save(pending, log_start=np.int64(log_size(log_file)), log_bytes=np.frombuffer(data, np.uint8),
+             removed=np.bool_(removed))
+    finish(pending, snapshot_dir, log_file)
+
+
+def finish(pending, snapshot_dir=SNAPSHOT_DIR, log_file=LOG_FILE):
+    """Append what the log is missing of a pending snapshot's entries, then put the snapshot in place"""
+    with np.load(pending) as saved:
+        start, data, removed = int(saved['log_start']), saved['log_bytes'].tobytes(), bool(saved['removed'])
+    written = min(max(log_size(log_file) - start, 0), len(data))
+    if written < len(data):
+        append_bytes(data[written:], log_file)
+
+    path = snapshot_path(os.path.basename(pending)[:-len(PENDING_SUFFIX)], snapshot_dir)
+    if removed:
+        if os.path.exists(path):
+            os.remove(path)
+        os.remove(pending)
+    else:
+        os.replace(pending, path)
+
+
+def recover(snapshot_dir=SNAPSHOT_DIR, log_file=LOG_FILE):
+    """Finish the commits of a run that crashed in the middle of one"""
+    for name in os.listdir(snapshot_dir):
+        if name.endswith(PENDING_SUFFIX):
+            finish(os.path.join(snapshot_dir, name), snapshot_dir, log_file)
+
+
+def capture(paths=None, snapshot_dir=SNAPSHOT_DIR, log_file=LOG_FILE):
+    """
+    Diff every daily CSV against its snapshot, log the changes and move the snapshots forward.
+    A university whose CSV was removed has all its records deleted.
+
+    Returns:
+        {university: {op: count}} for universities with changes
+    """
+    paths = daily_data.daily_files() if paths is None else paths
+    os.makedirs(snapshot_dir, exist_ok=True)
+    recover(snapshot_dir, log_file)
+    run = datetime.now().isoformat(timespec='seconds')
+    summary = {}
+
+    current = {daily_data.university_name(path): path for path in paths}
+    previous = {name[:-len('.npz')] for name in os.listdir(snapshot_dir)
+                if name.endswith('.npz') and not name.endswith('.tmp.npz')}
+    for university in sorted(set(current) | previous):
+        old = Snapshot.load(snapshot_path(university, snapshot_dir))
+        if university in current:
+            df = daily_data.load_file(current[university])
+            new = Snapshot.from_frame(df)
+        else:
+            df, new = None, Snapshot.empty()
+
+        entries = changes(university, df, old, new, run)
+        if not entries:
+            continue
+        commit(university, new, encode_entries(entries, log_file), university not in current, snapshot_dir, log_file)
+        summary[university] = {op: sum(entry['op'] == op for entry in entries) for op in OPERATIONS}
+    return summary
+
+
+def main():
+    start = time.perf_counter()
+    summary = capture()
+    elapsed = time.perf_counter() - start
+
+    for university, counts in sorted(summary.items()):
+        print(f"  {university}: " + ', '.join(f"{counts[op]} {op}s" for op in OPERATIONS if counts[op]))
+    totals = {op: sum(counts[op] for counts in summary.values()) for op in OPERATIONS}
+    print(f"Captured changes of {len(summary)} universities in {elapsed:.2f}s: "
+          + ', '.join(f"{totals[op]} {op}s" for op in OPERATIONS) + f" -> {LOG_FILE}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,80 @@
+import sys
+import numpy as np
+import pandas as pd
+import daily_data
+
+'''
+Compact in-memory form of the combined daily data, for holding many years of every source
+at once. On top of what daily_data.load_daily does (university, incident type, disposition
+and campus as categoricals), it:
+- makes location categorical too, every categorical column getting one dictionary shared by
+  all sources (union_categoricals, without going through a Python string per row)
+- keeps occurred and reported as datetime64, i.e. int64 counts since the epoch
+- adds occurred_hour and occurred_weekday (Monday is 0) as int8, NO_VALUE where the
+  incident has no time or date, so hour and weekday breakdowns don't go back to the timestamps
+and fails with daily_data.MemoryBudgetError when the result is over the memory budget.
+
+Prints memory_usage(deep=True) per column for the sources combined with plain pd.concat
+(which turns categoricals whose categories differ between sources into Python strings) and
+for the compact table, then exits with an error if the compact table is over the budget.
+
+Usage: python compact.py [budget MB]   (daily_data.MEMORY_BUDGET_MB by default)
+'''
+
+COMPACT_CATEGORICAL_COLUMNS = daily_data.CATEGORICAL_COLUMNS + ['location']
+NO_VALUE = -1
+
+
+def compact(frames, budget_mb=daily_data.MEMORY_BUDGET_MB):
+    """Combine normalized sources (daily_data.load_file) into the compact table"""
+    frames = [frame.assign(location=frame['location'].astype('category')) for frame in frames]
+    df = daily_data.concat_categoricals(frames, COMPACT_CATEGORICAL_COLUMNS)
+
+    occurred = df['occurred']
+    dated = occurred.notna()
+    df['occurred_hour'] = occurred.dt.hour.where(dated & df['occurred_has_time'], NO_VALUE).astype(np.int8)
+    df['occurred_weekday'] = occurred.dt.dayofweek.where(dated, NO_VALUE).astype(np.int8)
+    daily_data.check_memory(df, budget_mb)
+    return df
+
+
+def load_compact(paths=None, budget_mb=daily_data.MEMORY_BUDGET_MB):
+    """Read, normalize and compact every daily CSV"""
+    paths = daily_data.daily_files() if paths is None else paths
+    return compact([daily_data.load_file(path) for path in paths], budget_mb)
+
+
+def memory_report(before, after):
+    """Bytes per column (memory_usage(deep=True)) of two forms of the same table, with totals"""
+    report = pd.DataFrame({'before': before.memory_usage(deep=True, index=False),
+                           'after': after.memory_usage(deep=True, index=False)})
+    report = report.reindex(list(dict.fromkeys([*before.columns, *after.columns])))
+    report.loc['total'] = report.sum()
+    report['dtype'] = pd.Series({column: str(after[column].dtype) if column in after else str(before[column].dtype)
+                                 for column in report.index if column != 'total'})
+    return report
+
+
+def main():
+    budget_mb = float(sys.argv[1]) if len(sys.argv) > 1 else daily_data.MEMORY_BUDGET_MB
+    frames = [daily_data.load_file(path) for path in daily_data.daily_files()]
+    before = pd.concat(frames, ignore_index=True)
+    after = compact(frames, budget_mb=None)
+
+    report = memory_report(before, after)
+    print(f"{len(after)} rows from {len(frames)} sources")
+    print(f"{'column':<20} {'plain concat':>14} {'compact':>12}  dtype")
+    for column, row in report.iterrows():
+        before_text = '' if pd.isna(row['before']) else f"{row['before'] / 1024:,.0f} KB"
+        print(f"{column:<20} {before_text:>14} {row['after'] / 1024:>9,.0f} KB  {row['dtype'] if column != 'total' else ''}")
+    print(f"{report.loc['total', 'before'] / report.loc['total', 'after']:.1f}x smaller")
+
+    try:
+        daily_data.check_memory(after, budget_mb)
+    except daily_data.MemoryBudgetError as e:
+        sys.exit(str(e))
+    print(f"Within the {budget_mb:g} MB budget")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,278 @@
+import glob
+import io
+import os
+import numpy as np
+import pandas as pd
+from pandas.api.types import union_categoricals
+import schema
+
+'''
+Loads the raw data/daily/*.csv files into one canonical table. The daily files were produced
+by different scrapers and cleaning scripts, so they differ in encoding (some have a BOM),
+delimiter (OhioState is tab separated), line endings (some are CR only) and header spelling.
+Every file is mapped onto CANONICAL_COLUMNS (see schema.py) with typed timestamps so
+downstream steps (the Parquet build, aggregates, indexes) don't have to know about any of that.
+'''
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+DAILY_DIR = os.path.join(ROOT, "data", "daily")
+YEARLY_DIR = os.path.join(ROOT, "data", "yearly")
+
+CANONICAL_COLUMNS = [
+    'university', 'case_number', 'incident_type', 'occurred', 'reported',
+    'location', 'disposition', 'campus', 'narrative', 'occurred_has_time',
+]
+CATEGORICAL_COLUMNS = ['university', 'incident_type', 'disposition', 'campus']
+TIMESTAMP_COLUMNS = ['occurred', 'reported']
+# A row's content, as record_hashes hashes it
+RECORD_COLUMNS = [column for column in CANONICAL_COLUMNS if column != 'university']
+
+# Files that keep the time of a report in its own column
+TIME_COMPANIONS = {'reported': 'Time Reported'}
+
+MISSING_VALUES = {'', '-', 'nan', 'none', 'null', 'n/a', 'unknown'}
+
+# Largest the combined table may be in memory (memory_usage(deep=True)); builds that load
+# more fail with MemoryBudgetError instead of pushing the machine into swap
+MEMORY_BUDGET_MB = 256
+
+# Anything outside this range is a typo or a mangled cell (e.g. "3/11/580")
+MIN_YEAR = 1970
+MAX_YEAR = 2100
+
+MONTHS = {name: i for i, name in enumerate(
+    ['jan', 'feb', 'mar', 'apr', 'may', 'jun', 'jul', 'aug', 'sep', 'oct', 'nov', 'dec'], start=1)}
+
+# First date in a cell (m/d/y, y-m-d or d-Mon-y) and the time right after it if there is one.
+# Ranges like "1/2/25 to 1/3/25 4:00 PM to 6:45 AM" resolve to their start.
+DATETIME_PATTERN = (
+    r'(?:(?P<m>\d{1,2})/(?P<d>\d{1,2})/(?P<y>\d{2,4})'
+    r'|(?P<iy>\d{4})-(?P<im>\d{1,2})-(?P<id>\d{1,2})'
+    r'|(?P<dd>\d{1,2})-(?P<mon>[A-Za-z]{3})-(?P<yy>\d{2,4}))'
+    r'(?:[\sT]+(?P<H>\d{1,2}):?(?P<M>\d{2})(?::(?P<S>\d{2}))?\s*(?P<ampm>[AaPp])?\.?(?:[Mm]\.?)?)?'
+)
+
+
+class MemoryBudgetError(Exception):
+    pass
+
+
+def daily_files(folder=DAILY_DIR):
+    """Paths of all daily CSVs, sorted by name"""
+    return sorted(glob.glob(os.path.join(folder, "*.csv")))
+
+
+def university_name(path):
+    return os.path.splitext(os.path.basename(path))[0]
+
+
+def read_raw(path):
+    """
+    Read a CSV exactly as written, whatever its encoding, delimiter or line endings.
+    All values are returned as strings with missing cells as "".
+    """
+    with open(path, 'rb') as f:
+        return parse_raw(decode(f.read())[0])
+
+
+def decode(data):
+    """Bytes of a daily CSV as text; returns (text, encoding used)"""
+    try:
+        return data.decode('utf-8-sig'), 'utf-8-sig'
+    except UnicodeDecodeError:
+        return data.decode('latin-1'), 'latin-1'
+
+
+def parse_raw(text):
+    """read_raw for CSV text already in memory, e.g. a header line plus newly appended rows"""
+    # Quoted multi-line cells use \n, so only bare CRs need normalizing
+    text = text.replace('\r\n', '\n').replace('\r', '\n')
+    first_line = text.split('\n', 1)[0]
+    delimiter = '\t' if first_line.count('\t') > first_line.count(',') else ','
+
+    df = pd.read_csv(io.StringIO(text), sep=delimiter, dtype=str, keep_default_na=False)
+    df.columns = [str(col).strip() for col in df.columns]
+    return df
+
+
+def _numbers(series):
+    """Numeric strings to a float array with NaN for anything missing or non-numeric"""
+    return pd.to_numeric(series, errors='coerce').astype('Float64').to_numpy(dtype='float64', na_value=np.nan)
+
+
+def parse_datetimes(values, with_time_flag=False):
+    """
+    Vectorized parse of the date/time formats found in the daily files, e.g.
+    "3/21/25 21:23", "1/2/25 1620", "03/01/2025 12:29 A.M.", "3/24/25  10:47:42AM",
+    "3-Mar-25", "2025-04-22 14:00". Unparseable cells become NaT.
+
+    With with_time_flag, returns (timestamps, whether each cell had a time of day) so a
+    date-only cell isn't mistaken for midnight.
+    """
+    values = pd.Series(values, dtype='string')
+    parts = values.str.extract(DATETIME_PATTERN)
+
+    year = parts['y'].fillna(parts['iy']).fillna(parts['yy'])
+    month = parts['m'].fillna(parts['im']).fillna(parts['mon'].str.lower().map(MONTHS).astype('string'))
+    day = parts['d'].fillna(parts['id']).fillna(parts['dd'])
+
+    year = _numbers(year)
+    year = np.where(year < 100, year + 2000, year)
+    hour = np.nan_to_num(_numbers(parts['H']))
+    ampm = parts['ampm'].str.lower().fillna('').to_numpy()
+    hour = np.where((ampm == 'p') & (hour < 12), hour + 12, hour)
+    hour = np.where((ampm == 'a') & (hour == 12), 0, hour)
+
+    frame = pd.DataFrame({
+        'year': year,
+        'month': _numbers(month),
+        'day': _numbers(day),
+        'hour': hour,
+        'minute': np.nan_to_num(_numbers(parts['M'])),
+        'second': np.nan_to_num(_numbers(parts['S'])),
+    })
+    invalid = (frame[['year', 'month', 'day']].isna().any(axis=1) | (frame['hour'] > 23) | (frame['minute'] > 59)
+               | (frame['year'] < MIN_YEAR) | (frame['year'] > MAX_YEAR))
+    frame.loc[invalid] = np.nan
+    timestamps = pd.to_datetime(frame, errors='coerce')
+    if with_time_flag:
+        return timestamps, (parts['H'].notna() & timestamps.notna()).astype(bool)
+    return timestamps
+
+
+def _clean(series):
+    series = series.astype(str).str.strip()
+    return series.where(~series.str.lower().isin(MISSING_VALUES), None)
+
+
+def _coalesce(df, headers):
+    """First non-missing value across headers, row by row"""
+    result = None
+    for header in headers:
+        if header not in df.columns:
+            continue
+        values = _clean(df[header])
+        result = values if result is None else result.fillna(values)
+    return result
+
+
+def map_columns(columns):
+    """{canonical column: [raw headers in priority order]} for a file's header row, see schema.py"""
+    return schema.map_headers(columns)['mapping']
+
+
+def normalize(df, university, mapping=None):
+    """
+    Map a raw daily table onto CANONICAL_COLUMNS.
+
+    Args:
+        df: DataFrame from read_raw
+        university: value for the university column, e.g. "UCLA"
+        mapping: optional {canonical column: [raw headers]}, defaults to map_columns(df.columns)
+
+    Returns:
+        DataFrame with CANONICAL_COLUMNS, timestamps parsed and categoricals typed
+    """
+    mapping = mapping if mapping is not None else map_columns(df.columns)
+    out = pd.DataFrame(index=df.index)
+
+    for canonical in CANONICAL_COLUMNS:
+        if canonical in ('university', 'occurred_has_time'):
+            continue
+        values = _coalesce(df, mapping.get(canonical, []))
+        if values is None:
+            values = pd.Series(None, index=df.index, dtype=object)
+
+        if canonical in TIMESTAMP_COLUMNS:
+            companion = TIME_COMPANIONS.get(canonical)
+            if companion in df.columns:
+                times = _clean(df[companion])
+                values = values.where(times.isna() | values.str.contains(':', na=False), values + ' ' + times)
+            values, has_time = parse_datetimes(values, with_time_flag=True)
+            if canonical == 'occurred':
+                out['occurred_has_time'] = has_time.to_numpy()
+        out[canonical] = values
+
+    # Rows with nothing but blanks are spacer rows left over from PDF extraction
+    content = out.drop(columns=['occurred_has_time']).notna().any(axis=1)
+    out = out[content].reset_index(drop=True)
+
+    out.insert(0, 'university', university)
+    for column in CATEGORICAL_COLUMNS:
+        out[column] = out[column].astype('category')
+    for column in ['case_number', 'location', 'narrative']:
+        out[column] = out[column].astype('string')
+    return out[CANONICAL_COLUMNS]
+
+
+def load_file(path):
+    """Read and normalize one daily CSV"""
+    return normalize(read_raw(path), university_name(path))
+
+
+def case_sequence(df):
+    """
+    Position of each row among the rows with the same university and case number, in file
+    order. Many cases have one row per offense, so (university, case_number, case_sequence)
+    is what identifies a row
+    """
+    case = df['case_number'].astype(object)
+    return case.groupby([df['university'].astype(object), case], dropna=False).cumcount()
+
+
+def record_hashes(df):
+    """uint64 hash of each canonical row's values"""
+    return pd.util.hash_pandas_object(df[RECORD_COLUMNS], index=False).to_numpy()
+
+
+def record_keys(df, hashes):
+    """
+    (key hash, case number or '', case_seq) per row, what cdc.py and store.py identify a row
+    by: the university, the case number and case_sequence. Rows without a case number are
+    keyed by their hash instead, numbering identical rows
+    """
+    case = df['case_number'].astype(object)
+    missing = case.isna()
+    identity = case.where(~missing, pd.Series(hashes, index=df.index).map('#{:016x}'.format))
+    seq = case_sequence(df)
+    seq[missing] = identity[missing].groupby(identity[missing]).cumcount()
+    keys = pd.util.hash_pandas_object(pd.DataFrame({
+        'university': df['university'].astype(str), 'case': identity, 'seq': seq}), index=False).to_numpy()
+    return keys, case.where(~missing, '').to_numpy(dtype=str), seq.to_numpy(dtype=np.int32)
+
+
+def concat_categoricals(frames, columns=CATEGORICAL_COLUMNS):
+    """
+    pd.concat for normalized frames whose categorical columns have different categories.
+    Plain concat would turn those columns into Python strings and back; union_categoricals
+    builds each column once with one dictionary shared by all sources.
+    """
+    df = pd.concat([frame.drop(columns=columns) for frame in frames], ignore_index=True)
+    for column in columns:
+        pieces = [frame[column] for frame in frames]
+        # A source without any value has no categories to give them a dtype
+        dtype = next((piece.cat.categories.dtype for piece in pieces if len(piece.cat.categories)), None)
+        if dtype is not None:
+            pieces = [piece if len(piece.cat.categories) else piece.cat.set_categories(pd.Index([], dtype=dtype))
+                      for piece in pieces]
+        df[column] = union_categoricals(pieces, sort_categories=True)
+    return df[list(frames[0].columns)]
+
+
+def check_memory(df, budget_mb=MEMORY_BUDGET_MB):
+    """
+    Raises:
+        MemoryBudgetError: df takes more than budget_mb megabytes (no limit if None)
+    """
+    used = df.memory_usage(deep=True).sum()
+    if budget_mb is not None and used > budget_mb * 2**20:
+        raise MemoryBudgetError(f"Combined daily data takes {used / 2**20:.1f} MB, over the {budget_mb} MB budget")
+    return used
+
+
+def load_daily(paths=None, budget_mb=MEMORY_BUDGET_MB):
+    """Read and normalize every daily CSV into one DataFrame, failing if it's over budget_mb"""
+    paths = daily_files() if paths is None else paths
+    df = concat_categoricals([load_file(path) for path in paths])
+    check_memory(df, budget_mb)
+    return df
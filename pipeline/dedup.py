@@ -0,0 +1,276 @@
+import sys
+import time
+import numpy as np
+import pandas as pd
+import daily_data
+
+'''
+Near-duplicate detection for canonical incident rows. Overlapping PDF page splits, the
+overlapping weekly pages php_scraper fetches and repeated monthly scrapes leave rows that
+are the same incident but not byte-identical (a missing case number, a trimmed location, a
+time that lost its minutes), which drop_duplicates() can't see.
+
+Every row becomes a set of shingles: its incident type, the words of its location, its
+occurred date and hour, and its case number. A MinHash signature (NUM_PERM minimums of
+universal hashes) estimates the Jaccard similarity of two rows' shingle sets, and LSH
+banding (BANDS bands of NUM_PERM / BANDS values) puts rows whose signatures agree on a whole
+band in the same bucket, so candidate pairs come from sorting band hashes instead of
+comparing every pair of rows. Candidates that pass the RULES are merged into clusters:
+
+    df = daily_data.load_daily()
+    deduped, clusters = deduplicate(df)
+    deduped, clusters = deduplicate(df, threshold=0.8, same_type=False)
+
+build_parquet.py and build_aggregates.py merge the clusters (dedup_frame) before writing, so
+duplicates don't reach the Parquet dataset or the dashboards' bundles.
+
+Shingles and signatures are computed in vectorized chunks of CHUNK_ROWS rows, so memory
+stays flat for millions of rows.
+
+Usage: python dedup.py [threshold]
+'''
+
+NUM_PERM = 64
+BANDS = 16
+CHUNK_ROWS = 250_000
+PERM_BATCH = 8
+# FNV-1a, for combining a band's values into one bucket hash
+FNV_OFFSET = np.uint64(0xcbf29ce484222325)
+FNV_PRIME = np.uint64(0x100000001b3)
+PRIME = np.uint64(4_294_967_291)   # largest prime below 2^32
+SEED = 1
+
+# Candidates are merged only when all of these hold
+RULES = {
+    'threshold': 0.7,           # estimated Jaccard similarity of the shingle sets
+    'same_university': True,
+    'same_type': True,          # the rows of a multi-offense case share everything else
+    'conflicting_cases': False,  # merge rows whose case numbers are both present and differ
+    'max_hours_apart': 1,       # occurred times, when both rows have one; None for no limit
+}
+
+
+def _words(values):
+    return values.astype(object).fillna('').astype(str).str.lower().str.findall(r'[a-z0-9]+')
+
+
+def _hash32(values, tag=''):
+    """32-bit hashes (in uint64) of strings, or of integers tagged with a field name"""
+    values = np.asarray(values)
+    if values.dtype.kind in 'iu':
+        hashes = pd.util.hash_array(values.astype(np.int64)) ^ pd.util.hash_array(np.array([tag], dtype=object))[0]
+    else:
+        hashes = pd.util.hash_array(values.astype(object))
+    return hashes & np.uint64(0xFFFFFFFF)
+
+
+def shingles(df):
+    """
+    (row, 32-bit shingle hash) arrays for the rows of df (which has a default index), sorted
+    by row. Every shingle is tagged with its field, so "2025" as a case number and as a
+    location word differ.
+    """
+    rows, hashes = [], []
+
+    def add(positions, values, tag=''):
+        rows.append(np.asarray(positions, dtype=np.int64))
+        hashes.append(_hash32(values, tag))
+
+    n = np.arange(len(df))
+    types = df['incident_type'].astype(object).str.strip().str.lower()
+    present = types.notna().to_numpy()
+    add(n[present], 't:' + types[present])
+
+    words = _words(df['location']).explode().dropna()
+    words = words[words != '']
+    add(words.index.to_numpy(), 'l:' + words)
+
+    occurred = df['occurred'].to_numpy(dtype='datetime64[ns]')
+    dated = ~np.isnat(occurred)
+    add(n[dated], occurred[dated].astype('datetime64[D]').view(np.int64), 'day')
+    timed = dated & df['occurred_has_time'].astype(bool).to_numpy()
+    add(n[timed], occurred[timed].astype('datetime64[h]').view(np.int64), 'hour')
+
+    cases = df['case_number'].astype(object).str.lower().str.replace(r'[^a-z0-9]', '', regex=True)
+    present = (cases.notna() & (cases != '')).to_numpy()
+    add(n[present], 'c:' + cases[present])
+
+    rows, hashes = np.concatenate(rows), np.concatenate(hashes)
+    order = np.argsort(rows, kind='stable')
+    return rows[order], hashes[order]
+
+
+def permutations(num_perm=NUM_PERM, seed=SEED):
+    """(a, b) of the universal hashes (a * x + b) mod PRIME; a * x + b fits in uint64 for 32-bit x"""
+    rng = np.random.default_rng(seed)
+    return (rng.integers(1, int(PRIME), num_perm, dtype=np.uint64),
+            rng.integers(0, int(PRIME), num_perm, dtype=np.uint64))
+
+
+def signatures(df, num_perm=NUM_PERM, seed=SEED):
+    """uint32 MinHash signature per row, shape (rows, num_perm); rows without shingles are all 2^32 - 1"""
+    a, b = permutations(num_perm, seed)
+    result = np.full((len(df), num_perm), np.iinfo(np.uint32).max, dtype=np.uint32)
+    for start in range(0, len(df), CHUNK_ROWS):
+        rows, hashes = shingles(df.iloc[start:start + CHUNK_ROWS].reset_index(drop=True))
+        if not len(rows):
+            continue
+        firsts = np.flatnonzero(np.diff(rows, prepend=-1))
+        for i in range(0, num_perm, PERM_BATCH):
+            values = (hashes[:, None] * a[None, i:i + PERM_BATCH] + b[None, i:i + PERM_BATCH]) % PRIME
+            result[start + rows[firsts], i:i + PERM_BATCH] = np.minimum.reduceat(values, firsts, axis=0)
+    return result
+
+
+def band_hashes(signature, bands=BANDS, blocks=None):
+    """
+    uint64 hash of each row's signature values in each band, shape (rows, bands). Rows in
+    different blocks (integer codes) land in different buckets
+    """
+    width = signature.shape[1] // bands
+    start = np.full(len(signature), FNV_OFFSET, dtype=np.uint64)
+    if blocks is not None:
+        start = (start ^ blocks.astype(np.uint64)) * FNV_PRIME
+    result = np.zeros((len(signature), bands), dtype=np.uint64)
+    for band in range(bands):
+        h = start
+        for value in signature[:, band * width:(band + 1) * width].T:
+            h = (h ^ value.astype(np.uint64)) * FNV_PRIME
+        result[:, band] = h
+    return result
+
+
+def candidate_pairs(signature, bands=BANDS, blocks=None):
+    """
+    Pairs of rows that share a bucket in some band, as (left, right) arrays with left < right.
+    Each bucket contributes its members in row order, each paired with the next, so a bucket
+    of k rows gives k - 1 pairs rather than k^2 / 2. Blocks keep rows that the rules could
+    never merge (other universities, other types) out of each other's buckets, so they
+    don't break up those chains.
+    """
+    empty = (signature == np.iinfo(np.uint32).max).all(axis=1)
+    keys = []
+    for band in band_hashes(signature, bands, blocks).T:
+        order = np.argsort(band, kind='stable')
+        same = band[order[1:]] == band[order[:-1]]
+        left, right = order[:-1][same], order[1:][same]
+        keep = ~(empty[left] | empty[right])
+        keys.append(left[keep].astype(np.int64) * len(signature) + right[keep])
+    keys = np.unique(np.concatenate(keys)) if keys else np.zeros(0, dtype=np.int64)
+    return keys // max(len(signature), 1), keys % max(len(signature), 1)
+
+
+def blocks(df, rules):
+    """Code of each row's university and/or type when the rules require them to match, else None"""
+    columns = [column for column, rule in (('university', 'same_university'), ('incident_type', 'same_type'))
+               if rules[rule]]
+    if not columns:
+        return None
+    return df.groupby(columns, observed=True, dropna=False, sort=False).ngroup().to_numpy()
+
+
+def accept(df, signature, left, right, rules):
+    """Which candidate pairs the rules allow to be merged"""
+    similarity = (signature[left] == signature[right]).mean(axis=1)
+    ok = similarity >= rules['threshold']
+    for column, rule in (('university', 'same_university'), ('incident_type', 'same_type')):
+        if rules[rule]:
+            codes, _ = pd.factorize(df[column].astype(object), use_na_sentinel=False)  # missing == missing
+            ok &= codes[left] == codes[right]
+    if not rules['conflicting_cases']:
+        cases = df['case_number'].astype(object).fillna('').str.strip().to_numpy()
+        ok &= (cases[left] == '') | (cases[right] == '') | (cases[left] == cases[right])
+    if rules['max_hours_apart'] is not None:
+        occurred = df['occurred'].to_numpy(dtype='datetime64[ns]')
+        apart = np.abs(occurred[left] - occurred[right]) > np.timedelta64(int(rules['max_hours_apart'] * 3600), 's')
+        ok &= ~apart | np.isnat(occurred[left]) | np.isnat(occurred[right])
+    return ok
+
+
+def clusters(count, left, right):
+    """Cluster label of each of count rows given merged pairs: the smallest row in its cluster"""
+    labels = np.arange(count)
+    while len(left):
+        lowest = np.minimum(labels[left], labels[right])
+        np.minimum.at(labels, left, lowest)
+        np.minimum.at(labels, right, lowest)
+        labels = labels[labels]
+        changed = labels[left] != labels[right]
+        left, right = left[changed], right[changed]
+    while True:
+        jumped = labels[labels]
+        if np.array_equal(jumped, labels):
+            return labels
+        labels = jumped
+
+
+def merge(df, labels):
+    """
+    One row per cluster: the member with the most non-missing columns (the earliest on a tie),
+    with its missing columns filled from the other members, most complete first.
+    """
+    filled = df.notna().sum(axis=1).to_numpy()
+    order = np.lexsort((np.arange(len(df)), -filled, labels))
+    merged = df.iloc[order].groupby(labels[order], sort=True).first().reset_index(drop=True)
+    for column in daily_data.CATEGORICAL_COLUMNS:
+        if column in merged:
+            merged[column] = merged[column].astype(df[column].dtype)
+    return merged[df.columns]
+
+
+def deduplicate(df, num_perm=NUM_PERM, bands=BANDS, **rules):
+    """
+    Merge near-duplicate rows of a canonical DataFrame.
+
+    Args:
+        num_perm, bands: signature length and LSH bands; more bands find pairs with lower
+            similarity, at the cost of more candidates
+        rules: overrides of RULES
+
+    Returns:
+        (deduplicated DataFrame, cluster label of every input row)
+    """
+    unknown = set(rules) - set(RULES)
+    if unknown:
+        raise ValueError(f"Unknown rules: {', '.join(sorted(unknown))}")
+    if num_perm % bands:
+        raise ValueError("num_perm must be a multiple of bands")
+    rules = {**RULES, **rules}
+    df = df.reset_index(drop=True)
+
+    signature = signatures(df, num_perm)
+    left, right = candidate_pairs(signature, bands, blocks(df, rules))
+    ok = accept(df, signature, left, right, rules)
+    labels = clusters(len(df), left[ok], right[ok])
+    return merge(df, labels), labels
+
+
+def dedup_frame(df, **rules):
+    """
+    Build step: deduplicate() keeping just the merged rows. build_parquet and build_aggregates
+    run it on the combined daily records, so an incident scraped twice is counted once on
+    the dashboards. Also usable as a runner frame stage ("dedup.dedup_frame") on canonical rows
+    """
+    deduped, _ = deduplicate(df, **rules)
+    return deduped
+
+
+def main():
+    threshold = float(sys.argv[1]) if len(sys.argv) > 1 else RULES['threshold']
+    df = daily_data.load_daily()
+
+    start = time.perf_counter()
+    deduped, labels = deduplicate(df, threshold=threshold)
+    elapsed = time.perf_counter() - start
+
+    exact = len(df) - len(df.drop_duplicates())
+    sizes = np.bincount(labels)
+    print(f"{len(df)} rows -> {len(deduped)} in {elapsed:.2f}s: {len(df) - len(deduped)} rows merged "
+          f"into {int((sizes > 1).sum())} clusters ({exact} rows are exact duplicates)")
+    clustered = df.loc[sizes[labels] > 1, 'university'].value_counts()
+    for university, count in clustered[clustered > 0].items():
+        print(f"  {university}: {count} rows in clusters")
+
+
+if __name__ == "__main__":
+    main()
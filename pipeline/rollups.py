@@ -0,0 +1,245 @@
+import hashlib
+import json
+import os
+import time
+import numpy as np
+import daily_data
+import schema
+from build_aggregates import UNKNOWN, dollar_amount
+
+'''
+Incrementally maintained rollups of the daily CSVs. For each source file there is a rollup
+(counts by incident type, day, hour and location, dollar totals per type) and a checkpoint:
+how many bytes and rows of the file it covers, a hash of those bytes, the encoding and the
+header. On refresh, a file that has only grown has just the appended bytes parsed and merged
+in. The file is only reread in full when it is new, was rewritten (e.g. append_to_daily
+updating a case in place), changed its header, or ROLLUP_VERSION changed.
+
+    data/rollups/daily/<university>.json
+
+Usage: python rollups.py
+'''
+
+ROLLUP_DIR = os.path.join(daily_data.ROOT, "data", "rollups", "daily")
+# Bump when normalization or the rollup fields change; every file is then rebuilt
+ROLLUP_VERSION = 1
+ROLLUP_FIELDS = ['types', 'days', 'hours', 'locations', 'dollars']
+
+QUOTE = ord('"')
+NEWLINES = (ord('\n'), ord('\r'))
+
+
+def _line_breaks(data, start=0):
+    """Positions (relative to start) of line breaks outside quoted cells, and whether the end is quoted"""
+    chunk = np.frombuffer(data, dtype=np.uint8, offset=start)
+    unquoted = np.cumsum(chunk == QUOTE) % 2 == 0
+    breaks = np.flatnonzero(((chunk == NEWLINES[0]) | (chunk == NEWLINES[1])) & unquoted)
+    return breaks, len(chunk) > 0 and not unquoted[-1]
+
+
+def record_end(data, start=0):
+    """
+    Offset just past the last complete record in data[start:], where start is a record
+    boundary. Line breaks inside quoted cells don't end a record; the end of the data does,
+    unless it falls inside quotes (a row still being written).
+    """
+    breaks, open_quote = _line_breaks(data, start)
+    if not open_quote:
+        return len(data)
+    return start + int(breaks[-1]) + 1 if len(breaks) else start
+
+
+def header_end(data):
+    """Offset just past the header line, which can have quoted line breaks ("Date of\nBirth")"""
+    breaks, _ = _line_breaks(data)
+    if not len(breaks):
+        return len(data)
+    end = int(breaks[0])
+    return end + 2 if data[end:end + 2] == b'\r\n' else end + 1
+
+
+def _sha1(data):
+    return hashlib.sha1(data).hexdigest()
+
+
+def empty_rollup():
+    rollup = {field: {} for field in ROLLUP_FIELDS}
+    rollup['records'] = 0
+    return rollup
+
+
+def rollup_rows(df):
+    """Rollup of canonical rows from daily_data.normalize"""
+    types = df['incident_type'].astype(object).fillna(UNKNOWN)
+    occurred = df['occurred']
+    timed = occurred.notna() & df['occurred_has_time'].astype(bool)
+    type_counts = types.value_counts()
+
+    rollup = {
+        'records': int(len(df)),
+        'types': {str(key): int(count) for key, count in type_counts.items()},
+        'days': {str(key): int(count) for key, count in
+                 occurred.dropna().dt.strftime('%Y-%m-%d').value_counts().items()},
+        'hours': {str(int(key)): int(count) for key, count in occurred[timed].dt.hour.value_counts().items()},
+        'locations': {str(key): int(count) for key, count in
+                      df['location'].astype(object).fillna(UNKNOWN).value_counts().items()},
+        'dollars': {},
+    }
+    for incident_type, count in type_counts.items():
+        amount = dollar_amount(incident_type) if '$' in incident_type else None
+        if amount is not None:
+            rollup['dollars'][incident_type] = round(amount * int(count), 2)
+    return rollup
+
+
+def merge(rollup, delta):
+    """Add delta's counts into rollup, in place"""
+    rollup['records'] += delta['records']
+    for field in ROLLUP_FIELDS:
+        counts = rollup[field]
+        for key, value in delta[field].items():
+            counts[key] = counts.get(key, 0) + value
+        if field == 'dollars':
+            for key in delta[field]:
+                counts[key] = round(counts[key], 2)
+    return rollup
+
+
+def rollup_path(output_dir, university):
+    return os.path.join(output_dir, f"{university}.json")
+
+
+def load_state(university, output_dir=ROLLUP_DIR):
+    path = rollup_path(output_dir, university)
+    if not os.path.exists(path):
+        return None
+    with open(path, encoding='utf-8') as f:
+        return json.load(f)
+
+
+def save_state(university, state, output_dir=ROLLUP_DIR):
+    path = rollup_path(output_dir, university)
+    with open(path + ".tmp", 'w', encoding='utf-8') as f:
+        json.dump(state, f, ensure_ascii=False, separators=(',', ':'))
+    os.replace(path + ".tmp", path)
+
+
+def _parse(text, university):
+    """Canonical rows of CSV text (header included), and how many raw rows there were"""
+    raw = daily_data.parse_raw(text)
+    mapping = schema.map_headers(raw.columns)['mapping']
+    return daily_data.normalize(raw, university, mapping), len(raw)
+
+
+def rebuild_reason(checkpoint, data, header, version):
+    """Why the checkpoint can't be extended, or None if only new bytes need reading"""
+    if checkpoint is None:
+        return "new"
+    if checkpoint['version'] != version:
+        return "version changed"
+    if checkpoint['header'] != _sha1(header):
+        return "header changed"
+    if len(data) < checkpoint['bytes'] or _sha1(data[:checkpoint['bytes']]) != checkpoint['hash']:
+        return "rewritten"
+    return None
+
+
+def read_since(path, checkpoint, version):
+    """
+    Canonical rows of a daily CSV that checkpoint doesn't cover yet.
+
+    Args:
+        checkpoint: from an earlier call, or None to read the whole file
+        version: the caller's format version; a checkpoint with another one is discarded
+
+    Returns:
+        (action, rows or None, raw rows parsed, new checkpoint): action is "unchanged",
+        "appended" (rows are just the new ones) or "rebuilt (<reason>)" (rows are all of them)
+    """
+    university = daily_data.university_name(path)
+    with open(path, 'rb') as f:
+        data = f.read()
+    header = data[:header_end(data)]
+    reason = rebuild_reason(checkpoint, data, header, version)
+
+    if reason is None:
+        start = checkpoint['bytes']
+        end = record_end(data, start)
+        if end == start:
+            return "unchanged", None, 0, checkpoint
+        try:
+            body = data[start:end].decode('utf-8' if checkpoint['encoding'] == 'utf-8-sig' else checkpoint['encoding'])
+        except UnicodeDecodeError:
+            reason = "encoding changed"
+        else:
+            header_text = header.decode(checkpoint['encoding']).rstrip('\r\n')
+            df, rows = _parse(header_text + '\n' + body, university) if body.strip() else (None, 0)
+            checkpoint = dict(checkpoint, bytes=end, rows=checkpoint['rows'] + rows, hash=_sha1(data[:end]))
+            return "appended", df, rows, checkpoint
+
+    end = record_end(data, 0)
+    text, encoding = daily_data.decode(data[:end])
+    df, rows = _parse(text, university)
+    checkpoint = {'version': version, 'bytes': end, 'rows': rows, 'hash': _sha1(data[:end]),
+                  'encoding': encoding, 'header': _sha1(header)}
+    return f"rebuilt ({reason})", df, rows, checkpoint
+
+
+def refresh_file(path, output_dir=ROLLUP_DIR):
+    """
+    Bring one file's rollup up to date.
+
+    Returns:
+        (action, rows parsed): action is "unchanged", "appended" or "rebuilt (<reason>)"
+    """
+    university = daily_data.university_name(path)
+    state = load_state(university, output_dir)
+    action, df, rows, checkpoint = read_since(path, state and state['checkpoint'], ROLLUP_VERSION)
+    if action == "unchanged":
+        return action, rows
+    if action != "appended":
+        state = {'rollup': empty_rollup()}
+    if df is not None:
+        merge(state['rollup'], rollup_rows(df))
+    state['checkpoint'] = checkpoint
+    save_state(university, state, output_dir)
+    return action, rows
+
+
+def refresh(paths=None, output_dir=ROLLUP_DIR):
+    """Refresh the rollups of every daily CSV and drop those of deleted files. Returns {university: (action, rows)}"""
+    paths = daily_data.daily_files() if paths is None else paths
+    os.makedirs(output_dir, exist_ok=True)
+    results = {daily_data.university_name(path): refresh_file(path, output_dir) for path in paths}
+
+    for name in os.listdir(output_dir):
+        university, extension = os.path.splitext(name)
+        if extension == '.json' and university not in results:
+            os.remove(os.path.join(output_dir, name))
+            results[university] = ("removed", 0)
+    return results
+
+
+def combined(output_dir=ROLLUP_DIR):
+    """All sources' rollups added together"""
+    total = empty_rollup()
+    for name in sorted(os.listdir(output_dir)):
+        if name.endswith('.json'):
+            merge(total, load_state(os.path.splitext(name)[0], output_dir)['rollup'])
+    return total
+
+
+def main():
+    start = time.perf_counter()
+    results = refresh()
+    elapsed = time.perf_counter() - start
+
+    for university, (action, rows) in sorted(results.items()):
+        if action != "unchanged":
+            print(f"  {university}: {action}, {rows} rows parsed")
+    parsed = sum(rows for _, rows in results.values())
+    print(f"Refreshed {len(results)} rollups in {elapsed:.2f}s ({parsed} rows parsed)")
+
+
+if __name__ == "__main__":
+    main()
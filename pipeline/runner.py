@@ -0,0 +1,328 @@
+import glob
+import hashlib
+import inspect
+import json
+import os
+import shutil
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+import pandas as pd
+import pyarrow as pa
+from pyarrow import feather
+import daily_data
+import schema
+from build_manifest import HASH_LENGTH, content_hash
+from stages import StageError, resolve
+
+'''
+Runs each university's chain of scrape, extract, clean and normalize stages, then the
+data builds, re-executing only what changed. A university's stages are declared in
+recipes/<University>.json:
+
+    {"stages": [
+        {"name": "combine", "function": "clean_two_rows.combine_rows", "inputs": ["data/raw/UCBerkley.csv"]},
+        {"name": "clean", "function": "reformatting_clean.clean_crime_log"},
+        {"name": "normalize", "function": "stages.normalize", "config": {"rename": {"Case": "Case #"}}}
+    ]}
+
+A stage calls function(*input files, output file, **config); functions are looked up in
+pipeline/, cleaning/ and webscrape/, so the existing cleaning scripts work as stages as they
+are, and stages.py has the generic ones (fetching, extracting, per-value cleaners,
+normalizing). Inputs are earlier stages or files relative to the repository root, the
+previous stage if not given; a recipe whose raw file hasn't been dropped in data/raw yet is
+skipped. Every output is cached in data/stages/<University>/ under a key hashing the
+contents of its inputs, the source of the function's module and its config, so like make a
+stage only runs when one of those changed, and a stage whose rerun produces the same bytes
+doesn't rerun the ones after it. Stages marked "volatile" (fetchers) run every time.
+
+Stages marked "frame" call function(*input DataFrames, **config) and return a DataFrame
+instead (stages.normalize_frame, virginiatech_clean.clean_dataframe, ...). A chain of them
+is handed from one to the next in memory rather than written to CSV and parsed again
+between every step, and their keys chain on the previous stage's key instead of its
+output's contents. A frame stage's output is only written at a cache boundary: the last
+stage (CSV, for publishing), one read by a file stage (CSV) or one marked "cache" (a
+Feather file, which keeps the column types and is memory-mapped when read back). When a
+boundary is already cached, the in-memory stages before it don't run at all.
+
+The last stage's output is published to data/daily/<University>.csv (unless the recipe has
+"publish": false, for scrapers that merge into it themselves). All recipes run in this one
+process, or in JOBS forked workers that inherit its imports, rather than an interpreter
+start per script; when any daily file changed, the Parquet dataset, aggregate bundles and
+manifest are rebuilt.
+
+Usage: python runner.py [University ...]   (all recipes by default)
+'''
+
+RECIPE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "recipes")
+STAGE_DIR = os.path.join(daily_data.ROOT, "data", "stages")
+BUILD_STATE = "build.json"
+# Where stage functions are imported from, besides pipeline/ itself
+STAGE_FOLDERS = ['cleaning', 'webscrape']
+JOBS = os.cpu_count() or 1
+
+for folder in STAGE_FOLDERS:
+    if os.path.join(daily_data.ROOT, folder) not in sys.path:
+        sys.path.append(os.path.join(daily_data.ROOT, folder))
+
+
+def recipe_path(university, recipe_dir=RECIPE_DIR):
+    return os.path.join(recipe_dir, f"{university}.json")
+
+
+def load_recipe(path):
+    """
+    A recipe with defaults filled in: every stage has inputs, config, suffix, volatile, frame
+    and cache, and spill, whether its output gets written
+    """
+    with open(path, encoding='utf-8') as f:
+        recipe = json.load(f)
+    recipe.setdefault('university', os.path.splitext(os.path.basename(path))[0])
+    names = set()
+    for position, stage in enumerate(recipe['stages']):
+        if stage['name'] in names:
+            raise StageError(f"{recipe['university']}: stage {stage['name']!r} is declared twice")
+        previous = [recipe['stages'][position - 1]['name']] if position else []
+        stage.setdefault('inputs', previous)
+        stage.setdefault('config', {})
+        stage.setdefault('volatile', False)
+        stage.setdefault('frame', False)
+        stage.setdefault('cache', False)
+        names.add(stage['name'])
+
+    for position, stage in enumerate(recipe['stages']):
+        # Written as CSV when published or read by a file stage, as Feather when only kept for caching
+        as_csv = position == len(recipe['stages']) - 1 or any(
+            stage['name'] in other['inputs'] and not other['frame'] for other in recipe['stages'])
+        stage['spill'] = not stage['frame'] or as_csv or stage['cache'] or stage['volatile']
+        stage.setdefault('suffix', '.csv' if not stage['frame'] or as_csv else '.arrow')
+    return recipe
+
+
+def stage_key(stage, input_hashes):
+    """Cache key of a stage: its function, that function's module source, its config and its inputs"""
+    source = inspect.getsourcefile(resolve(stage['function']))
+    key = json.dumps({'function': stage['function'], 'code': content_hash(source),
+                      'config': stage['config'], 'inputs': input_hashes}, sort_keys=True)
+    return hashlib.sha256(key.encode('utf-8')).hexdigest()[:HASH_LENGTH]
+
+
+def _remove_stale(folder, stage, keep):
+    for path in glob.glob(os.path.join(folder, f"{stage['name']}-{'[0-9a-f]' * HASH_LENGTH}{stage['suffix']}")):
+        if path != keep:
+            os.remove(path)
+
+
+def run_stage(stage, inputs, output):
+    """Call the stage function, writing to a temporary file that replaces output once it succeeds"""
+    root, suffix = os.path.splitext(output)
+    temp_file = f"{root}.tmp{suffix}"
+    if os.path.exists(temp_file):
+        os.remove(temp_file)
+    result = resolve(stage['function'])(*inputs, temp_file, **stage['config'])
+    # Several cleaning scripts report failure by returning False (or None without writing anything)
+    if result is False or not os.path.exists(temp_file):
+        raise StageError(f"{stage['name']}: {stage['function']} did not produce an output")
+    os.replace(temp_file, output)
+
+
+def read_frame(path):
+    """A stage output or raw file as a DataFrame; Feather files are memory-mapped"""
+    if path.endswith('.arrow'):
+        return feather.read_table(path, memory_map=True).to_pandas()
+    return daily_data.read_raw(path)
+
+
+def write_frame(df, output):
+    root, suffix = os.path.splitext(output)
+    temp_file = f"{root}.tmp{suffix}"
+    if suffix == '.arrow':
+        # Uncompressed, so reading it back maps the file instead of decompressing it
+        feather.write_feather(df.reset_index(drop=True), temp_file, compression='uncompressed')
+    else:
+        df.to_csv(temp_file, index=False)
+    os.replace(temp_file, output)
+
+
+def run_frame_stage(stage, frames):
+    """Call a frame stage function on its input DataFrames"""
+    result = resolve(stage['function'])(*frames, **stage['config'])
+    if isinstance(result, pa.Table):
+        result = result.to_pandas()
+    if not isinstance(result, pd.DataFrame):
+        raise StageError(f"{stage['name']}: {stage['function']} did not return a DataFrame")
+    return result
+
+
+def publish(source, university, daily_dir=daily_data.DAILY_DIR):
+    """Copy a final output to the daily folder if it differs. Returns whether it did"""
+    target = os.path.join(daily_dir, f"{university}.csv")
+    if os.path.exists(target) and content_hash(target) == content_hash(source):
+        return False
+    temp_file = target + ".tmp"
+    shutil.copyfile(source, temp_file)
+    os.replace(temp_file, target)
+    return True
+
+
+def run_recipe(path, stage_dir=STAGE_DIR, daily_dir=daily_data.DAILY_DIR):
+    """
+    Bring one university's stages up to date.
+
+    Returns:
+        {'university', 'stages': [(name, 'ran' or 'cached', seconds)], 'published': bool,
+         'missing': input files that don't exist (nothing is run then)}
+    """
+    recipe = load_recipe(path)
+    university = recipe['university']
+    folder = os.path.join(stage_dir, university)
+    outputs = {}
+    stage_names = {stage['name'] for stage in recipe['stages']}
+    missing = [name for stage in recipe['stages'] for name in stage['inputs']
+               if name not in stage_names and not os.path.exists(os.path.join(daily_data.ROOT, name))]
+    if missing:
+        return {'university': university, 'stages': [], 'published': False, 'missing': missing}
+    os.makedirs(folder, exist_ok=True)
+    # pending: frame stages kept in memory, run only if a stage after them has to run
+    frames, pending, keys, statuses = {}, {}, {}, {}
+    readers = {name: sum(name in stage['inputs'] for stage in recipe['stages']) for name in stage_names}
+
+    def path_of(name):
+        return outputs[name] if name in outputs else os.path.normpath(os.path.join(daily_data.ROOT, name))
+
+    def identity(name):
+        """What an input contributes to a cache key"""
+        return keys[name] if name in keys and name not in outputs else content_hash(path_of(name))
+
+    def frame(name):
+        if name not in frames and name in pending:
+            stage = pending.pop(name)
+            inputs = [frame(input_name) for input_name in stage['inputs']]
+            start = time.perf_counter()
+            frames[name] = run_frame_stage(stage, inputs)
+            statuses[name] = ('ran', time.perf_counter() - start)
+        if name not in frames:
+            return read_frame(path_of(name))
+        # Stage functions may modify their input in place (reformatting_clean renames columns)
+        return frames[name].copy() if readers[name] > 1 else frames[name]
+
+    for stage in recipe['stages']:
+        keys[stage['name']] = key = stage_key(stage, [identity(name) for name in stage['inputs']])
+        if not stage['spill']:
+            pending[stage['name']] = stage
+            statuses[stage['name']] = ('cached', 0.0)
+            continue
+        output = os.path.join(folder, f"{stage['name']}-{key}{stage['suffix']}")
+
+        start = time.perf_counter()
+        if stage['volatile'] or not os.path.exists(output):
+            try:
+                if stage['frame']:
+                    inputs = [frame(name) for name in stage['inputs']]
+                    start = time.perf_counter()
+                    frames[stage['name']] = run_frame_stage(stage, inputs)
+                    write_frame(frames[stage['name']], output)
+                else:
+                    run_stage(stage, [path_of(name) for name in stage['inputs']], output)
+            except StageError as e:
+                raise StageError(f"{university}/{e}") from None
+            status = 'ran'
+        else:
+            status = 'cached'
+        _remove_stale(folder, stage, output)
+        outputs[stage['name']] = output
+        statuses[stage['name']] = (status, time.perf_counter() - start)
+
+    report = [(stage['name'], *statuses[stage['name']]) for stage in recipe['stages']]
+    published = recipe.get('publish', True) and publish(outputs[recipe['stages'][-1]['name']], university, daily_dir)
+    return {'university': university, 'stages': report, 'published': published, 'missing': []}
+
+
+def build_key(daily_dir=daily_data.DAILY_DIR):
+    """Hash of every daily file and the build code"""
+    import build_aggregates
+    import build_manifest
+    import build_parquet
+
+    parts = {os.path.basename(path): content_hash(path) for path in daily_data.daily_files(daily_dir)}
+    for module in (build_parquet, build_aggregates, build_manifest, daily_data, schema):
+        parts[module.__name__] = content_hash(module.__file__)
+    return hashlib.sha256(json.dumps(parts, sort_keys=True).encode('utf-8')).hexdigest()[:HASH_LENGTH]
+
+
+def build(stage_dir=STAGE_DIR):
+    """Rebuild the Parquet dataset, aggregate bundles and manifest unless the daily files are unchanged"""
+    import build_aggregates
+    import build_manifest
+    import build_parquet
+
+    state_file = os.path.join(stage_dir, BUILD_STATE)
+    key = build_key()
+    if os.path.exists(state_file):
+        with open(state_file, encoding='utf-8') as f:
+            if json.load(f).get('key') == key:
+                return False
+    build_parquet.build()
+    build_aggregates.build()
+    build_manifest.write_manifest(build_manifest.build_manifest())
+    os.makedirs(stage_dir, exist_ok=True)
+    with open(state_file, 'w', encoding='utf-8') as f:
+        json.dump({'key': key}, f)
+    return True
+
+
+def run(paths, jobs=JOBS, stage_dir=STAGE_DIR, daily_dir=daily_data.DAILY_DIR):
+    """
+    Run recipes in this process (jobs=1) or a pool of forked workers, one university per task.
+
+    Returns:
+        (reports of the universities that succeeded, {university: error} for those that failed)
+    """
+    reports, errors = [], {}
+    if jobs == 1 or len(paths) == 1:
+        for path in paths:
+            try:
+                reports.append(run_recipe(path, stage_dir, daily_dir))
+            except Exception as e:
+                errors[os.path.splitext(os.path.basename(path))[0]] = e
+        return reports, errors
+
+    with ProcessPoolExecutor(max_workers=min(jobs, len(paths))) as pool:
+        futures = {pool.submit(run_recipe, path, stage_dir, daily_dir): path for path in paths}
+        for future, path in futures.items():
+            try:
+                reports.append(future.result())
+            except Exception as e:
+                errors[os.path.splitext(os.path.basename(path))[0]] = e
+    return reports, errors
+
+
+def main():
+    paths = [recipe_path(university) for university in sys.argv[1:]] or sorted(
+        glob.glob(os.path.join(RECIPE_DIR, "*.json")))
+    start = time.perf_counter()
+    reports, errors = run(paths)
+
+    for report in reports:
+        if report['missing']:
+            print(f"  {report['university']}: no input ({', '.join(report['missing'])})")
+            continue
+        stages = ', '.join(f"{name} {status}" + (f" {seconds:.2f}s" if status == 'ran' else '')
+                           for name, status, seconds in report['stages'])
+        print(f"  {report['university']}: {stages}" + (" -> published" if report['published'] else ""))
+    for university, error in errors.items():
+        print(f"  {university}: FAILED {error}")
+    try:
+        print("Rebuilt Parquet, aggregates and manifest" if build() else "Builds are up to date")
+    except daily_data.MemoryBudgetError as e:
+        errors['build'] = e
+        print(f"  build: FAILED {e}")
+    skipped = sum(bool(report['missing']) for report in reports)
+    print(f"Ran {len(paths) - skipped} recipes in {time.perf_counter() - start:.2f}s, {len(errors)} failed, "
+          f"{skipped} without input")
+    if errors:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
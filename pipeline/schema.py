@@ -0,0 +1,184 @@
+import difflib
+import hashlib
+import json
+import os
+import re
+
+'''
+Schema registry for the daily CSVs. Maps each file's header row onto the canonical columns:
+exact matches against the alias table first, then fuzzy matching for spellings that haven't
+been seen before (e.g. "Data/Time Reported"). A mapping is computed once per distinct header
+row and cached by its signature, so loading the same file again is a dictionary lookup.
+
+Files are flagged for manual review when a required column is missing, a header was only
+matched fuzzily, or a header is neither an alias nor a known extra column.
+
+Usage: python schema.py    (prints the mapping for every daily file and the review list)
+'''
+
+CACHE_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "schema_cache.json")
+FUZZY_CUTOFF = 0.85
+
+# Raw headers for each canonical column, in priority order. When a file has more than one
+# (e.g. UCLA has both Case # and Event #), the first non-empty value in a row is used.
+ALIASES = {
+    'case_number': ['Case Number', 'Case #', 'Case#', 'Ca Number', 'Case_Number', 'Report #',
+                    'Report Number', 'Incident #', 'Incident Number', 'UCPDI#', 'Incident',
+                    'Event #'],
+    'incident_type': ['Incident Type', 'Crime Type', 'Nature', 'Offense'],
+    'occurred': ['Date/Time Occurred', 'Occurred Range', 'Date Occurred'],
+    'reported': ['Date/Time Reported', 'Data/Time Reported', 'Report Date', 'Date Reported',
+                 'Report_Date'],
+    'location': ['Location', 'General Location', 'Street Address', 'Address'],
+    'disposition': ['Disposition', 'CaseDisposition', 'Status'],
+    'campus': ['Campus'],
+    'narrative': ['Summary', 'Narrative', 'Comments / Nature of Fire', 'Description', 'Comments'],
+}
+
+# A file must have all of these (occurred or reported counts as having a date)
+REQUIRED = [('case_number',), ('incident_type',), ('occurred', 'reported')]
+
+# Columns some sources carry that have no canonical equivalent; these don't need review
+KNOWN_EXTRA = [
+    'Date', 'Time Reported', 'Date/Time Occurred to', 'Date/Time Occured To', 'Dates are:',
+    'Street Name', 'Cross Street', 'Offense Class', 'OffenseCode', 'LocationCode', 'PatrolZone',
+    'LocationDirectional', 'LocationStreet', 'LocationLatitude', 'LocationLongitude', 'Arrestee',
+    'Date of Birth', 'Student', 'Agency', 'Subtype', '# Incidents', 'Log Date', 'Date Entered',
+    'Disposition Change', 'Final_Incident',
+]
+
+BLANK_HEADER = re.compile(r'^(unnamed: \d+)?$')
+
+
+def header_key(header):
+    """Comparable form of a header: lowercase, single spaces, no pandas ".1" duplicate suffix"""
+    key = re.sub(r'\.\d+$', '', str(header))
+    key = key.replace('_', ' ').replace('\n', ' ')
+    return re.sub(r'\s+', ' ', key).strip().lower()
+
+
+_ALIAS_INDEX = {header_key(alias): (canonical, priority)
+                for canonical, aliases in ALIASES.items()
+                for priority, alias in enumerate(aliases)}
+_KNOWN_EXTRA = {header_key(header) for header in KNOWN_EXTRA}
+_VERSION = hashlib.sha1(json.dumps([ALIASES, KNOWN_EXTRA, FUZZY_CUTOFF]).encode('utf-8')).hexdigest()[:12]
+
+_cache = None
+
+
+def header_signature(columns):
+    return hashlib.sha1("\x1f".join(str(col) for col in columns).encode('utf-8')).hexdigest()
+
+
+def _load_cache():
+    global _cache
+    if _cache is None:
+        _cache = {}
+        if os.path.exists(CACHE_FILE):
+            with open(CACHE_FILE, encoding='utf-8') as f:
+                stored = json.load(f)
+            # A changed alias table invalidates every stored mapping
+            if stored.get('version') == _VERSION:
+                _cache = stored['mappings']
+    return _cache
+
+
+def _save_cache():
+    temp_file = CACHE_FILE + ".tmp"
+    with open(temp_file, 'w', encoding='utf-8') as f:
+        json.dump({'version': _VERSION, 'mappings': _cache}, f, indent=1, sort_keys=True)
+    os.replace(temp_file, CACHE_FILE)
+
+
+def match_headers(columns):
+    """
+    Work out the canonical mapping for a header row (uncached).
+
+    Returns:
+        dict with
+        - mapping: {canonical column: [raw headers in priority order]}
+        - fuzzy: {raw header: [canonical column, similarity]} for headers matched fuzzily
+        - unmapped: raw headers that matched nothing
+        - missing: required canonical columns that no header maps to
+    """
+    matches = {canonical: [] for canonical in ALIASES}
+    fuzzy, unmapped = {}, []
+    alias_keys = list(_ALIAS_INDEX)
+
+    for position, column in enumerate(columns):
+        key = header_key(column)
+        if BLANK_HEADER.match(key) or key in _KNOWN_EXTRA:
+            continue
+        if key in _ALIAS_INDEX:
+            canonical, priority = _ALIAS_INDEX[key]
+            # Duplicated headers ("Case Number.1") rank after the original
+            matches[canonical].append((priority, position, column))
+            continue
+
+        close = difflib.get_close_matches(key, alias_keys, n=1, cutoff=FUZZY_CUTOFF)
+        if close:
+            canonical, _ = _ALIAS_INDEX[close[0]]
+            score = difflib.SequenceMatcher(None, key, close[0]).ratio()
+            matches[canonical].append((len(ALIASES[canonical]), position, column))
+            fuzzy[column] = [canonical, round(score, 3)]
+        else:
+            unmapped.append(column)
+
+    mapping = {canonical: [column for _, _, column in sorted(found)] for canonical, found in matches.items()}
+    missing = [" or ".join(group) for group in REQUIRED if not any(mapping[canonical] for canonical in group)]
+    return {'mapping': mapping, 'fuzzy': fuzzy, 'unmapped': unmapped, 'missing': missing}
+
+
+def map_headers(columns):
+    """Cached match_headers: computed once per distinct header row"""
+    columns = [str(col) for col in columns]
+    cache = _load_cache()
+    signature = header_signature(columns)
+    if signature not in cache:
+        cache[signature] = match_headers(columns)
+        _save_cache()
+    return cache[signature]
+
+
+def needs_review(result):
+    """Reasons a file's mapping should be checked by hand (empty if it's fine)"""
+    reasons = []
+    if result['missing']:
+        reasons.append("missing " + ", ".join(result['missing']))
+    for column, (canonical, score) in result['fuzzy'].items():
+        reasons.append(f"fuzzy match {column!r} -> {canonical} ({score:.2f})")
+    if result['unmapped']:
+        reasons.append("unmapped " + ", ".join(repr(column) for column in result['unmapped']))
+    return reasons
+
+
+def review_report(paths=None):
+    """{university: [reasons]} for every daily file whose mapping needs a look"""
+    import daily_data
+
+    report = {}
+    for path in daily_data.daily_files() if paths is None else paths:
+        reasons = needs_review(map_headers(daily_data.read_raw(path).columns))
+        if reasons:
+            report[daily_data.university_name(path)] = reasons
+    return report
+
+
+def main():
+    import daily_data
+
+    for path in daily_data.daily_files():
+        result = map_headers(daily_data.read_raw(path).columns)
+        mapped = {canonical: headers for canonical, headers in result['mapping'].items() if headers}
+        print(f"{daily_data.university_name(path)}: {mapped}")
+
+    report = review_report()
+    print(f"\n{len(report)} files need manual review")
+    for university, reasons in report.items():
+        print(f"- {university}")
+        for reason in reasons:
+            print(f"    {reason}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,288 @@
+import asyncio
+import json
+import mimetypes
+import os
+import sys
+import time
+from collections import OrderedDict
+from urllib.parse import parse_qs, unquote, urlsplit
+import numpy as np
+import pandas as pd
+import daily_data
+
+'''
+Local server for the dashboards, replacing `python -m http.server`. Serves the static site
+(the dashboard pages at the repo root, js/ and data/, nothing else) and answers aggregate
+queries from every daily record, normalized and loaded into memory once as NumPy arrays:
+
+    /aggregate?university=UCLA&type=Burglary&start=2025-01-01&end=2025-03-31&groupby=hour
+    /meta
+
+university and type can be repeated to select several; start and end are inclusive dates.
+groupby is one of GROUPS (leave it out for just the count). Each query is a boolean mask per
+filter and one bincount/unique for the grouping. Responses are cached in an LRU keyed by
+the normalized query, so the same filters in a different order or spelling hit the cache.
+
+Usage: python serve.py [port]
+'''
+
+HOST = "127.0.0.1"
+PORT = 8000
+CACHE_SIZE = 1024
+MAX_HEADER_BYTES = 64 * 1024
+DAY_NS = 86_400 * 10**9
+WEEKDAYS = ['Monday', 'Tuesday', 'Wednesday', 'Thursday', 'Friday', 'Saturday', 'Sunday']
+GROUPS = ['hour', 'weekday', 'day', 'month', 'university', 'type', 'location', 'disposition', 'campus']
+FACTOR_GROUPS = {'university': 'university', 'type': 'incident_type', 'location': 'location',
+                 'disposition': 'disposition', 'campus': 'campus'}
+
+# What the static site is made of, relative to the repo root; everything else is 404
+STATIC_DIRS = ['js', 'data']
+STATIC_SUFFIXES = ['.html']
+
+STATUS_TEXT = {200: 'OK', 400: 'Bad Request', 403: 'Forbidden', 404: 'Not Found', 405: 'Method Not Allowed',
+               500: 'Internal Server Error'}
+
+
+class QueryError(ValueError):
+    pass
+
+
+class Records:
+    """Canonical daily records as flat arrays, with categorical columns as integer codes"""
+
+    def __init__(self, df):
+        self.size = len(df)
+        self.codes = {}
+        self.labels = {}
+        for group, column in FACTOR_GROUPS.items():
+            codes, labels = pd.factorize(df[column].astype(object), sort=True)
+            self.codes[group] = codes
+            self.labels[group] = [str(label) for label in labels]
+        self.index = {group: {label: i for i, label in enumerate(labels)} for group, labels in self.labels.items()}
+
+        occurred = df['occurred'].to_numpy(dtype='datetime64[ns]')
+        self.dated = ~np.isnat(occurred)
+        self.timed = self.dated & df['occurred_has_time'].to_numpy(dtype=bool)
+        self.occurred = occurred.view('int64')
+        self.day = np.where(self.dated, self.occurred // DAY_NS, 0)
+        self.hour = (self.occurred // (3600 * 10**9)) % 24
+        self.weekday = (self.day + 3) % 7     # Monday is 0; 1970-01-01 was a Thursday
+        self.month = occurred.astype('datetime64[M]').view('int64')
+        self.first_day = self._day_label(self.day[self.dated].min()) if self.dated.any() else None
+        self.last_day = self._day_label(self.day[self.dated].max()) if self.dated.any() else None
+
+    @staticmethod
+    def _day_label(day):
+        return str(np.datetime64(int(day), 'D'))
+
+    def mask(self, universities, types, start, end):
+        mask = np.ones(self.size, dtype=bool)
+        for group, values in (('university', universities), ('type', types)):
+            if values:
+                wanted = [self.index[group][value] for value in values if value in self.index[group]]
+                mask &= np.isin(self.codes[group], wanted)
+        if start is not None:
+            mask &= self.dated & (self.day >= start)
+        if end is not None:
+            mask &= self.dated & (self.day <= end)
+        return mask
+
+    def group(self, mask, groupby):
+        if groupby in FACTOR_GROUPS:
+            codes = self.codes[groupby][mask]
+            counts = np.bincount(codes[codes >= 0], minlength=len(self.labels[groupby]))
+            labels = self.labels[groupby]
+            return {labels[i]: int(counts[i]) for i in np.argsort(-counts, kind='stable') if counts[i]}
+        if groupby == 'hour':
+            counts = np.bincount(self.hour[mask & self.timed], minlength=24)
+            return {str(hour): int(count) for hour, count in enumerate(counts)}
+        if groupby == 'weekday':
+            counts = np.bincount(self.weekday[mask & self.dated], minlength=7)
+            return {name: int(count) for name, count in zip(WEEKDAYS, counts)}
+        values = (self.day if groupby == 'day' else self.month)[mask & self.dated]
+        keys, counts = np.unique(values, return_counts=True)
+        unit = 'D' if groupby == 'day' else 'M'
+        return {str(np.datetime64(int(key), unit)): int(count) for key, count in zip(keys, counts)}
+
+
+def _parse_day(value, name):
+    try:
+        ts = pd.Timestamp(value)
+    except (ValueError, TypeError):
+        raise QueryError(f"{name} is not a date: {value!r}")
+    # 'nan', 'NaT' and the like parse as NaT
+    if pd.isna(ts):
+        raise QueryError(f"{name} is not a date: {value!r}")
+    return int(ts.normalize().value // DAY_NS)
+
+
+def normalize_query(params):
+    """
+    Canonical, hashable form of the /aggregate query string, used as the cache key.
+
+    Raises:
+        QueryError: unknown parameter, groupby or date
+    """
+    unknown = set(params) - {'university', 'type', 'start', 'end', 'groupby'}
+    if unknown:
+        raise QueryError(f"Unknown parameter(s): {', '.join(sorted(unknown))}")
+
+    def values(name):
+        return tuple(sorted({value.strip() for value in params.get(name, []) if value.strip()}))
+
+    groupby = (params.get('groupby') or [''])[-1].strip().lower() or None
+    if groupby is not None and groupby not in GROUPS:
+        raise QueryError(f"groupby must be one of {', '.join(GROUPS)}")
+    start = _parse_day(params['start'][-1], 'start') if params.get('start', [''])[-1] else None
+    end = _parse_day(params['end'][-1], 'end') if params.get('end', [''])[-1] else None
+    return values('university'), values('type'), start, end, groupby
+
+
+class AggregateCache:
+    """Least recently used cache of encoded responses"""
+
+    def __init__(self, records, size=CACHE_SIZE):
+        self.records = records
+        self.size = size
+        self.entries = OrderedDict()
+        self.hits = self.misses = 0
+
+    def get(self, query):
+        if query in self.entries:
+            self.hits += 1
+            self.entries.move_to_end(query)
+            return self.entries[query]
+        self.misses += 1
+        body = self.compute(query)
+        if self.size:
+            self.entries[query] = body
+            if len(self.entries) > self.size:
+                self.entries.popitem(last=False)
+        return body
+
+    def compute(self, query):
+        universities, types, start, end, groupby = query
+        mask = self.records.mask(universities, types, start, end)
+        result = {
+            'query': {'university': list(universities), 'type': list(types),
+                      'start': None if start is None else Records._day_label(start),
+                      'end': None if end is None else Records._day_label(end), 'groupby': groupby},
+            'records': int(mask.sum()),
+        }
+        if groupby:
+            result['groups'] = self.records.group(mask, groupby)
+        return json.dumps(result, separators=(',', ':')).encode('utf-8')
+
+
+class Server:
+    def __init__(self, records, root=daily_data.ROOT, cache_size=CACHE_SIZE):
+        self.records = records
+        self.root = os.path.realpath(root)
+        self.cache = AggregateCache(records, cache_size)
+        self.meta = json.dumps({
+            'records': records.size,
+            'first_day': records.first_day,
+            'last_day': records.last_day,
+            'universities': records.labels['university'],
+            'types': records.labels['type'],
+            'groupby': GROUPS,
+        }, separators=(',', ':')).encode('utf-8')
+
+    def route(self, method, target):
+        """(status, content type, body) for a request"""
+        if method not in ('GET', 'HEAD'):
+            return 405, 'text/plain', b'Only GET and HEAD are supported\n'
+        url = urlsplit(target)
+        if url.path == '/aggregate':
+            try:
+                query = normalize_query(parse_qs(url.query, keep_blank_values=True))
+            except QueryError as e:
+                return 400, 'application/json', json.dumps({'error': str(e)}).encode('utf-8')
+            return 200, 'application/json', self.cache.get(query)
+        if url.path == '/meta':
+            return 200, 'application/json', self.meta
+        return self.static(unquote(url.path))
+
+    def static(self, path):
+        full = os.path.realpath(os.path.join(self.root, path.lstrip('/')))
+        if full != self.root and not full.startswith(self.root + os.sep):
+            return 403, 'text/plain', b'Forbidden\n'
+        if os.path.isdir(full):
+            full = os.path.join(full, 'index.html')
+        parts = os.path.relpath(full, self.root).split(os.sep)
+        published = (parts[0] in STATIC_DIRS if len(parts) > 1
+                     else os.path.splitext(parts[0])[1] in STATIC_SUFFIXES)
+        if not published or any(part.startswith('.') for part in parts) or not os.path.isfile(full):
+            return 404, 'text/plain', b'Not found\n'
+        with open(full, 'rb') as f:
+            body = f.read()
+        return 200, mimetypes.guess_type(full)[0] or 'application/octet-stream', body
+
+    async def handle(self, reader, writer):
+        """One connection; keeps it open for further requests unless the client asks to close"""
+        try:
+            while True:
+                try:
+                    head = await reader.readuntil(b'\r\n\r\n')
+                except (asyncio.IncompleteReadError, asyncio.LimitOverrunError, ConnectionError):
+                    break
+                lines = head.decode('latin-1').split('\r\n')
+                try:
+                    method, target, version = lines[0].split(' ', 2)
+                except ValueError:
+                    status, content_type, body, method, version = 400, 'text/plain', b'Bad request\n', 'GET', 'HTTP/1.0'
+                else:
+                    try:
+                        status, content_type, body = self.route(method, target)
+                    except Exception as e:
+                        print(f"Error handling {method} {target}: {e!r}", file=sys.stderr)
+                        status, content_type, body = 500, 'text/plain', b'Internal server error\n'
+
+                headers = {}
+                for line in lines[1:]:
+                    name, _, value = line.partition(':')
+                    headers[name.strip().lower()] = value.strip().lower()
+                keep_alive = (headers.get('connection') != 'close' if version == 'HTTP/1.1'
+                              else headers.get('connection') == 'keep-alive')
+
+                writer.write((
+                    f"HTTP/1.1 {status} {STATUS_TEXT[status]}\r\n"
+                    f"Content-Type: {content_type}\r\n"
+                    f"Content-Length: {len(body)}\r\n"
+                    f"Connection: {'keep-alive' if keep_alive else 'close'}\r\n\r\n"
+                ).encode('latin-1'))
+                if method != 'HEAD':
+                    writer.write(body)
+                await writer.drain()
+                if not keep_alive:
+                    break
+        finally:
+            writer.close()
+
+
+def load_records():
+    return Records(daily_data.load_daily())
+
+
+async def serve(port=PORT, host=HOST, cache_size=CACHE_SIZE):
+    start = time.perf_counter()
+    server = Server(load_records(), cache_size=cache_size)
+    print(f"Loaded {server.records.size} records in {time.perf_counter() - start:.2f}s")
+
+    listener = await asyncio.start_server(server.handle, host, port, limit=MAX_HEADER_BYTES)
+    print(f"Serving {server.root} on http://{host}:{port}/")
+    async with listener:
+        await listener.serve_forever()
+
+
+def main():
+    port = int(sys.argv[1]) if len(sys.argv) > 1 else PORT
+    try:
+        asyncio.run(serve(port))
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
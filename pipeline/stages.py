@@ -0,0 +1,136 @@
+import csv
+import importlib
+import os
+import shutil
+import pandas as pd
+import daily_data
+import schema
+
+'''
+Generic stages for runner.py recipes, for the steps that the cleaning and scraping scripts
+don't already provide as a function(input file, output file) call: fetching, extracting
+records with a scraper's own read/parse/write functions, applying a per-value cleaner such as
+capitalize.correct_capitalization to some columns, and normalizing to the daily format.
+The last two also come as frame stages (map_values_frame, normalize_frame) that take and
+return a DataFrame, for chains the runner keeps in memory. Functions they take as config are
+named like stages, 'module.function':
+
+    {"name": "extract", "function": "stages.extract", "inputs": ["data/raw/TempleUniversity.pdf"],
+     "config": {"read": "temple_scraper.extract_text_from_pdf", "parse": "temple_scraper.parse_crime_log",
+                "write": "temple_scraper.write_to_csv"}}
+    {"name": "capitalize", "function": "stages.map_values",
+     "config": {"function": "capitalize.correct_capitalization", "columns": ["Location"]}}
+'''
+
+WEBSCRAPE_DIR = os.path.join(daily_data.ROOT, "webscrape")
+
+
+class StageError(Exception):
+    pass
+
+
+def resolve(name):
+    """The function for 'module.function'"""
+    module, _, function = name.rpartition('.')
+    if not module:
+        raise StageError(f"Stage function {name!r} should be module.function")
+    return getattr(importlib.import_module(module), function)
+
+
+def download(output_file, url):
+    """Fetcher: save a URL's content (retried and rate limited by webscrape/fetch.py)"""
+    import requests
+    from fetch import fetch
+
+    response = fetch(requests, url)
+    if response.status_code != 200:
+        raise StageError(f"download: HTTP {response.status_code} for {url}")
+    with open(output_file, 'wb') as f:
+        f.write(response.content)
+
+
+def scrape(output_file, function, university, **kwargs):
+    """
+    Fetcher for the scrapers that merge new rows into data/daily themselves (ucsd_scraper,
+    php_scraper, ...): run it from webscrape/, where it keeps its checkpoints and journals,
+    and output the daily file it updated.
+    """
+    cwd = os.getcwd()
+    os.chdir(WEBSCRAPE_DIR)
+    try:
+        resolve(function)(**kwargs)
+    finally:
+        os.chdir(cwd)
+    shutil.copyfile(os.path.join(daily_data.DAILY_DIR, f"{university}.csv"), output_file)
+
+
+def _write_records(records, output_file):
+    fieldnames = list(dict.fromkeys(key for record in records for key in record))
+    with open(output_file, 'w', newline='', encoding='utf-8') as f:
+        writer = csv.DictWriter(f, fieldnames=fieldnames)
+        writer.writeheader()
+        writer.writerows(records)
+
+
+def extract(input_file, output_file, parse, read=None, write=None):
+    """
+    Extractor: records = parse(read(input_file)), or parse(input_file) without read, written
+    with write(records, output_file) or as a CSV with the records' keys as header.
+    """
+    records = resolve(parse)(resolve(read)(input_file) if read else input_file)
+    if not records:
+        raise StageError(f"extract: {parse} found no records in {input_file}")
+    if write:
+        return resolve(write)(records, output_file)
+    _write_records(records, output_file)
+
+
+def generate(output_file, function, write):
+    """Extractor without an input file: write(function(), output_file)"""
+    return resolve(write)(resolve(function)(), output_file)
+
+
+def excel_to_csv(input_file, output_file, sheet_name=0):
+    pd.read_excel(input_file, sheet_name=sheet_name, dtype=str).to_csv(output_file, index=False)
+
+
+def map_values_frame(df, function, columns=None):
+    """Apply a per-value cleaner (text -> text) to columns, all of them by default"""
+    function = resolve(function)
+    missing = [column for column in columns or [] if column not in df.columns]
+    if missing:
+        raise StageError(f"map_values: no column {', '.join(missing)} in {list(df.columns)}")
+    df = df.copy()
+    for column in columns or df.columns:
+        df[column] = df[column].map(function)
+    return df
+
+
+def map_values(input_file, output_file, function, columns=None):
+    """map_values_frame from one CSV to another"""
+    map_values_frame(daily_data.read_raw(input_file), function, columns).to_csv(output_file, index=False)
+
+
+def normalize_frame(df, rename=None, columns=None, drop=None, allow_missing=None):
+    """
+    Normalizer: rename headers to the daily format, keep and order columns, and check that
+    the result maps onto the canonical schema before it gets published.
+
+    Args:
+        rename: {header: daily header}
+        columns: daily columns to keep, in order (all by default)
+        drop: columns to remove
+        allow_missing: required canonical columns the source doesn't have (e.g. ["case_number"])
+    """
+    df = df.rename(columns=rename or {}).drop(columns=drop or [], errors='ignore')
+    if columns is not None:
+        df = df[columns]
+    missing = [group for group in schema.match_headers(df.columns)['missing'] if group not in (allow_missing or [])]
+    if missing:
+        raise StageError(f"normalize: output would be missing {', '.join(missing)} (headers: {list(df.columns)})")
+    return df
+
+
+def normalize(input_file, output_file, rename=None, columns=None, drop=None, allow_missing=None):
+    """normalize_frame from one CSV to another"""
+    normalize_frame(daily_data.read_raw(input_file), rename, columns, drop, allow_missing).to_csv(output_file, index=False)
@@ -0,0 +1,419 @@
+import json
+import os
+import re
+import sys
+import time
+import numpy as np
+import pandas as pd
+import daily_data
+from rollups import read_since
+
+'''
+Inverted index over the free-text columns of the daily records: location and narrative
+(NYU's Summary, Northeastern's Narrative, UChicago's Comments / Nature of Fire, South
+Carolina's Description; see schema.py). Text is lowercased, split into words and stemmed
+(stem() below: plurals, -ed, -ing, -ly and a final e), and every term keeps the rows it
+occurs in and its word positions there, so queries answer without scanning any text:
+
+    index = TextIndex()
+    index.search('bike*', universities=['UCLA'], start='2025-01-01')   # prefix
+    index.search('"parking lot" stolen')                              # phrase AND term
+
+A query is whitespace-separated clauses that must all match: a term, a "quoted phrase"
+(its words consecutive in the same column) or a prefix ending in *. Results are
+{university: row numbers}, rows of daily_data.load_file() for that university.
+
+Each university has its own segments, data/text_index/daily/<university>.<n>.npz, holding
+the sorted terms and CSR postings: row ids and positions delta-encoded (gaps, not absolute
+values) and compressed. <university>.json has the segment list and a rollups.py style
+checkpoint, so rows appended to a CSV go into a new small segment; once there are more than
+MAX_SEGMENTS they are merged into one. A rewritten file is reindexed.
+
+Usage: python text_index.py [query]
+'''
+
+INDEX_DIR = os.path.join(daily_data.ROOT, "data", "text_index", "daily")
+# Bump when tokenizing, stemming or the segment format change; every file is then reindexed
+INDEX_VERSION = 1
+TEXT_COLUMNS = ['location', 'narrative']
+MAX_SEGMENTS = 8
+NO_TIME = np.iinfo(np.int64).min
+
+WORD = re.compile(r"[a-z0-9]+(?:'[a-z]+)?")
+CLAUSE = re.compile(r'"([^"]*)"|(\S+)')
+VOWELS = set('aeiouy')
+
+
+def stem(word):
+    """
+    Light suffix-stripping stemmer, so "bicycles", "bicycle" and "bicycling" share "bicycl".
+    Only strips when a vowel is left in a stem of 3+ letters.
+    """
+    if len(word) <= 3 or word.isdigit():
+        return word
+    if word.endswith("'s"):
+        word = word[:-2]
+    if word.endswith('ies') and len(word) > 4:
+        word = word[:-3] + 'y'
+    elif word.endswith('sses'):
+        word = word[:-2]
+    elif word.endswith('s') and not word.endswith(('ss', 'us', 'is')):
+        word = word[:-1]
+    for suffix in ('ing', 'ed', 'ly'):
+        base = word[:-len(suffix)]
+        if word.endswith(suffix) and len(base) >= 3 and VOWELS & set(base):
+            word = base
+            # stopped -> stop, but falling -> fall
+            if len(word) > 3 and word[-1] == word[-2] and word[-1] not in 'lsz' + ''.join(VOWELS):
+                word = word[:-1]
+            break
+    if word.endswith('e') and len(word) > 4:
+        word = word[:-1]
+    return word
+
+
+def tokenize(text):
+    """Stemmed terms of text, in order"""
+    return [stem(word) for word in WORD.findall(text.lower())]
+
+
+def parse_query(query):
+    """[(kind, terms)] with kind "term", "phrase" or "prefix"; prefixes are lowercased, not stemmed"""
+    clauses = []
+    for phrase, word in CLAUSE.findall(query):
+        if phrase:
+            terms = tokenize(phrase)
+            if terms:
+                clauses.append(("phrase" if len(terms) > 1 else "term", terms))
+        elif word.endswith('*') and WORD.fullmatch(word[:-1].lower()):
+            clauses.append(("prefix", [word[:-1].lower()]))
+        else:
+            clauses.extend(("term", [term]) for term in tokenize(word))
+    return clauses
+
+
+def _smallest(values):
+    """values (non-negative) in the smallest unsigned dtype that holds them"""
+    largest = int(values.max()) if len(values) else 0
+    return values.astype(next(t for t in (np.uint8, np.uint16, np.uint32, np.uint64) if largest <= np.iinfo(t).max))
+
+
+def encode_runs(values, offsets):
+    """
+    Delta-encode values, ascending within each run [offsets[i], offsets[i + 1]): every value
+    becomes the gap from the previous one in its run, the first of a run stays absolute
+    """
+    gaps = values.copy()
+    gaps[1:] -= values[:-1]
+    starts = offsets[:-1][np.diff(offsets) > 0]
+    gaps[starts] = values[starts]
+    return _smallest(gaps)
+
+
+def decode_runs(gaps, offsets):
+    """Inverse of encode_runs"""
+    total = np.cumsum(gaps, dtype=np.int64)
+    lengths = np.diff(offsets)
+    starts = offsets[:-1][lengths > 0]
+    return total - np.repeat(total[starts] - gaps[starts], lengths[lengths > 0])
+
+
+def postings(df, first_row=0):
+    """{term: {row: [positions]}} of canonical rows numbered from first_row"""
+    result = {}
+    columns = [df[column].astype(object).where(df[column].notna(), '').tolist() for column in TEXT_COLUMNS]
+    for offset, texts in enumerate(zip(*columns)):
+        position = 0
+        for text in texts:
+            for term in tokenize(text):
+                result.setdefault(term, {}).setdefault(first_row + offset, []).append(position)
+                position += 1
+            position += 1   # phrases don't run from one column into the next
+    return result
+
+
+class Segment:
+    """Postings of a contiguous range of one university's rows"""
+
+    def __init__(self, terms, term_offsets, rows, position_offsets, positions, times, first_row):
+        self.terms = terms                        # sorted
+        self.term_offsets = term_offsets          # term i's postings are [term_offsets[i], term_offsets[i + 1])
+        self.rows = rows                          # row of each posting, ascending per term
+        self.position_offsets = position_offsets  # posting j's positions are [position_offsets[j], ...[j + 1])
+        self.positions = positions                # ascending per posting
+        self.times = times                        # occurred of each row, epoch ns, NO_TIME if missing
+        self.first_row = first_row
+
+    @classmethod
+    def build(cls, index, times, first_row):
+        """From postings() and the occurred times of rows first_row, first_row + 1, ..."""
+        terms = sorted(index)
+        term_offsets = np.zeros(len(terms) + 1, dtype=np.int64)
+        rows, counts, positions = [], [], []
+        for i, term in enumerate(terms):
+            by_row = index[term]
+            term_offsets[i + 1] = term_offsets[i] + len(by_row)
+            for row in sorted(by_row):
+                rows.append(row)
+                counts.append(len(by_row[row]))
+                positions.extend(by_row[row])
+        position_offsets = np.zeros(len(counts) + 1, dtype=np.int64)
+        np.cumsum(counts, out=position_offsets[1:])
+        return cls(np.array(terms, dtype=str), term_offsets, np.array(rows, dtype=np.int64), position_offsets,
+                   np.array(positions, dtype=np.int64), np.asarray(times, dtype=np.int64), first_row)
+
+    def save(self, path):
+        temp_file = path + ".tmp.npz"
+        np.savez_compressed(temp_file, terms=self.terms, term_counts=_smallest(np.diff(self.term_offsets)),
+                            rows=encode_runs(self.rows, self.term_offsets),
+                            position_counts=_smallest(np.diff(self.position_offsets)),
+                            positions=encode_runs(self.positions, self.position_offsets),
+                            times=self.times, first_row=np.array(self.first_row))
+        os.replace(temp_file, path)
+
+    @classmethod
+    def load(cls, path):
+        with np.load(path) as data:
+            term_offsets = np.concatenate([[0], np.cumsum(data['term_counts'], dtype=np.int64)])
+            position_offsets = np.concatenate([[0], np.cumsum(data['position_counts'], dtype=np.int64)])
+            return cls(data['terms'], term_offsets, decode_runs(data['rows'], term_offsets), position_offsets,
+                       decode_runs(data['positions'], position_offsets), data['times'], int(data['first_row']))
+
+    def to_postings(self):
+        """Back to the postings() dict, for merging segments"""
+        result = {}
+        for i, term in enumerate(self.terms.tolist()):
+            by_row = result[term] = {}
+            for j in range(self.term_offsets[i], self.term_offsets[i + 1]):
+                by_row[int(self.rows[j])] = self.positions[self.position_offsets[j]:self.position_offsets[j + 1]].tolist()
+        return result
+
+    def _term_range(self, term, prefix=False):
+        lo = np.searchsorted(self.terms, term, 'left')
+        hi = np.searchsorted(self.terms, term + '\uffff', 'left') if prefix else \
+            lo + int(lo < len(self.terms) and self.terms[lo] == term)
+        return lo, hi
+
+    def matches(self, kind, terms):
+        """Rows matching one parse_query() clause, ascending"""
+        if kind == "prefix":
+            lo, hi = self._term_range(terms[0], prefix=True)
+            return np.unique(self.rows[self.term_offsets[lo]:self.term_offsets[hi]])
+        lo, hi = self._term_range(terms[0])
+        if kind == "term" or lo == hi:
+            return self.rows[self.term_offsets[lo]:self.term_offsets[hi]]
+
+        # Phrase: rows with every word, then a start position p where word k is at p + k
+        ranges = [self._term_range(term) for term in terms]
+        if any(lo == hi for lo, hi in ranges):
+            return np.zeros(0, dtype=np.int64)
+        postings = [np.arange(self.term_offsets[lo], self.term_offsets[hi]) for lo, hi in ranges]
+        candidates = self.rows[postings[0]]
+        for posting in postings[1:]:
+            candidates = np.intersect1d(candidates, self.rows[posting], assume_unique=True)
+        found = []
+        for row in candidates:
+            starts = None
+            for k, posting in enumerate(postings):
+                j = posting[np.searchsorted(self.rows[posting], row)]
+                shifted = self.positions[self.position_offsets[j]:self.position_offsets[j + 1]] - k
+                starts = shifted if starts is None else np.intersect1d(starts, shifted, assume_unique=True)
+                if not len(starts):
+                    break
+            if len(starts):
+                found.append(row)
+        return np.array(found, dtype=np.int64)
+
+    def search(self, clauses, start=None, end=None):
+        """Rows matching every clause, occurred in [start, end) (epoch ns, None for open)"""
+        rows = None
+        for kind, terms in clauses:
+            found = self.matches(kind, terms)
+            rows = found if rows is None else np.intersect1d(rows, found, assume_unique=True)
+            if not len(rows):
+                break
+        if rows is None:
+            return np.zeros(0, dtype=np.int64)
+        if start is not None or end is not None:
+            times = self.times[rows - self.first_row]
+            keep = times != NO_TIME
+            if start is not None:
+                keep &= times >= start
+            if end is not None:
+                keep &= times < end
+            rows = rows[keep]
+        return rows
+
+
+def _times(df):
+    occurred = df['occurred'].to_numpy(dtype='datetime64[ns]')
+    return np.where(np.isnat(occurred), NO_TIME, occurred.view(np.int64))
+
+
+def state_path(output_dir, university):
+    return os.path.join(output_dir, f"{university}.json")
+
+
+def segment_path(output_dir, name):
+    return os.path.join(output_dir, name)
+
+
+def load_state(university, output_dir=INDEX_DIR):
+    path = state_path(output_dir, university)
+    if not os.path.exists(path):
+        return None
+    with open(path, encoding='utf-8') as f:
+        return json.load(f)
+
+
+def save_state(university, state, output_dir=INDEX_DIR):
+    path = state_path(output_dir, university)
+    with open(path + ".tmp", 'w', encoding='utf-8') as f:
+        json.dump(state, f, indent=1)
+    os.replace(path + ".tmp", path)
+
+
+def _write_segment(university, state, segment, output_dir):
+    state['next_segment'] = state.get('next_segment', 0) + 1
+    name = f"{university}.{state['next_segment']}.npz"
+    segment.save(segment_path(output_dir, name))
+    state['segments'].append(name)
+
+
+def _remove_segments(names, output_dir):
+    for name in names:
+        if os.path.exists(segment_path(output_dir, name)):
+            os.remove(segment_path(output_dir, name))
+
+
+def merge_segments(university, state, output_dir=INDEX_DIR):
+    """Replace a university's segments with one holding all their postings"""
+    old = state['segments']
+    segments = [Segment.load(segment_path(output_dir, name)) for name in old]
+    merged = {}
+    for segment in segments:
+        for term, by_row in segment.to_postings().items():
+            merged.setdefault(term, {}).update(by_row)
+    state['segments'] = []
+    _write_segment(university, state, Segment.build(merged, np.concatenate([s.times for s in segments]), 0), output_dir)
+    save_state(university, state, output_dir)
+    _remove_segments(old, output_dir)
+
+
+def refresh_file(path, output_dir=INDEX_DIR):
+    """
+    Bring one file's index up to date: new rows go into a new segment, a rewritten file is
+    reindexed into one.
+
+    Returns:
+        (action, rows parsed) as in rollups.read_since()
+    """
+    university = daily_data.university_name(path)
+    state = load_state(university, output_dir)
+    action, df, rows, checkpoint = read_since(path, state and state['checkpoint'], INDEX_VERSION)
+    if action == "unchanged":
+        return action, rows
+
+    stale = []
+    if action != "appended":
+        stale = state['segments'] if state else []
+        state = {'segments': [], 'rows': 0, 'next_segment': state['next_segment'] if state else 0}
+    if df is not None and len(df):
+        segment = Segment.build(postings(df, state['rows']), _times(df), state['rows'])
+        _write_segment(university, state, segment, output_dir)
+        state['rows'] += len(df)
+    state['checkpoint'] = checkpoint
+    save_state(university, state, output_dir)
+    _remove_segments(stale, output_dir)
+
+    if len(state['segments']) > MAX_SEGMENTS:
+        merge_segments(university, state, output_dir)
+    return action, rows
+
+
+def refresh(paths=None, output_dir=INDEX_DIR):
+    """Refresh the index of every daily CSV and drop those of deleted files. Returns {university: (action, rows)}"""
+    paths = daily_data.daily_files() if paths is None else paths
+    os.makedirs(output_dir, exist_ok=True)
+    results = {daily_data.university_name(path): refresh_file(path, output_dir) for path in paths}
+
+    for name in os.listdir(output_dir):
+        university, extension = os.path.splitext(name)
+        if extension == '.json' and university not in results:
+            _remove_segments(load_state(university, output_dir)['segments'], output_dir)
+            os.remove(os.path.join(output_dir, name))
+            results[university] = ("removed", 0)
+    return results
+
+
+class TextIndex:
+    """Read-only view of the index; a university's segments are loaded on first use"""
+
+    def __init__(self, output_dir=INDEX_DIR):
+        self.output_dir = output_dir
+        self.states = {os.path.splitext(name)[0]: None for name in os.listdir(output_dir) if name.endswith('.json')}
+        self._segments = {}
+
+    @property
+    def universities(self):
+        return sorted(self.states)
+
+    def segments(self, university):
+        if university not in self._segments:
+            state = load_state(university, self.output_dir)
+            self._segments[university] = [Segment.load(segment_path(self.output_dir, name))
+                                          for name in state['segments']]
+        return self._segments[university]
+
+    def search(self, query, universities=None, start=None, end=None):
+        """
+        Rows matching every clause of query (see parse_query) with occurred in [start, end).
+
+        Args:
+            universities: names to include, default all
+            start, end: anything pd.Timestamp accepts; None leaves that side open, and rows
+                without an occurred date only match when both are None
+
+        Returns:
+            {university: ascending row numbers} for universities with matches
+        """
+        clauses = parse_query(query)
+        if not clauses:
+            return {}
+        start = None if start is None else pd.Timestamp(start).value
+        end = None if end is None else pd.Timestamp(end).value
+        results = {}
+        for university in self.universities if universities is None else universities:
+            if university not in self.states:
+                continue
+            found = [segment.search(clauses, start, end) for segment in self.segments(university)]
+            rows = np.concatenate(found) if found else np.zeros(0, dtype=np.int64)
+            if len(rows):
+                results[university] = rows
+        return results
+
+    def count(self, query, universities=None, start=None, end=None):
+        return sum(len(rows) for rows in self.search(query, universities, start, end).values())
+
+
+def main():
+    start = time.perf_counter()
+    results = refresh()
+    elapsed = time.perf_counter() - start
+    parsed = sum(rows for _, rows in results.values())
+    size = sum(os.path.getsize(os.path.join(INDEX_DIR, name)) for name in os.listdir(INDEX_DIR)) / 1024
+    print(f"Refreshed {len(results)} indexes in {elapsed:.2f}s ({parsed} rows parsed, {size:.0f} KB)")
+
+    if len(sys.argv) > 1:
+        query = ' '.join(sys.argv[1:])
+        index = TextIndex()
+        start = time.perf_counter()
+        matches = index.search(query)
+        elapsed = (time.perf_counter() - start) * 1000
+        print(f"{query!r}: {sum(map(len, matches.values()))} rows in {elapsed:.1f} ms")
+        for university, rows in sorted(matches.items(), key=lambda item: -len(item[1])):
+            print(f"  {university}: {len(rows)}")
+
+
+if __name__ == "__main__":
+    main()
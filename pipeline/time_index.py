@@ -0,0 +1,151 @@
+import hashlib
+import os
+import time
+import numpy as np
+import pandas as pd
+import daily_data
+
+'''
+Sorted timestamp index over the combined daily records. Occurred times are kept as int64
+epoch nanoseconds, sorted within each university, with the permutation back to row ids in
+daily_data.load_daily() order. Selecting a date range is two searchsorted calls per
+university instead of parsing and comparing every record:
+
+    index = TimeIndex.for_daily()
+    rows = index.select('2025-01-01', '2025-02-01', universities=['UCLA'])
+    df.iloc[rows]
+
+The index is saved to data/time_index/daily.npz and rebuilt when any of the daily CSVs
+changes (name, size or modification time). Rows without an occurred date aren't indexed.
+
+Usage: python time_index.py
+'''
+
+INDEX_DIR = os.path.join(daily_data.ROOT, "data", "time_index")
+INDEX_FILE = os.path.join(INDEX_DIR, "daily.npz")
+
+
+def source_signature(paths):
+    """Changes whenever a daily CSV is added, removed or rewritten"""
+    digest = hashlib.sha1()
+    for path in paths:
+        stat = os.stat(path)
+        digest.update(f"{os.path.basename(path)}\0{stat.st_size}\0{stat.st_mtime_ns}\n".encode('utf-8'))
+    return digest.hexdigest()
+
+
+def _nanoseconds(value):
+    return None if value is None else pd.Timestamp(value).value
+
+
+class TimeIndex:
+    def __init__(self, universities, offsets, times, rows, signature=''):
+        self.universities = list(universities)
+        self.offsets = offsets      # university i is times[offsets[i]:offsets[i + 1]]
+        self.times = times          # int64 epoch ns, ascending within each university
+        self.rows = rows            # row id of each entry of times
+        self.signature = signature
+        self.position = {university: i for i, university in enumerate(self.universities)}
+
+    @classmethod
+    def build(cls, universities, occurred, signature=''):
+        """
+        Args:
+            universities: university of each row
+            occurred: datetime64 (or int64 epoch ns) of each row; NaT rows are skipped
+        """
+        codes, labels = pd.factorize(universities, sort=True)
+        occurred = np.asarray(occurred)
+        if occurred.dtype.kind == 'M':
+            dated = ~np.isnat(occurred)
+            times = occurred.astype('datetime64[ns]').view('int64')
+        else:
+            dated = np.ones(len(occurred), dtype=bool)
+            times = occurred.astype('int64')
+        rows = np.flatnonzero(dated & (codes >= 0))
+
+        # Group by university first (a radix sort on the small codes), then sort each
+        # university's times on their own; ~2x faster than one lexsort on both keys.
+        # Both sorts are stable, so equal times keep row order
+        codes = codes[rows].astype(np.int16) if len(labels) < 2**15 else codes[rows]
+        rows = rows[np.argsort(codes, kind='stable')]
+        offsets = np.searchsorted(np.sort(codes), np.arange(len(labels) + 1))
+        times = times[rows]
+        for lo, hi in zip(offsets[:-1], offsets[1:]):
+            order = np.argsort(times[lo:hi], kind='stable')
+            rows[lo:hi] = rows[lo:hi][order]
+            times[lo:hi] = times[lo:hi][order]
+        return cls(labels, offsets, times, rows, signature)
+
+    @classmethod
+    def from_frame(cls, df, signature=''):
+        return cls.build(df['university'], df['occurred'].to_numpy(dtype='datetime64[ns]'), signature)
+
+    def save(self, path=INDEX_FILE):
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        temp_file = path + ".tmp.npz"
+        np.savez(temp_file, universities=np.array(self.universities, dtype=str), offsets=self.offsets,
+                 times=self.times, rows=self.rows, signature=np.array(self.signature))
+        os.replace(temp_file, path)
+
+    @classmethod
+    def load(cls, path=INDEX_FILE):
+        with np.load(path) as data:
+            return cls(data['universities'].tolist(), data['offsets'], data['times'], data['rows'],
+                       str(data['signature']))
+
+    @classmethod
+    def for_daily(cls, path=INDEX_FILE):
+        """Index of the daily CSVs, loaded from path if it is up to date, otherwise rebuilt and saved"""
+        signature = source_signature(daily_data.daily_files())
+        if os.path.exists(path):
+            index = cls.load(path)
+            if index.signature == signature:
+                return index
+        index = cls.from_frame(daily_data.load_daily(), signature)
+        index.save(path)
+        return index
+
+    def __len__(self):
+        return len(self.times)
+
+    def span(self, university, start=None, end=None):
+        """(first, last) positions in times of university's entries in [start, end)"""
+        i = self.position[university]
+        lo, hi = self.offsets[i], self.offsets[i + 1]
+        segment = self.times[lo:hi]
+        first = lo if start is None else lo + np.searchsorted(segment, _nanoseconds(start), 'left')
+        last = hi if end is None else lo + np.searchsorted(segment, _nanoseconds(end), 'left')
+        return first, max(first, last)
+
+    def select(self, start=None, end=None, universities=None):
+        """
+        Row ids with occurred in [start, end), ordered by university then time.
+
+        Args:
+            start, end: anything pd.Timestamp accepts; None leaves that side open
+            universities: names to include, default all
+        """
+        universities = self.universities if universities is None else universities
+        spans = [self.span(u, start, end) for u in universities if u in self.position]
+        if not spans:
+            return np.zeros(0, dtype=self.rows.dtype)
+        return np.concatenate([self.rows[first:last] for first, last in spans])
+
+    def count(self, start=None, end=None, universities=None):
+        universities = self.universities if universities is None else universities
+        return int(sum(last - first for first, last in
+                       (self.span(u, start, end) for u in universities if u in self.position)))
+
+
+def main():
+    start = time.perf_counter()
+    index = TimeIndex.for_daily()
+    elapsed = time.perf_counter() - start
+    size = os.path.getsize(INDEX_FILE) / 1024
+    print(f"{len(index)} dated rows from {len(index.universities)} universities in {elapsed:.2f}s "
+          f"({INDEX_FILE}, {size:.0f} KB)")
+
+
+if __name__ == "__main__":
+    main()
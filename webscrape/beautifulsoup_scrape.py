@@ -2,8 +2,8 @@
 # -*- coding: utf-8 -*-
 
 import requests
-from bs4 import BeautifulSoup
 import csv
+from table_parse import find_table
 
 # Use for simple webpages
 
@@ -12,9 +12,7 @@ response = requests.get(url)
 
 # make sure request worked
 if response.status_code == 200:
-    soup = BeautifulSoup(response.content, 'html.parser')
-
-    crime_table = soup.find('table')
+    crime_table = find_table(response.content)
     if crime_table:
         rows = crime_table.find_all('tr')
 
@@ -0,0 +1,94 @@
+import contextlib
+import io
+import os
+import sys
+import tempfile
+import time
+import pdf_to_csv
+import temple_scraper
+import ucsd_scraper
+from seen_cases import SeenCases
+
+'''
+Benchmark for seen_cases.py: parse time of a re-scraped crime log with and without skipping
+cases that are already ingested. Synthetic text shaped like what each parser gets out of its
+PDFs is parsed once with seen=None and once with a SeenCases holding a share of its cases,
+for pdf_to_csv.parse_page_text, temple_scraper.parse_crime_log and
+ucsd_scraper.extract_incidents_from_text.
+
+Usage: python bench_seen_cases.py [cases] [share already ingested] [repeats]
+'''
+
+CASES_PER_PAGE = 40
+
+
+def pdf_to_csv_pages(cases):
+    lines = [f"{case} Theft Under $500 03/{i % 28 + 1:02d}/25 1430Hrs 03/{i % 28 + 1:02d}/25 1400Hrs - "
+             f"03/{i % 28 + 1:02d}/25 1415Hrs Parking Garage {i % 9} (CPN) Closed" for i, case in enumerate(cases)]
+    header = "Daily Crime Log\nIncident Nature Reported Occurred General Location Disposition\n"
+    return [header + '\n'.join(lines[i:i + CASES_PER_PAGE]) for i in range(0, len(lines), CASES_PER_PAGE)]
+
+
+def temple_text(cases):
+    blocks = [f"Date Reported: 3/{i % 28 + 1}/2025 - Monday at 14:30 Report #: {case}\n"
+              f"General Location: {1000 + i % 500} N Broad St\n"
+              f"Date Occurred From: 3/{i % 28 + 1}/2025 - Monday at 14:00\n"
+              f"Incident/Offenses: THEFT FROM BUILDING\nDisposition: ACTIVE\n" for i, case in enumerate(cases)]
+    return ''.join(blocks)
+
+
+def ucsd_pages(cases):
+    blocks = [f"Incident/Case# {case}\nDate Reported 3/{i % 28 + 1}/2025\nDate Occurred 3/{i % 28 + 1}/2025\n"
+              f"Time Occurred 2:30 PM\nSummary: Reporting party stated an unlocked bicycle was taken "
+              f"from the rack outside the building.\nDisposition: Report Taken\nTheft - Bicycle\n"
+              f"Geisel Library\n" for i, case in enumerate(cases)]
+    return [''.join(blocks[i:i + CASES_PER_PAGE]) for i in range(0, len(blocks), CASES_PER_PAGE)]
+
+
+def parse_pdf_to_csv(pages, seen):
+    return [record for page in pages for record in pdf_to_csv.parse_page_text(page, seen)]
+
+
+PARSERS = {
+    'pdf_to_csv': (lambda n: [f"25-{i:05d}" for i in range(n)], pdf_to_csv_pages, parse_pdf_to_csv),
+    'temple_scraper': (lambda n: [f"25-{i:06d}" for i in range(n)], temple_text, temple_scraper.parse_crime_log),
+    'ucsd_scraper': (lambda n: [f"2503{i:06d}" for i in range(n)], ucsd_pages,
+                     lambda pages, seen: ucsd_scraper.extract_incidents_from_text(pages, "March 1, 2025", seen)),
+}
+
+
+def best_time(parse, text, seen, repeats):
+    times, result = [], None
+    for _ in range(repeats):
+        start = time.perf_counter()
+        # temple_scraper prints a line per run
+        with contextlib.redirect_stdout(io.StringIO()):
+            result = parse(text, seen)
+        times.append(time.perf_counter() - start)
+    return min(times), len(result)
+
+
+def main():
+    cases = int(sys.argv[1]) if len(sys.argv) > 1 else 20_000
+    share = float(sys.argv[2]) if len(sys.argv) > 2 else 0.9
+    repeats = int(sys.argv[3]) if len(sys.argv) > 3 else 3
+
+    with tempfile.TemporaryDirectory() as folder:
+        for name, (make_cases, make_text, parse) in PARSERS.items():
+            numbers = make_cases(cases)
+            text = make_text(numbers)
+            seen = SeenCases(name, os.path.join(folder, "seen.sqlite"))
+            seen.add(numbers[:int(cases * share)])
+
+            full, full_count = best_time(parse, text, None, repeats)
+            seen.stats = dict.fromkeys(seen.stats, 0)
+            skipping, skip_count = best_time(parse, text, seen, repeats)
+            stats = {key: value // repeats for key, value in seen.stats.items()}
+            print(f"{name}: {full * 1000:.0f} ms for {full_count} records, {skipping * 1000:.0f} ms with "
+                  f"{share:.0%} already ingested ({skip_count} records, {full / skipping:.1f}x); lookups: "
+                  f"{stats['seen']} seen, {stats['new']} new, {stats['false_positives']} Bloom false positives")
+            seen.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,85 @@
+import glob
+import os
+import sys
+import time
+import tracemalloc
+from bs4 import BeautifulSoup
+from table_parse import PARSER, make_soup, read_table_columns
+
+'''
+Benchmark for table_parse.py. Compares, over saved crime log pages:
+- full html.parser tree (what the scrapers used to do)
+- SoupStrainer table-only tree (html.parser and lxml)
+- read_table_columns direct-to-columns path
+
+Usage: python bench_table_parse.py [folder of saved .html pages] [repeats]
+If no folder is given, a synthetic page shaped like a weekly crime log is used.
+'''
+
+
+def synthetic_page(n_rows=2000, n_days=7):
+    """Build a page with navigation/boilerplate around a few dated tables"""
+    nav = "<nav>" + "".join(f"<a href='/page{i}'>Link {i}</a>" for i in range(300)) + "</nav>"
+    parts = ["<html><head><title>Crime Log</title></head><body>", nav]
+    per_day = n_rows // n_days
+    for day in range(n_days):
+        parts.append(f"<h2>Monday, March {day + 1}, 2025</h2>")
+        parts.append("<table><tr><th>Nature</th><th>Case Number</th><th>Date/Time Occurred</th>"
+                     "<th>Date/Time Reported</th><th>General Location</th><th>Disposition</th></tr>")
+        for i in range(per_day):
+            parts.append(f"<tr><td>Theft Under $500</td><td>25-{day:02d}{i:04d}</td><td>3/{day + 1}/25 14:30</td>"
+                         f"<td>3/{day + 1}/25 15:00</td><td>Residence Hall {i % 40}</td><td>Closed</td></tr>")
+        parts.append("</table>")
+        parts.append("<div class='sidebar'>" + "<p>Campus safety notice.</p>" * 50 + "</div>")
+    parts.append("</body></html>")
+    return "".join(parts)
+
+
+def measure(func, markup, repeats):
+    """Return (best seconds, peak bytes) for func(markup)"""
+    best = float('inf')
+    for _ in range(repeats):
+        start = time.perf_counter()
+        func(markup)
+        best = min(best, time.perf_counter() - start)
+
+    tracemalloc.start()
+    func(markup)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return best, peak
+
+
+def main():
+    folder = sys.argv[1] if len(sys.argv) > 1 else None
+    repeats = int(sys.argv[2]) if len(sys.argv) > 2 else 5
+
+    pages = {}
+    if folder:
+        for path in sorted(glob.glob(os.path.join(folder, '*.htm*'))):
+            with open(path, 'rb') as f:
+                pages[os.path.basename(path)] = f.read()
+    if not pages:
+        print("No saved pages given, using a synthetic weekly log page")
+        pages['synthetic'] = synthetic_page().encode('utf-8')
+
+    methods = {
+        'full html.parser': lambda m: BeautifulSoup(m, 'html.parser').find_all('table'),
+        'strained html.parser': lambda m: make_soup(m, parser='html.parser').find_all('table'),
+        'direct to columns': read_table_columns,
+    }
+    if PARSER == 'lxml':
+        methods['strained lxml'] = lambda m: make_soup(m, parser='lxml').find_all('table')
+    else:
+        print("lxml is not installed, skipping the lxml run")
+
+    for name, markup in pages.items():
+        print(f"\n{name} ({len(markup) / 1024:.0f} KB)")
+        print(f"{'method':<24}{'best time (ms)':>16}{'peak memory (MB)':>20}")
+        for method, func in methods.items():
+            seconds, peak = measure(func, markup, repeats)
+            print(f"{method:<24}{seconds * 1000:>16.1f}{peak / 1024 / 1024:>20.2f}")
+
+
+if __name__ == "__main__":
+    main()
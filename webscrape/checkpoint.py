@@ -0,0 +1,84 @@
+import csv
+import json
+import sqlite3
+from datetime import datetime
+
+'''
+Checkpoint store for long scraper runs. Each completed unit of work (a date, a page offset,
+a monthly URL) is saved with its rows in a small SQLite file as soon as it finishes, so a
+crash only loses the unit in progress. On restart, units already in the store are skipped
+and the final CSV is assembled from the checkpoints.
+'''
+
+
+class CheckpointStore:
+    """Completed units and their rows, kept in SQLite so every save is atomic"""
+
+    def __init__(self, path):
+        self.path = path
+        self.conn = sqlite3.connect(path)
+        self.conn.execute("""
+            CREATE TABLE IF NOT EXISTS units (
+                seq INTEGER PRIMARY KEY AUTOINCREMENT,
+                unit TEXT UNIQUE NOT NULL,
+                rows TEXT NOT NULL,
+                completed TEXT NOT NULL
+            )""")
+        self.conn.execute("CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT NOT NULL)")
+        self.conn.commit()
+
+    def done(self):
+        """Set of units that have already been completed"""
+        return {row[0] for row in self.conn.execute("SELECT unit FROM units")}
+
+    def is_done(self, unit):
+        return self.conn.execute("SELECT 1 FROM units WHERE unit = ?", (str(unit),)).fetchone() is not None
+
+    def completed(self, unit):
+        """When a unit was last saved (a datetime), or None if it hasn't been"""
+        row = self.conn.execute("SELECT completed FROM units WHERE unit = ?", (str(unit),)).fetchone()
+        return datetime.fromisoformat(row[0]) if row else None
+
+    def save(self, unit, rows):
+        """Record a unit as completed along with its rows (dicts or lists)"""
+        with self.conn:
+            self.conn.execute(
+                "INSERT OR REPLACE INTO units (unit, rows, completed) VALUES (?, ?, ?)",
+                (str(unit), json.dumps(rows), datetime.now().isoformat(timespec='seconds')))
+
+    def rows(self, units=None):
+        """All checkpointed rows in the order their units were completed, optionally limited to some units"""
+        wanted = None if units is None else {str(unit) for unit in units}
+        for unit, rows in self.conn.execute("SELECT unit, rows FROM units ORDER BY seq"):
+            if wanted is None or unit in wanted:
+                yield from json.loads(rows)
+
+    def set_meta(self, key, value):
+        with self.conn:
+            self.conn.execute("INSERT OR REPLACE INTO meta (key, value) VALUES (?, ?)", (key, json.dumps(value)))
+
+    def get_meta(self, key, default=None):
+        row = self.conn.execute("SELECT value FROM meta WHERE key = ?", (key,)).fetchone()
+        return json.loads(row[0]) if row else default
+
+    def write_csv(self, output_file, fieldnames, units=None):
+        """Assemble the final CSV from the checkpoints. Returns the number of rows written."""
+        count = 0
+        with open(output_file, 'w', newline='', encoding='utf-8') as f:
+            writer = None
+            for row in self.rows(units):
+                if writer is None:
+                    if isinstance(row, dict):
+                        writer = csv.DictWriter(f, fieldnames=fieldnames, extrasaction='ignore')
+                        writer.writeheader()
+                    else:
+                        writer = csv.writer(f)
+                        writer.writerow(fieldnames)
+                writer.writerow(row)
+                count += 1
+            if writer is None:
+                csv.writer(f).writerow(fieldnames)
+        return count
+
+    def close(self):
+        self.conn.close()
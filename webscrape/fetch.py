@@ -0,0 +1,204 @@
+import json
+import os
+import random
+import threading
+import time
+from datetime import datetime
+import rate_limit
+
+'''
+Fetch wrapper for the scrapers: jittered exponential backoff on transient errors, a circuit
+breaker per host so a dead site isn't hammered, and a failed-URL journal so a follow-up run
+can retry only what failed instead of re-scraping everything.
+'''
+
+RETRIES = 4
+BACKOFF_BASE = 1.0          # seconds
+BACKOFF_CAP = 60.0
+RETRY_STATUSES = (429, 500, 502, 503, 504)
+FAILURE_THRESHOLD = 5       # consecutive failures before a host's breaker opens
+RESET_TIMEOUT = 120.0       # seconds an open breaker waits before letting a trial request through
+
+
+class FetchError(Exception):
+    """Raised when a URL could not be fetched after all retries"""
+
+
+class CircuitOpenError(FetchError):
+    """Raised when a host's circuit breaker is open and the request was not attempted"""
+
+
+def backoff_delay(attempt, base=BACKOFF_BASE, cap=BACKOFF_CAP):
+    """Full-jitter exponential backoff: a random delay in [0, min(cap, base * 2^attempt)]"""
+    return random.uniform(0, min(cap, base * 2 ** attempt))
+
+
+class CircuitBreaker:
+    """Closed -> open after too many consecutive failures -> half-open after a cool-down"""
+
+    def __init__(self, host, threshold=FAILURE_THRESHOLD, reset_timeout=RESET_TIMEOUT):
+        self.host = host
+        self.threshold = threshold
+        self.reset_timeout = reset_timeout
+        self.failures = 0
+        self.opened_at = None
+        self.trial_in_flight = False
+        self.lock = threading.Lock()
+
+    def allow(self):
+        """Whether a request may be sent right now"""
+        with self.lock:
+            if self.opened_at is None:
+                return True
+            # Half-open: once the cool-down has passed, a single trial request goes through and
+            # everything else waits for its outcome
+            if self.trial_in_flight or time.monotonic() - self.opened_at < self.reset_timeout:
+                return False
+            self.trial_in_flight = True
+            return True
+
+    def success(self):
+        with self.lock:
+            self.failures = 0
+            self.opened_at = None
+            self.trial_in_flight = False
+
+    def failure(self):
+        with self.lock:
+            self.failures += 1
+            self.trial_in_flight = False
+            if self.failures >= self.threshold:
+                # A failed trial opens it again for another cool-down
+                self.opened_at = time.monotonic()
+
+
+_breakers = {}
+_registry_lock = threading.Lock()
+
+
+def breaker_for(url):
+    """Return the shared circuit breaker for the host of url"""
+    host = rate_limit.host_of(url)
+    with _registry_lock:
+        if host not in _breakers:
+            _breakers[host] = CircuitBreaker(host)
+        return _breakers[host]
+
+
+class FailedJournal:
+    """
+    Append-only JSONL log of URLs that failed. A URL counts as pending until a later
+    success is recorded for it, so a follow-up run can call pending() and retry just those.
+    The file is read once; after that the pending URLs are kept in memory.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self._pending = None
+        self.lock = threading.Lock()
+
+    def _append(self, entry):
+        entry['time'] = datetime.now().isoformat(timespec='seconds')
+        with open(self.path, 'a', encoding='utf-8') as f:
+            f.write(json.dumps(entry) + "\n")
+
+    def record_failure(self, url, error, key=None):
+        entry = {'status': 'failed', 'url': url, 'key': key, 'error': str(error)}
+        with self.lock:
+            self._pending_urls()[url] = entry
+            self._append(entry)
+
+    def record_success(self, url):
+        with self.lock:
+            if self._pending_urls().pop(url, None) is not None:
+                self._append({'status': 'ok', 'url': url})
+
+    def _entries(self):
+        if not os.path.exists(self.path):
+            return []
+        entries = []
+        with open(self.path, encoding='utf-8') as f:
+            for line in f:
+                line = line.strip()
+                if line:
+                    try:
+                        entries.append(json.loads(line))
+                    except json.JSONDecodeError:
+                        continue  # a half-written last line from a crash
+        return entries
+
+    def _pending_urls(self):
+        if self._pending is None:
+            latest = {}
+            for entry in self._entries():
+                latest[entry['url']] = entry
+            self._pending = {url: entry for url, entry in latest.items() if entry['status'] == 'failed'}
+        return self._pending
+
+    def pending(self):
+        """Latest failure entry for every URL that has not succeeded since"""
+        with self.lock:
+            return list(self._pending_urls().values())
+
+
+def with_retries(func, url, retries=RETRIES, journal=None, key=None):
+    """
+    Call func() with backoff and the host's circuit breaker. Any exception counts as a
+    transient failure. Records the URL in the journal if it still fails at the end.
+
+    Returns:
+        Whatever func() returns
+    """
+    breaker = breaker_for(url)
+    last_error = None
+
+    for attempt in range(retries + 1):
+        if not breaker.allow():
+            last_error = CircuitOpenError(f"Circuit open for {breaker.host}, skipping {url}")
+            break
+        try:
+            result = func()
+        except Exception as e:
+            last_error = e
+            breaker.failure()
+            if attempt < retries:
+                delay = backoff_delay(attempt)
+                print(f"Attempt {attempt + 1} for {url} failed ({e}), retrying in {delay:.1f}s")
+                time.sleep(delay)
+            continue
+
+        breaker.success()
+        if journal is not None:
+            journal.record_success(url)
+        return result
+
+    if journal is not None:
+        journal.record_failure(url, last_error, key=key)
+    if isinstance(last_error, FetchError):
+        raise last_error
+    raise FetchError(f"Giving up on {url}: {last_error}") from last_error
+
+
+def fetch(client, url, retries=RETRIES, journal=None, key=None, **kwargs):
+    """
+    Rate-limited GET with retries. Retries on connection errors and on 429/5xx; other
+    responses (including 404) are returned as-is for the caller to handle.
+
+    Args:
+        client: the requests module or a Session
+        url: URL to fetch
+        retries: extra attempts after the first
+        journal: optional FailedJournal to record the URL in if it never succeeds
+        key: optional value stored with the journal entry (e.g. the date the URL is for)
+        **kwargs: passed through to client.get
+
+    Returns:
+        The response object
+    """
+    def attempt():
+        response = rate_limit.get(client, url, **kwargs)
+        if response.status_code in RETRY_STATUSES:
+            raise FetchError(f"HTTP {response.status_code}")
+        return response
+
+    return with_retries(attempt, url, retries=retries, journal=journal, key=key)
@@ -2,68 +2,115 @@ import re
 import csv
 import sys
 import argparse
+from datetime import date, datetime, timedelta
 from PyPDF2 import PdfReader
+from seen_cases import SeenCases
+from watermark import OVERLAP_DAYS, fetch_since
 
 '''
 Script that converts downloaded PDF files --> CSV files (must download these PDFs first). Used for:
 - Northeastern University
 - Texas A&M
 - UCDavis
+
+With --university, incidents already ingested for it (seen_cases.py) are skipped unless they
+were reported in the overlap window (see watermark.py), where the disposition may still change.
+Nothing is recorded here: cases enter the seen set when they are merged into data/daily.
 '''
 
-def extract_crime_data(pdf_path):
+def extract_crime_data(pdf_path, seen=None, refresh_from=None):
+    """
+    seen: optional seen_cases.SeenCases; records whose incident number it contains are skipped,
+    unless they were reported on or after refresh_from
+    """
     reader = PdfReader(pdf_path)
     all_records = []
 
     for page_num in range(len(reader.pages)):
         page = reader.pages[page_num]
-        text = page.extract_text()
+        all_records.extend(parse_page_text(page.extract_text(), seen, refresh_from))
 
-        lines = text.split('\n')
-        start_processing = False
+    return all_records
 
-        for line in lines:
-            if re.match(r'^(25-\d{5}|25RC\d{5})', line.strip()):
-                start_processing = True
 
-            if start_processing:
-                # Extract incident information using regex patterns (adjust as needed)
-                incident_match = re.match(r'^(25-\d{5}|25RC\d{5})\s+(.*?)\s+(\d{2}/\d{2}/\d{2}\s+\d{4}Hrs)(.*)$',
-                                          line.strip())
+def _reported_before(line, refresh_from):
+    """Whether the line's report date (its first MM/DD/YY) is before refresh_from"""
+    if refresh_from is None:
+        return True
+    match = re.search(r'\d{2}/\d{2}/\d{2}', line)
+    if not match:
+        return False
+    try:
+        return datetime.strptime(match.group(0), "%m/%d/%y").date() < refresh_from
+    except ValueError:
+        return False
 
-                if incident_match:
-                    incident_num = incident_match.group(1)
-                    nature = incident_match.group(2).strip()
-                    report_date = incident_match.group(3).strip()
 
-                    remaining = incident_match.group(4).strip()
+def parse_page_text(text, seen=None, refresh_from=None):
+    records = []
+    lines = text.split('\n')
+    start_processing = False
 
-                    # Pattern for occurrence date (adjust as needed)
-                    occurrence_pattern = r'(\d{2}/\d{2}/\d{2}\s+\d{4}Hrs\s+-\s*\d{2}/\d{2}/\d{2}\s+\d{4}Hrs|\d{2}/\d{2}/\d{2}\s+\d{4}Hrs)'
-                    occurrence_match = re.search(occurrence_pattern, remaining)
+    for line in lines:
+        case_start = re.match(r'^(25-\d{5}|25RC\d{5})', line.strip())
+        if case_start:
+            start_processing = True
+            # Already ingested: skip it before the full incident pattern runs
+            if seen is not None and case_start.group(1) in seen and _reported_before(line, refresh_from):
+                continue
 
-                    occurrence_date = ""
-                    if occurrence_match:
-                        occurrence_date = occurrence_match.group(1).strip()
-                        remaining = remaining.replace(occurrence_date, "", 1).strip()
+        if start_processing:
+            # Extract incident information using regex patterns (adjust as needed)
+            incident_match = re.match(r'^(25-\d{5}|25RC\d{5})\s+(.*?)\s+(\d{2}/\d{2}/\d{2}\s+\d{4}Hrs)(.*)$',
+                                      line.strip())
 
-                    parts = remaining.strip().split("(CPN)")
+            if incident_match:
+                incident_num = incident_match.group(1)
+                nature = incident_match.group(2).strip()
+                report_date = incident_match.group(3).strip()
 
-                    location = parts[0].strip() + "(CPN)" if len(parts) > 0 else ""
-                    disposition = parts[1].strip() if len(parts) > 1 else ""
+                remaining = incident_match.group(4).strip()
 
-                    record = {
-                        "Incident Number": incident_num,
-                        "Nature": nature,
-                        "Report Date": report_date,
-                        "Occurrence Date": occurrence_date,
-                        "General Location": location,
-                        "Disposition": disposition
-                    }
+                # Pattern for occurrence date (adjust as needed)
+                occurrence_pattern = r'(\d{2}/\d{2}/\d{2}\s+\d{4}Hrs\s+-\s*\d{2}/\d{2}/\d{2}\s+\d{4}Hrs|\d{2}/\d{2}/\d{2}\s+\d{4}Hrs)'
+                occurrence_match = re.search(occurrence_pattern, remaining)
 
-                    all_records.append(record)
+                occurrence_date = ""
+                if occurrence_match:
+                    occurrence_date = occurrence_match.group(1).strip()
+                    remaining = remaining.replace(occurrence_date, "", 1).strip()
 
-    return all_records
+                parts = remaining.strip().split("(CPN)")
+
+                location = parts[0].strip() + "(CPN)" if len(parts) > 0 else ""
+                disposition = parts[1].strip() if len(parts) > 1 else ""
+
+                record = {
+                    "Incident Number": incident_num,
+                    "Nature": nature,
+                    "Report Date": report_date,
+                    "Occurrence Date": occurrence_date,
+                    "General Location": location,
+                    "Disposition": disposition
+                }
+
+                records.append(record)
+
+    return records
+
+
+def convert(pdf_path, output_file, university=None):
+    """extract_crime_data and save_to_csv, skipping the university's seen incidents outside the overlap window"""
+    if not university:
+        return save_to_csv(extract_crime_data(pdf_path), output_file)
+
+    refresh_from, _ = fetch_since(university, date.today() - timedelta(days=OVERLAP_DAYS))
+    seen = SeenCases(university)
+    try:
+        records = extract_crime_data(pdf_path, seen, refresh_from)
+    finally:
+        seen.close()
+    save_to_csv(records, output_file)
 
 
 def save_to_csv(records, output_file):
@@ -85,31 +132,31 @@ def main():
     DEFAULT_PDF_PATH = "crimelog_pdfs/Crime_Log .pdf"
     DEFAULT_OUTPUT_PATH = "output.csv"
 
-    if DEFAULT_PDF_PATH:
+    parser = argparse.ArgumentParser(description='Extract crime data from Rutgers PD PDF crime log')
+    parser.add_argument('pdf_file', nargs='?', help='Path to the PDF file')
+    parser.add_argument('--output', '-o', default='rutgers_crime_log.csv',
+                        help='Output CSV file path (default: rutgers_crime_log.csv)')
+    parser.add_argument('--university', '-u',
+                        help='Skip incidents already ingested for this university (e.g. NortheasternUniversity)')
+
+    args = parser.parse_args()
+
+    if DEFAULT_PDF_PATH and not args.pdf_file:
         try:
             print(f"Using built-in PDF path: {DEFAULT_PDF_PATH}")
-            records = extract_crime_data(DEFAULT_PDF_PATH)
-            save_to_csv(records, DEFAULT_OUTPUT_PATH)
+            convert(DEFAULT_PDF_PATH, DEFAULT_OUTPUT_PATH, args.university)
             print(f"Data saved to {DEFAULT_OUTPUT_PATH}")
             return 0
         except Exception as e:
             print(f"Error processing PDF: {e}")
             return 1
 
-    parser = argparse.ArgumentParser(description='Extract crime data from Rutgers PD PDF crime log')
-    parser.add_argument('pdf_file', nargs='?', help='Path to the PDF file')
-    parser.add_argument('--output', '-o', default='rutgers_crime_log.csv',
-                        help='Output CSV file path (default: rutgers_crime_log.csv)')
-
-    args = parser.parse_args()
-
     if not args.pdf_file:
         parser.print_help()
         return 1
 
     try:
-        records = extract_crime_data(args.pdf_file)
-        save_to_csv(records, args.output)
+        convert(args.pdf_file, args.output, args.university)
     except Exception as e:
         print(f"Error processing PDF: {e}")
         return 1
@@ -1,36 +1,66 @@
 import requests
-from bs4 import BeautifulSoup
 import csv
 import os
-import time
 import re
-from datetime import datetime
+import sys
+from datetime import date, datetime, timedelta
 import pandas as pd
+from table_parse import make_soup
+from fetch import FailedJournal, FetchError, fetch
+from watermark import append_to_daily, fetch_since, save_watermark
 
 '''
 Script to scrape webpages ending with '.php'. Used for:
 - Purdue University
+
+Weekly pages that fail after retries are recorded in purdue_failed_urls.jsonl.
+Run with --retry-failed to fetch only those pages and append them to the CSV.
+
+Only weeks newer than the PurdueUniversity watermark (minus an overlap window) are fetched,
+and new rows are merged into data/daily/PurdueUniversity.csv.
 '''
 
 
-def scrape_crime_logs():
+def week_start(link_text):
+    """Parse the date out of a "Week of April 28, 2025" link, or None"""
+    match = re.search(r'Week of\s+([A-Za-z]+\.?\s+\d{1,2},\s+\d{4})', link_text)
+    if not match:
+        return None
+    try:
+        return datetime.strptime(match.group(1).replace('.', ''), "%B %d, %Y").date()
+    except ValueError:
+        return None
+
+
+def scrape_crime_logs(retry_failed=False):
     # Base URL
     base_url = "https://sc.edu/about/offices_and_divisions/law_enforcement_and_safety/crime-log-bulletins/"
-
-    # Get the main index page
-    main_page_url = base_url + "index.php"
-    main_response = requests.get(main_page_url)
-    main_soup = BeautifulSoup(main_response.text, 'html.parser')
-
-    # Find all weekly log links
-    weekly_links = []
-    for link in main_soup.find_all('a'):
-        href = link.get('href')
-        if href and "Week of" in link.text:
-            if href.startswith('http'):
-                weekly_links.append(href)
-            else:
-                weekly_links.append(base_url + href)
+    journal = FailedJournal("purdue_failed_urls.jsonl")
+
+    if retry_failed:
+        weekly_links = [entry['url'] for entry in journal.pending()]
+        print(f"Retrying {len(weekly_links)} failed weekly pages")
+    else:
+        # Get the main index page
+        main_page_url = base_url + "index.php"
+        main_response = fetch(requests, main_page_url)
+        main_soup = make_soup(main_response.text, tags='a')
+
+        # Only weeks that end after the watermark (minus overlap) need fetching
+        since, _ = fetch_since("PurdueUniversity", date(2000, 1, 1))
+
+        # Find all weekly log links
+        weekly_links = []
+        for link in main_soup.find_all('a'):
+            href = link.get('href')
+            if href and "Week of" in link.text:
+                start = week_start(link.text)
+                if start is not None and start + timedelta(days=6) < since:
+                    continue
+                if href.startswith('http'):
+                    weekly_links.append(href)
+                else:
+                    weekly_links.append(base_url + href)
 
     # Create CSV file to store all data
     csv_filename = "purdue_crime_logs.csv"
@@ -39,17 +69,24 @@ def scrape_crime_logs():
     headers = ["Date", "Nature", "Case Number", "Date/Time Occurred",
                "Date/Time Reported", "General Location", "Disposition"]
 
-    with open(csv_filename, 'w', newline='', encoding='utf-8') as csvfile:
+    # A retry run adds to the existing file instead of starting over
+    append = retry_failed and os.path.exists(csv_filename)
+    with open(csv_filename, 'a' if append else 'w', newline='', encoding='utf-8') as csvfile:
         writer = csv.writer(csvfile)
-        writer.writerow(headers)
+        if not append:
+            writer.writerow(headers)
 
         # Process each weekly link
         for weekly_url in weekly_links:
             print(f"Processing: {weekly_url}")
 
             try:
-                weekly_response = requests.get(weekly_url)
-                weekly_soup = BeautifulSoup(weekly_response.text, 'html.parser')
+                # Retries transient errors; pacing is handled per host by the rate limiter
+                weekly_response = fetch(requests, weekly_url, journal=journal)
+                # fetch returns non-retryable statuses (e.g. 404); this raises them into the journal below
+                weekly_response.raise_for_status()
+                # Only the date headers and their tables are needed
+                weekly_soup = make_soup(weekly_response.text)
 
                 # Find all daily log tables
                 current_date = None
@@ -94,19 +131,28 @@ def scrape_crime_logs():
                                         disposition
                                     ])
 
-                # Wait between requests to avoid overloading the server
-                time.sleep(1)
-
+            except FetchError as e:
+                # Already in the journal
+                print(f"Error processing {weekly_url}: {e}")
             except Exception as e:
+                journal.record_failure(weekly_url, e)
                 print(f"Error processing {weekly_url}: {e}")
 
     print(f"Data saved to {csv_filename}")
 
     # Convert CSV to a more readable DataFrame
-    df = pd.read_csv(csv_filename)
+    df = pd.read_csv(csv_filename, dtype=str, keep_default_na=False)
     print(f"Total records collected: {len(df)}")
+
+    # Merge into the dashboard data instead of regenerating it, then move the watermark
+    added, updated = append_to_daily("PurdueUniversity", df.to_dict('records'), key="Case Number",
+                                     rename={'Nature': 'Incident Type', 'General Location': 'Location'})
+    print(f"data/daily/PurdueUniversity.csv: {added} new rows, {updated} updated")
+    report_dates = pd.to_datetime(df['Date'], format="%A, %B %d, %Y", errors='coerce').dropna()
+    if not report_dates.empty:
+        save_watermark("PurdueUniversity", last_date=report_dates.max().date())
     return df
 
 
 if __name__ == "__main__":
-    crime_data = scrape_crime_logs()
\ No newline at end of file
+    crime_data = scrape_crime_logs(retry_failed="--retry-failed" in sys.argv)
\ No newline at end of file
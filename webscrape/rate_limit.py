@@ -0,0 +1,149 @@
+import threading
+import time
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+from urllib.parse import urlsplit
+
+'''
+Per-host token bucket rate limiter that replaces the hard-coded time.sleep() calls between
+requests. One limiter exists per host for the whole process, so requests-based and
+Selenium-based fetchers hitting the same site share the same budget.
+
+The rate adapts to the host:
+- fast responses slowly raise the rate (additive increase)
+- slow responses lower it
+- 429/503 halve it and honor Retry-After before the next request
+'''
+
+DEFAULT_RATE = 1.0          # requests per second to start with
+MIN_RATE = 0.1
+MAX_RATE = 10.0
+BURST = 1                   # no bursts by default, be polite
+TARGET_LATENCY = 1.0        # seconds; faster than this and we speed up
+SLOW_LATENCY = 5.0          # seconds; slower than this and we back off
+INCREASE_STEP = 0.25
+SLOW_FACTOR = 0.75
+THROTTLE_FACTOR = 0.5
+THROTTLE_STATUSES = (429, 503)
+
+
+def parse_retry_after(value, now=None):
+    """Turn a Retry-After header (seconds or an HTTP date) into a delay in seconds"""
+    if not value:
+        return None
+
+    value = str(value).strip()
+    if value.isdigit():
+        return float(value)
+
+    try:
+        when = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    if when.tzinfo is None:
+        when = when.replace(tzinfo=timezone.utc)
+    now = now or datetime.now(timezone.utc)
+    return max(0.0, (when - now).total_seconds())
+
+
+class HostLimiter:
+    """Adaptive token bucket for a single host"""
+
+    def __init__(self, host, rate=DEFAULT_RATE, burst=BURST, min_rate=MIN_RATE, max_rate=MAX_RATE):
+        self.host = host
+        self.rate = rate
+        self.burst = burst
+        self.min_rate = min_rate
+        self.max_rate = max_rate
+        self.tokens = burst
+        self.updated = time.monotonic()
+        self.blocked_until = 0.0
+        self.lock = threading.Lock()
+
+    def _refill(self, now):
+        self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def acquire(self):
+        """Block until this host may be sent another request"""
+        while True:
+            with self.lock:
+                now = time.monotonic()
+                self._refill(now)
+                if now < self.blocked_until:
+                    delay = self.blocked_until - now
+                elif self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                else:
+                    delay = (1 - self.tokens) / self.rate
+            time.sleep(delay)
+
+    def record(self, latency=None, status=None, retry_after=None):
+        """Adjust the rate based on how the host handled the last request"""
+        with self.lock:
+            if status in THROTTLE_STATUSES:
+                self.rate = max(self.min_rate, self.rate * THROTTLE_FACTOR)
+                delay = parse_retry_after(retry_after)
+                if delay is None:
+                    delay = 1 / self.rate
+                self.blocked_until = max(self.blocked_until, time.monotonic() + delay)
+            elif latency is not None and latency > SLOW_LATENCY:
+                self.rate = max(self.min_rate, self.rate * SLOW_FACTOR)
+            elif latency is not None and latency < TARGET_LATENCY and (status is None or status < 400):
+                self.rate = min(self.max_rate, self.rate + INCREASE_STEP)
+
+
+_limiters = {}
+_registry_lock = threading.Lock()
+
+
+def host_of(url):
+    return urlsplit(url).netloc.lower()
+
+
+def limiter_for(url, **kwargs):
+    """Return the shared limiter for the host of url, creating it on first use"""
+    host = host_of(url)
+    with _registry_lock:
+        if host not in _limiters:
+            _limiters[host] = HostLimiter(host, **kwargs)
+        return _limiters[host]
+
+
+def get(client, url, **kwargs):
+    """
+    Rate-limited GET through requests (or a requests.Session).
+
+    Args:
+        client: the requests module or a Session
+        url: URL to fetch
+        **kwargs: passed through to client.get
+
+    Returns:
+        The response object
+    """
+    limiter = limiter_for(url)
+    limiter.acquire()
+    start = time.monotonic()
+    try:
+        response = client.get(url, **kwargs)
+    except Exception:
+        limiter.record(latency=time.monotonic() - start, status=503)
+        raise
+    limiter.record(latency=time.monotonic() - start, status=response.status_code,
+                   retry_after=response.headers.get('Retry-After'))
+    return response
+
+
+def driver_get(driver, url, timeout=10):
+    """Rate-limited driver.get for Selenium, waiting until the page has finished loading"""
+    from selenium.webdriver.support.ui import WebDriverWait
+
+    limiter = limiter_for(url)
+    limiter.acquire()
+    start = time.monotonic()
+    driver.get(url)
+    WebDriverWait(driver, timeout).until(
+        lambda d: d.execute_script("return document.readyState") == "complete")
+    limiter.record(latency=time.monotonic() - start)
@@ -0,0 +1,195 @@
+import csv
+import hashlib
+import math
+import os
+import sqlite3
+import sys
+
+'''
+Case numbers already ingested into data/daily, so parsers re-reading a crime log (the whole
+PDF is re-downloaded on every run for most sources) can bail out of a block as soon as its
+case number matches, instead of building a record append_to_daily would throw away.
+
+Each university has a Bloom filter, which answers "definitely new" without any lookup, and
+an exact set in SQLite that confirms the filter's "maybe" so a false positive never drops a
+new case. The exact set is only read (once, into memory) on the first "maybe", so a run of
+new log dates, where every case is new, costs a few hashes per case:
+
+    seen = SeenCases("UCSD")
+    incidents = extract_incidents_from_text(pages, date_string, seen=seen)
+    seen.add(case["Case_Number"] for case in incidents)
+
+Cases that can still change (the overlap window, see watermark.py) shouldn't be skipped, or
+their disposition updates are lost. append_to_daily adds the cases it merges.
+
+Usage: python seen_cases.py <University> <case number column>   (rebuild from the daily CSV)
+'''
+
+SEEN_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "seen_cases.sqlite")
+DAILY_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "data", "daily")
+FALSE_POSITIVE_RATE = 0.01
+MIN_CAPACITY = 1024
+
+
+def bloom_size(capacity, false_positive_rate=FALSE_POSITIVE_RATE):
+    """(bits, hash functions) for a Bloom filter holding capacity items at false_positive_rate"""
+    bits = math.ceil(-capacity * math.log(false_positive_rate) / math.log(2) ** 2)
+    return bits, max(1, round(bits / capacity * math.log(2)))
+
+
+def bloom_capacity(bloom, false_positive_rate=FALSE_POSITIVE_RATE):
+    """Items a filter of this size holds at false_positive_rate"""
+    return int(bloom.bits * math.log(2) ** 2 / -math.log(false_positive_rate))
+
+
+class BloomFilter:
+    def __init__(self, bits, hashes, data=None, count=0):
+        self.bits = bits
+        self.hashes = hashes
+        self.data = bytearray((bits + 7) // 8) if data is None else bytearray(data)
+        self.count = count
+
+    @classmethod
+    def for_capacity(cls, capacity, false_positive_rate=FALSE_POSITIVE_RATE):
+        return cls(*bloom_size(max(capacity, MIN_CAPACITY), false_positive_rate))
+
+    def _positions(self, item):
+        # Double hashing: k positions from two 64-bit halves of one digest
+        digest = hashlib.blake2b(item.encode('utf-8'), digest_size=16).digest()
+        h1, h2 = int.from_bytes(digest[:8], 'little'), int.from_bytes(digest[8:], 'little') | 1
+        return ((h1 + i * h2) % self.bits for i in range(self.hashes))
+
+    def add(self, item):
+        for position in self._positions(item):
+            self.data[position >> 3] |= 1 << (position & 7)
+        self.count += 1
+
+    def __contains__(self, item):
+        # A new item usually fails on its first position or two
+        data = self.data
+        for position in self._positions(item):
+            if not data[position >> 3] & (1 << (position & 7)):
+                return False
+        return True
+
+
+def normalize_case(case):
+    return str(case).strip()
+
+
+class SeenCases:
+    """Bloom filter and exact set of one university's ingested case numbers"""
+
+    def __init__(self, university, path=SEEN_FILE):
+        self.university = university
+        self.conn = sqlite3.connect(path)
+        self.conn.execute("""
+            CREATE TABLE IF NOT EXISTS cases (
+                university TEXT NOT NULL,
+                case_number TEXT NOT NULL,
+                PRIMARY KEY (university, case_number)
+            ) WITHOUT ROWID""")
+        self.conn.execute("""
+            CREATE TABLE IF NOT EXISTS blooms (
+                university TEXT PRIMARY KEY,
+                bits INTEGER NOT NULL,
+                hashes INTEGER NOT NULL,
+                count INTEGER NOT NULL,
+                data BLOB NOT NULL
+            )""")
+        self.conn.commit()
+        row = self.conn.execute("SELECT bits, hashes, count, data FROM blooms WHERE university = ?",
+                                (university,)).fetchone()
+        self.bloom = BloomFilter(*row[:2], data=row[3], count=row[2]) if row else self._rebuild_bloom()
+        # The exact set, loaded on the filter's first "maybe"; a run whose cases are all new never reads it
+        self.exact = None
+        # How lookups were answered, for benchmarks and logging
+        self.stats = {'new': 0, 'seen': 0, 'false_positives': 0}
+
+    def _rebuild_bloom(self):
+        """Bloom filter sized for twice the exact set, refilled from it"""
+        cases = self._cases()
+        bloom = BloomFilter.for_capacity(2 * len(cases))
+        for case in cases:
+            bloom.add(case)
+        self.bloom = bloom
+        self._save_bloom()
+        return bloom
+
+    def _save_bloom(self):
+        with self.conn:
+            self.conn.execute("INSERT OR REPLACE INTO blooms (university, bits, hashes, count, data) VALUES (?, ?, ?, ?, ?)",
+                              (self.university, self.bloom.bits, self.bloom.hashes, self.bloom.count,
+                               bytes(self.bloom.data)))
+
+    def _cases(self):
+        return {case for (case,) in self.conn.execute(
+            "SELECT case_number FROM cases WHERE university = ?", (self.university,))}
+
+    def __contains__(self, case):
+        case = normalize_case(case)
+        if self.exact is None:
+            if case not in self.bloom:
+                self.stats['new'] += 1
+                return False
+            self.exact = self._cases()
+            found = case in self.exact
+            if not found:
+                self.stats['false_positives'] += 1
+        else:
+            # Once loaded, the set answers faster than the filter
+            found = case in self.exact
+        self.stats['seen' if found else 'new'] += 1
+        return found
+
+    def __len__(self):
+        return self.conn.execute("SELECT count(*) FROM cases WHERE university = ?", (self.university,)).fetchone()[0]
+
+    def add(self, cases):
+        """Record case numbers as ingested. Returns how many were new"""
+        cases = {normalize_case(case) for case in cases} - {''}
+        with self.conn:
+            before = self.conn.total_changes
+            self.conn.executemany("INSERT OR IGNORE INTO cases (university, case_number) VALUES (?, ?)",
+                                  [(self.university, case) for case in cases])
+            added = self.conn.total_changes - before
+        if not added:
+            return 0
+        if self.exact is not None:
+            self.exact |= cases
+        if self.bloom.count + added > bloom_capacity(self.bloom):
+            # Past its capacity the false positive rate climbs; start over at twice the size
+            self._rebuild_bloom()
+        else:
+            for case in cases:
+                self.bloom.add(case)
+            self._save_bloom()
+        return added
+
+    def rebuild_from_daily(self, key):
+        """Replace the set with the key column of data/daily/<university>.csv. Returns its size"""
+        path = os.path.join(DAILY_DIR, f"{self.university}.csv")
+        with open(path, newline='', encoding='utf-8-sig') as f:
+            first_line = f.readline()
+            f.seek(0)
+            delimiter = '\t' if first_line.count('\t') > first_line.count(',') else ','
+            cases = [row.get(key) or '' for row in csv.DictReader(f, delimiter=delimiter)]
+        with self.conn:
+            self.conn.execute("DELETE FROM cases WHERE university = ?", (self.university,))
+        self.exact = None
+        self.add(cases)
+        self._rebuild_bloom()
+        return len(self)
+
+    def close(self):
+        self.conn.close()
+
+
+if __name__ == "__main__":
+    if len(sys.argv) != 3:
+        sys.exit("Usage: python seen_cases.py <University> <case number column>")
+    seen = SeenCases(sys.argv[1])
+    count = seen.rebuild_from_daily(sys.argv[2])
+    print(f"{sys.argv[1]}: {count} case numbers, Bloom filter of {seen.bloom.bits // 8 / 1024:.1f} KB "
+          f"with {seen.bloom.hashes} hashes")
+    seen.close()
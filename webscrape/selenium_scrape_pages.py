@@ -3,62 +3,161 @@ from selenium.webdriver.common.by import By
 from selenium.webdriver.common.keys import Keys
 from selenium.webdriver.support.ui import WebDriverWait
 from selenium.webdriver.support import expected_conditions as EC
-import csv
-import time
+import sys
+from datetime import date, datetime, time, timedelta
+from zoneinfo import ZoneInfo
+import rate_limit
+from fetch import FailedJournal, FetchError, with_retries
+from checkpoint import CheckpointStore
+from watermark import append_to_daily, fetch_since, save_watermark
 
 '''
 Script for navigating multiple pages with tables. Used for
 - Penn State
 - University of Arizona
 - UChicago
+
+Pages that fail to load are retried with backoff, then recorded in failed_pages.jsonl.
+Run with --retry-failed to re-scrape only those pages. A page that loads without a table, or
+with an empty one, is the end of the results and stops the run without being journaled.
+
+Each page's rows are checkpointed in pages_checkpoints.sqlite as soon as it is scraped, keyed
+on the date window and offset, so a rerun skips pages already done and the CSV is assembled
+from the checkpoints. The window of an unfinished run is kept with the checkpoints and reused,
+so a rerun on a later day resumes it instead of starting a new one.
+
+Only reports since the UChicago watermark (minus an overlap window) are requested, and new
+rows are merged into data/daily/UChicago.csv.
 '''
 
 
+def to_epoch(day):
+    """Midnight Chicago time on the given date, as the epoch seconds the archive URL expects"""
+    return int(datetime.combine(day, time(0, 0), tzinfo=ZoneInfo("America/Chicago")).timestamp())
+
+
 # Chrome WebDriver
 driver = webdriver.Chrome()
-driver.get("https://incidentreports.uchicago.edu/incidentReportArchive.php?startDate=01%2F01%2F2025&endDate=05%2F01%2F2025")
 wait = WebDriverWait(driver, 10)
 
-table_data = []
-headers = None
+journal = FailedJournal("failed_pages.jsonl")
+store = CheckpointStore("pages_checkpoints.sqlite")
+headers = store.get_meta("headers")
+retry_failed = "--retry-failed" in sys.argv
+
+# Date window: that of an unfinished run, else from the watermark (minus overlap) or the
+# initial backfill start through today
+window = store.get_meta("window")
+if window:
+    start_date, end_date = map(date.fromisoformat, window)
+else:
+    start_date, _ = fetch_since("UChicago", date(2025, 1, 1))
+    end_date = date.today()
+    if not retry_failed:
+        store.set_meta("window", [start_date.isoformat(), end_date.isoformat()])
+archive_url = (f"https://incidentreports.uchicago.edu/incidentReportArchive.php"
+               f"?startDate={to_epoch(start_date)}&endDate={to_epoch(end_date + timedelta(days=1))}")
 
 def extract_table_data():
-    """Extracts data from the table on the current page."""
+    """Extracts data from the table on the current page. Returns the rows, or None if there is no table."""
     global headers
 
     try:
         table = wait.until(EC.presence_of_element_located((By.TAG_NAME, "table")))
     except:
-        return False
+        return None
 
     if headers is None:
         headers = [th.text.strip() for th in table.find_elements(By.TAG_NAME, "th")]
+        store.set_meta("headers", headers)
 
+    table_data = []
     rows = table.find_elements(By.TAG_NAME, "tr")[1:]  # Skip header row
     for row in rows:
         cells = row.find_elements(By.TAG_NAME, "td")
         table_data.append([cell.text.strip() for cell in cells])
 
-    return True
+    return table_data
+
+
+def page_unit(offset):
+    """Checkpoint key of a page: the date window and offset, not the URL (whose endDate depends on the day)"""
+    return f"{start_date.isoformat()}/{end_date.isoformat()}/{offset}"
 
-max_pages = 500
-page_number = 5
 
-while page_number <= max_pages:
-    driver.get(f"https://incidentreports.uchicago.edu/incidentReportArchive.php?startDate=1735711200&endDate=1746075600&offset={page_number}")
-    time.sleep(3)
+def scrape_page(url, unit):
+    """
+    Load one page, retrying load errors (FetchError once they run out, with the URL journaled),
+    and checkpoint its table. Returns False past the last page, where there are no rows.
+    """
+    with_retries(lambda: rate_limit.driver_get(driver, url), url, journal=journal, key=unit)
+    table_data = extract_table_data()
+    if not table_data:
+        return False
+    store.save(unit, table_data)
+    return True
 
-    if not extract_table_data():
-        break
 
-    print(f"Scraped page {page_number}")
-    page_number += 5
+max_pages = 500
+page_number = 0
+completed = store.done()
+run_units = []
+
+if retry_failed:
+    for entry in journal.pending():
+        try:
+            if scrape_page(entry['url'], entry['key']):
+                print(f"Recovered page {entry['key']}")
+            else:
+                print(f"No results on {entry['url']}")
+        except FetchError as e:
+            print(f"Still failing: {e}")
+else:
+    finished = True
+    while page_number <= max_pages:
+        unit = page_unit(page_number)
+        run_units.append(unit)
+
+        if unit in completed:
+            print(f"Already checkpointed, skipping page {page_number}")
+            page_number += 5
+            continue
+
+        try:
+            if not scrape_page(f"{archive_url}&offset={page_number}", unit):
+                run_units.pop()
+                print(f"No results at page {page_number}, done")
+                break
+        except FetchError as e:
+            # The site is down; the URL is in the journal and a rerun resumes this window
+            print(f"Stopping at page {page_number}: {e}")
+            finished = False
+            break
+
+        print(f"Scraped page {page_number}")
+        page_number += 5
+
+    if finished:
+        store.set_meta("window", None)
 
 csv_filename = "crime_log.csv"
-with open(csv_filename, "w", newline="", encoding="utf-8") as f:
-    writer = csv.writer(f)
-    writer.writerow(headers)
-    writer.writerows(table_data)
+# A retry run rebuilds the CSV from every checkpoint, a normal run from this date window
+run_units = None if retry_failed else run_units
+row_count = store.write_csv(csv_filename, headers or [], units=run_units)
+print(f"{row_count} rows assembled from checkpoints")
+
+# Merge into the dashboard data instead of regenerating it, then move the watermark
+daily_rows = [dict(zip(headers, row)) for row in store.rows(run_units)] if headers else []
+added, updated = append_to_daily("UChicago", daily_rows, key="UCPDI#", rename={
+    'Incident': 'Incident Type',
+    'Reported': 'Date/Time Reported',
+    'Occurred': 'Date/Time Occurred'
+})
+print(f"data/daily/UChicago.csv: {added} new rows, {updated} updated")
+# Don't move the watermark if not a single page of the window could be scraped
+if not retry_failed and any(store.is_done(unit) for unit in run_units):
+    save_watermark("UChicago", last_date=end_date)
+store.close()
 
 print(f"✅ Data exported successfully to {csv_filename}")
 
@@ -0,0 +1,141 @@
+from bs4 import BeautifulSoup, SoupStrainer
+import pandas as pd
+
+try:
+    import lxml.html
+    PARSER = 'lxml'
+except ImportError:
+    lxml = None
+    PARSER = 'html.parser'
+
+'''
+Shared helpers for pulling tables out of crime log pages. Only the <table>/<h2>/<h3>
+subtrees are parsed (via SoupStrainer), and lxml is used when it is installed. Used by:
+- tablescrape.py
+- beautifulsoup_scrape.py
+- php_scraper.py
+- ualabama_scraper.py
+- uva_scraper.py
+'''
+
+TABLE_TAGS = ('table', 'h2', 'h3')
+
+
+class ClassStrainer(SoupStrainer):
+    """SoupStrainer that keeps a tag named in classes ({tag name: CSS class}) only if it has that class"""
+
+    def __init__(self, name, classes, attrs=None):
+        super().__init__(name, attrs=attrs or {})
+        self.classes = classes
+
+    def _has_class(self, name, attrs):
+        wanted = self.classes.get(name)
+        if wanted is None:
+            return True
+        value = (attrs or {}).get('class') or ''
+        return wanted in (value.split() if isinstance(value, str) else value)
+
+    def allow_tag_creation(self, nsprefix, name, attrs):
+        # bs4 4.13 and later
+        return self._has_class(name, attrs) and super().allow_tag_creation(nsprefix, name, attrs)
+
+    def search_tag(self, markup_name=None, markup_attrs={}):
+        # Earlier bs4 versions strain with this, passing the tag name and attributes
+        if isinstance(markup_name, str) and not self._has_class(markup_name, markup_attrs):
+            return None
+        return super().search_tag(markup_name, markup_attrs)
+
+
+def make_soup(markup, tags=TABLE_TAGS, attrs=None, parser=None, classes=None):
+    """
+    Parse only the given tags (and everything inside them) instead of the whole page.
+    classes ({tag name: CSS class}) narrows some of the tags down to the ones with that class,
+    e.g. tags=('table', 'div'), classes={'div': 'pagination'} keeps no other <div>.
+    """
+    tags = list(tags) if not isinstance(tags, str) else tags
+    if classes:
+        strainer = ClassStrainer(tags, classes, attrs=attrs)
+    else:
+        strainer = SoupStrainer(tags, attrs=attrs or {})
+    return BeautifulSoup(markup, parser or PARSER, parse_only=strainer)
+
+
+def find_table(markup, parser=None):
+    """Return the first <table> on the page, or None"""
+    return make_soup(markup, tags=('table',), parser=parser).find('table')
+
+
+def table_rows(table, cell_tags=('td',)):
+    """
+    Split a table into its header names and data rows.
+
+    Returns:
+        (headers, rows) where headers come from the <th> cells of the first row
+        (empty if there are none) and rows is a list of lists of cell text
+    """
+    if table is None:
+        return [], []
+
+    rows = table.find_all('tr')
+    headers = []
+    if rows and rows[0].find_all('th'):
+        headers = [th.get_text(strip=True) for th in rows[0].find_all('th')]
+        rows = rows[1:]
+
+    data = []
+    for tr in rows:
+        cells = [cell.get_text(strip=True) for cell in tr.find_all(list(cell_tags))]
+        if cells:
+            data.append(cells)
+
+    return headers, data
+
+
+def read_table_columns(markup, index=0):
+    """
+    pandas.read_html-style fast path: go straight from the page to {header: [values]}
+    without building a BeautifulSoup tree. Uses lxml when available.
+    """
+    if lxml is not None:
+        if isinstance(markup, str):
+            markup = markup.encode('utf-8')
+        doc = lxml.html.fromstring(markup)
+        tables = doc.xpath('//table')
+        if len(tables) <= index:
+            return {}
+        rows = tables[index].xpath('.//tr')
+        header_cells = rows[0].xpath('./th') if rows else []
+        headers = [' '.join(th.text_content().split()) for th in header_cells]
+        body = [[' '.join(td.text_content().split()) for td in tr.xpath('./td')]
+                for tr in (rows[1:] if header_cells else rows)]
+    else:
+        tables = make_soup(markup, tags=('table',)).find_all('table')
+        if len(tables) <= index:
+            return {}
+        headers, body = table_rows(tables[index])
+
+    body = [row for row in body if row]
+    width = max([len(headers)] + [len(row) for row in body])
+    headers = headers + [f"Column{i}" for i in range(len(headers), width)]
+
+    # Repeated header names get a ".1", ".2" suffix the same way pandas does
+    seen = {}
+    for i, header in enumerate(headers):
+        if header in seen:
+            seen[header] += 1
+            headers[i] = f"{header}.{seen[header]}"
+        else:
+            seen[header] = 0
+
+    columns = {header: [] for header in headers}
+    for row in body:
+        row = row + [''] * (width - len(row))
+        for header, value in zip(headers, row):
+            columns[header].append(value)
+
+    return columns
+
+
+def read_table(markup, index=0):
+    """Direct-to-DataFrame version of read_table_columns"""
+    return pd.DataFrame(read_table_columns(markup, index=index))
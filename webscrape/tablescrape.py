@@ -1,6 +1,5 @@
 import requests
-from bs4 import BeautifulSoup
-import pandas as pd
+from table_parse import read_table
 
 '''
 Script to scrape websites where there the table is directly on webpage. Used for:
@@ -17,26 +16,14 @@ headers = {
 response = requests.get(url, headers=headers)
 
 if response.status_code == 200:
-    soup = BeautifulSoup(response.text, "html.parser")
     print("Successfully accessed the webpage!")
 else:
     print(f"Failed to access page: {response.status_code}")
 
 response.raise_for_status()  # Raise an error if request fails
 
-soup = BeautifulSoup(response.text, 'html.parser')
-
-table = soup.find("table")
-
-headers = [th.text.strip() for th in table.find_all("th")]
-
-rows = []
-for tr in table.find_all("tr")[1:]:  # Skip header row
-    cells = [td.text.strip() for td in tr.find_all("td")]
-    if cells:
-        rows.append(cells)
-
-df = pd.DataFrame(rows, columns=headers)
+# Goes straight from the page to columns without building a soup of the whole page
+df = read_table(response.content)
 
 df.to_csv("jan.csv", index=False)
 
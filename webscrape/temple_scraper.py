@@ -2,6 +2,11 @@ import re
 import csv
 import os
 import pdfplumber
+from datetime import date, timedelta
+from seen_cases import SeenCases
+from watermark import OVERLAP_DAYS, append_to_daily, fetch_since, save_watermark
+
+UNIVERSITY = "TempleUniversity"
 
 
 def extract_text_from_pdf(pdf_path):
@@ -24,9 +29,27 @@ def clean_text(text):
     return text
 
 
-def parse_crime_log(text):
-    """Parse crime log text and extract crime incidents"""
+def reported_on(date_reported):
+    """Date of a 'M/D/YY H:MM' or 'M/D/YYYY H:MM' Date/Time Reported value, None if it has none"""
+    match = re.match(r'(\d{1,2})/(\d{1,2})/(\d{2,4})', date_reported)
+    if not match:
+        return None
+    month, day, year = (int(part) for part in match.groups())
+    try:
+        return date(year + 2000 if year < 100 else year, month, day)
+    except ValueError:
+        return None
+
+
+def parse_crime_log(text, seen=None, refresh_from=None):
+    """
+    Parse crime log text and extract crime incidents. seen is an optional
+    seen_cases.SeenCases; blocks whose case number it contains are skipped, unless
+    they were reported on or after refresh_from (the overlap window, where the
+    disposition may still change)
+    """
     incidents = []
+    skipped = 0
 
     # this regex captures each incident block
     incident_blocks = re.findall(r'Date Reported:\s+(.+?)(?=Date Reported:|$)', text, re.DOTALL)
@@ -50,9 +73,17 @@ def parse_crime_log(text):
                 time = date_reported_match.group(2)
                 date_reported = f"{int(month)}/{int(day)}/{year} {time}"
             else:
-                print(f"Warning: Could not extract date reported for case {case_number}")
                 date_reported = ""
 
+            if seen is not None and case_number in seen:
+                reported = reported_on(date_reported)
+                if refresh_from is None or (reported is not None and reported < refresh_from):
+                    skipped += 1
+                    continue
+
+            if not date_reported:
+                print(f"Warning: Could not extract date reported for case {case_number}")
+
             location_match = re.search(r'General Location:\s+([^\n]+)', full_block)
             location = location_match.group(1).strip() if location_match else ""
 
@@ -91,6 +122,8 @@ def parse_crime_log(text):
             print(f"Error parsing block {i + 1}: {e}")
 
     print(f"Successfully parsed {len(incidents)} incidents")
+    if skipped:
+        print(f"Skipped {skipped} already ingested cases")
     return incidents
 
 
@@ -133,9 +166,23 @@ def main():
         f.write(text)
     print("Saved extracted text to extracted_text.txt for debugging")
 
-    incidents = parse_crime_log(text)
+    # Cases already in data/daily are skipped while parsing, except the ones reported in the
+    # overlap window (see watermark.py), where their dispositions may have changed
+    refresh_from, _ = fetch_since(UNIVERSITY, date.today() - timedelta(days=OVERLAP_DAYS))
+    seen = SeenCases(UNIVERSITY)
+    try:
+        incidents = parse_crime_log(text, seen, refresh_from)
+    finally:
+        seen.close()
     write_to_csv(incidents, output_csv)
 
+    # Merging records the cases in the seen set, so they are only skipped once they are ingested
+    added, updated = append_to_daily(UNIVERSITY, incidents, key='Case Number')
+    print(f"Merged into data/daily/{UNIVERSITY}.csv: {added} new, {updated} updated")
+    reported = [day for day in (reported_on(incident['Date/Time Reported']) for incident in incidents) if day]
+    if reported:
+        save_watermark(UNIVERSITY, last_date=max(reported))
+
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
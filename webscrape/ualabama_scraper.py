@@ -1,10 +1,12 @@
 import requests
-from bs4 import BeautifulSoup
 import csv
 import re
 import logging
-import time
+from datetime import datetime
 from urllib.parse import urljoin
+from table_parse import make_soup
+from fetch import FailedJournal, FetchError, fetch
+from watermark import append_to_daily, fetch_since, save_watermark
 
 # Set up logging - only to console, no file
 logging.basicConfig(
@@ -67,22 +69,22 @@ def format_date_time(date_time_str):
         return date_time_str
 
 
-def scrape_crime_log_page(url):
+def scrape_crime_log_page(url, journal=None):
     """
     Scrape a single page of the crime log
     """
     logging.info(f"Fetching data from {url}")
 
-    # Send a request to the webpage
+    # Send a request to the webpage, retrying transient errors
     try:
-        response = requests.get(url)
+        response = fetch(requests, url, journal=journal)
         response.raise_for_status()  # Raise an exception for 4XX/5XX responses
-    except requests.exceptions.RequestException as e:
+    except (FetchError, requests.exceptions.RequestException) as e:
         logging.error(f"Error fetching the webpage: {e}")
         return None, None
 
-    # Parse the HTML content
-    soup = BeautifulSoup(response.content, 'html.parser')
+    # Parse the page once, keeping only the table and the pagination controls' <div>
+    soup = make_soup(response.content, tags=('table', 'div'), classes={'div': 'dataTables_paginate'})
 
     # The crime log is in an HTML table, but with a specific structure
     page_crime_data = []
@@ -204,18 +206,28 @@ def scrape_crime_log_page(url):
     return page_crime_data, next_page_url
 
 
-def scrape_all_pages():
+def reported_date(entry):
+    """Date part of an entry's formatted 'Date Reported' (e.g. 4/29/25 12:17), or None"""
+    try:
+        return datetime.strptime(entry['Date Reported'].split()[0], '%m/%d/%y').date()
+    except (ValueError, IndexError, KeyError):
+        return None
+
+
+def scrape_all_pages(since=None):
     """
-    Scrape all pages of the crime log
+    Scrape all pages of the crime log. The log is newest first, so when since is given
+    paging stops after the first page with nothing reported on or after that date.
     """
     base_url = "https://police.ua.edu/daily-crime-log/"
     current_url = base_url
     all_crime_data = []
     page_num = 1
+    journal = FailedJournal("ualabama_failed_urls.jsonl")
 
     while current_url:
         logging.info(f"Scraping page {page_num}...")
-        page_data, next_url = scrape_crime_log_page(current_url)
+        page_data, next_url = scrape_crime_log_page(current_url, journal)
 
         if page_data:
             all_crime_data.extend(page_data)
@@ -224,12 +236,16 @@ def scrape_all_pages():
             logging.warning(f"No data found on page {page_num}. Stopping.")
             break
 
+        if since is not None:
+            dates = [d for d in map(reported_date, page_data) if d is not None]
+            if dates and max(dates) < since:
+                logging.info(f"Reached entries older than {since}. Stopping.")
+                break
+
         # If there's a next page, update the URL for the next iteration
         if next_url:
             current_url = next_url
             page_num += 1
-            # Add a small delay to avoid overwhelming the server
-            time.sleep(1)
         else:
             logging.info("No more pages to scrape.")
             break
@@ -271,13 +287,31 @@ def save_to_csv(crime_data, filename="UniversityOfArizona.csv"):
 def main():
     logging.info("Starting UA Police Department Crime Log Scraper")
 
+    # Only pages newer than the watermark (minus overlap) are needed after the first run
+    since, _ = fetch_since("UniversityOfAlabama", None)
+
     # Scrape all pages of the crime log
-    crime_data = scrape_all_pages()
+    crime_data = scrape_all_pages(since)
 
     if crime_data:
         # Save to CSV
         success = save_to_csv(crime_data)
         if success:
+            # Merge into the dashboard data instead of regenerating it, then move the watermark
+            added, updated = append_to_daily("UniversityOfAlabama", crime_data, key="Report Number", rename={
+                'Crime Type': 'Incident Type',
+                'Date Reported': 'Date/Time Reported',
+                'Date From': 'Date/Time Occurred',
+                'Date To': 'Date/Time Occured To',
+                # The daily file has the page's status (Closed, Pending) under Disposition
+                # and its disposition (e.g. Cleared by Adult Arrest) under Status
+                'Status': 'Disposition',
+                'Disposition': 'Status'
+            })
+            logging.info(f"data/daily/UniversityOfAlabama.csv: {added} new rows, {updated} updated")
+            dates = [d for d in map(reported_date, crime_data) if d is not None]
+            if dates:
+                save_watermark("UniversityOfAlabama", last_date=max(dates))
             logging.info("Scraping completed successfully!")
         else:
             logging.error("Failed to save scraped data to CSV.")
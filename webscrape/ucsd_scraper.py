@@ -3,16 +3,30 @@ import pandas as pd
 import PyPDF2
 import io
 import re
+import sys
 from bs4 import BeautifulSoup
-import time
-from datetime import datetime, timedelta
+from datetime import date, datetime, timedelta
+from fetch import FailedJournal, fetch
+from checkpoint import CheckpointStore
+from seen_cases import SeenCases
+from watermark import OVERLAP_DAYS, append_to_daily, fetch_since, save_watermark
 
+FAILED_JOURNAL = "ucsd_failed_urls.jsonl"
+CHECKPOINTS = "ucsd_checkpoints.sqlite"
 
-def scrape_ucsd_police_logs():
+
+def scrape_ucsd_police_logs(retry_failed=False):
     """
     Scrape UCSD Police Department crime logs from their website.
     Extract data from PDF files for each date and compile into a CSV.
-    Focus on March 3 - March 26, 2025 date range.
+    Only dates newer than the UCSD watermark (minus an overlap window, to catch late
+    disposition changes) are fetched; the first run backfills from March 3, 2025.
+    New rows are merged into data/daily/UCSD.csv.
+
+    Each date's incidents are checkpointed in CHECKPOINTS as soon as its PDF is processed,
+    so a rerun only fetches dates that are missing and the CSV is assembled from the
+    checkpoints. Dates whose PDF could not be fetched are recorded in FAILED_JOURNAL; with
+    retry_failed=True only those dates are fetched.
     """
     # Base URL for the UCSD Police Department website
     base_url = "https://www.police.ucsd.edu/docs/reports/callsandarrests/"
@@ -20,9 +34,11 @@ def scrape_ucsd_police_logs():
     # Create a session for making HTTP requests
     session = requests.Session()
 
-    # Define the specific date range we want (March 3 - March 26, 2025)
-    start_date = datetime(2025, 3, 3)
-    end_date = datetime(2025, 3, 26)
+    # Everything since the watermark (minus the overlap), or the initial backfill start
+    start_date, has_watermark = fetch_since("UCSD", date(2025, 3, 3))
+    end_date = date.today()
+    # Overlap dates are fetched again even if they were checkpointed by an earlier run
+    refresh_until = start_date + timedelta(days=OVERLAP_DAYS) if has_watermark else None
 
     # Generate the dates in the range
     dates_to_process = []
@@ -36,14 +52,28 @@ def scrape_ucsd_police_logs():
         dates_to_process.append(date_str)
         current_date += timedelta(days=1)
 
-    print(
-        f"Will process {len(dates_to_process)} dates from {start_date.strftime('%B %d, %Y')} to {end_date.strftime('%B %d, %Y')}")
+    journal = FailedJournal(FAILED_JOURNAL)
+    if retry_failed:
+        dates_to_process = [entry['key'] for entry in journal.pending() if entry.get('key')]
+        print(f"Retrying {len(dates_to_process)} failed dates from {FAILED_JOURNAL}")
+    else:
+        print(
+            f"Will process {len(dates_to_process)} dates from {start_date.strftime('%B %d, %Y')} to {end_date.strftime('%B %d, %Y')}")
 
-    # Initialize a list to store all incident data
-    all_incidents = []
+    # Completed dates are kept on disk instead of in memory until the end
+    store = CheckpointStore(CHECKPOINTS)
+    completed = store.done()
     processed_count = 0
+    # Cases already in data/daily/UCSD.csv are skipped while parsing, except in the overlap
+    # window where their dispositions may have changed
+    seen = SeenCases("UCSD")
 
     for date_str in dates_to_process:
+        in_overlap = refresh_until is not None and datetime.strptime(date_str, "%B %d, %Y").date() <= refresh_until
+        if date_str in completed and not in_overlap:
+            print(f"Already checkpointed, skipping {date_str}")
+            continue
+
         try:
             # Format the date for the PDF URL
             parts = date_str.split()
@@ -57,14 +87,15 @@ def scrape_ucsd_police_logs():
 
             print(f"Trying URL: {pdf_url}")
 
-            # Get the PDF
-            pdf_response = session.get(pdf_url)
+            # Get the PDF, retrying transient errors (pacing is handled per host by the rate limiter)
+            pdf_response = fetch(session, pdf_url, journal=journal, key=date_str)
 
             if pdf_response.status_code == 200:
                 # Process the PDF and extract incidents
-                incidents = extract_incidents_pdf_direct(pdf_response.content, date_str)
+                incidents = extract_incidents_pdf_direct(pdf_response.content, date_str,
+                                                         seen=None if in_overlap else seen)
+                store.save(date_str, incidents)
                 if incidents:
-                    all_incidents.extend(incidents)
                     processed_count += 1
                     print(f"Successfully extracted {len(incidents)} incidents from {date_str}")
                 else:
@@ -72,13 +103,17 @@ def scrape_ucsd_police_logs():
             else:
                 print(f"Failed to get PDF for {date_str}: Status code {pdf_response.status_code}")
 
-            # Add a short delay to avoid overwhelming the server
-            time.sleep(0.5)
-
         except Exception as e:
             print(f"Error processing {date_str}: {str(e)}")
 
     print(f"Successfully processed {processed_count} out of {len(dates_to_process)} dates")
+    print(f"Skipped {seen.stats['seen']} already ingested cases while parsing")
+    seen.close()
+
+    # A retry run rebuilds the CSV from every checkpoint, a normal run from its date range
+    all_incidents = list(store.rows(None if retry_failed else dates_to_process))
+    fetched = [datetime.strptime(d, "%B %d, %Y").date() for d in store.done() if d in dates_to_process]
+    store.close()
 
     # Create a DataFrame and save to CSV if we have data
     if all_incidents:
@@ -102,13 +137,32 @@ def scrape_ucsd_police_logs():
         output_file = "ucsd_police_logs.csv"
         df.to_csv(output_file, index=False)
         print(f"Data saved to {output_file} with {len(all_incidents)} total incidents")
+
+        # Merge into the dashboard data instead of regenerating it, then move the watermark
+        added, updated = append_to_daily("UCSD", [to_daily_row(i) for i in all_incidents], key="Case_Number")
+        print(f"data/daily/UCSD.csv: {added} new rows, {updated} updated")
+        if fetched:
+            save_watermark("UCSD", last_date=max(fetched))
         return df
     else:
         print("No data collected")
         return None
 
 
-def extract_incidents_pdf_direct(pdf_content, date_string):
+def to_daily_row(incident):
+    """Convert a scraped incident to the column layout of data/daily/UCSD.csv"""
+    report_date = datetime.strptime(incident['Report_Date'], "%B %d, %Y")
+    return {
+        'Report_Date': f"{report_date.day}-{report_date.strftime('%b-%y')}",
+        'Case_Number': incident['Case_Number'],
+        'Incident Type': incident['Incident_Type'],
+        'Location': incident['Location'],
+        'Date/Time Reported': incident['Date_Reported'],
+        'Date/Time Occurred': f"{incident['Date_Occurred']} {incident['Time_Occurred']}".strip()
+    }
+
+
+def extract_incidents_pdf_direct(pdf_content, date_string, seen=None):
     """
     Extract incidents directly from the PDF with focus on incident type and location.
 
@@ -118,11 +172,11 @@ def extract_incidents_pdf_direct(pdf_content, date_string):
     Args:
         pdf_content: The binary content of the PDF
         date_string: The date string for this report
+        seen: optional SeenCases (or any container) of case numbers to skip
 
     Returns:
         A list of dictionaries, each containing information about one incident
     """
-    incidents = []
     try:
         # Create a PDF reader object
         pdf_file = io.BytesIO(pdf_content)
@@ -133,8 +187,21 @@ def extract_incidents_pdf_direct(pdf_content, date_string):
         for page in range(len(pdf_reader.pages)):
             page_text = pdf_reader.pages[page].extract_text()
             all_pages_text.append(page_text)
+    except Exception as e:
+        print(f"Error processing PDF for {date_string}: {str(e)}")
+        return []
+
+    return extract_incidents_from_text(all_pages_text, date_string, seen)
+
 
-        # Now extract blocks of incident data from each page
+def extract_incidents_from_text(all_pages_text, date_string, seen=None):
+    """
+    The incidents in the extracted text of a log's pages; see extract_incidents_pdf_direct.
+    A block whose case number is in seen is skipped right after the case number is read.
+    """
+    incidents = []
+    try:
+        # Extract blocks of incident data from each page
         for page_text in all_pages_text:
             # First, find all the case numbers on this page
             case_matches = list(re.finditer(r'Incident/Case#\s+([\w\d-]+)', page_text))
@@ -142,6 +209,8 @@ def extract_incidents_pdf_direct(pdf_content, date_string):
             for i, case_match in enumerate(case_matches):
                 try:
                     case_number = case_match.group(1).strip()
+                    if seen is not None and case_number in seen:
+                        continue
                     case_start = case_match.start()
 
                     # Determine the end of this incident block (start of next case or end of page)
@@ -328,4 +397,4 @@ def extract_value(text, pattern):
 
 
 if __name__ == "__main__":
-    scrape_ucsd_police_logs()
\ No newline at end of file
+    scrape_ucsd_police_logs(retry_failed="--retry-failed" in sys.argv)
\ No newline at end of file
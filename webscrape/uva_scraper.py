@@ -6,8 +6,12 @@ from webdriver_manager.chrome import ChromeDriverManager
 from bs4 import BeautifulSoup
 import csv
 import re
-import time
 import os
+from datetime import date, datetime, timedelta
+from table_parse import PARSER
+import rate_limit
+from checkpoint import CheckpointStore
+from watermark import OVERLAP_DAYS, append_to_daily, fetch_since, save_watermark
 
 
 def setup_driver():
@@ -26,10 +30,8 @@ def setup_driver():
 def parse_crime_log(driver, url):
     """Parse a monthly crime log page and extract incidents"""
     print(f"Scraping: {url}")
-    driver.get(url)
-
-    # Wait for page to load
-    time.sleep(3)
+    # Waits for the page to finish loading; pacing is handled per host by the shared rate limiter
+    rate_limit.driver_get(driver, url)
 
     # Extract page title for month/year
     try:
@@ -44,7 +46,8 @@ def parse_crime_log(driver, url):
 
     # Get page HTML for BeautifulSoup parsing
     page_source = driver.page_source
-    soup = BeautifulSoup(page_source, 'html.parser')
+    # Incidents are free text rather than a table, so the whole page is still parsed (with lxml if installed)
+    soup = BeautifulSoup(page_source, PARSER)
 
     # Find all crime entries
     incidents = []
@@ -156,46 +159,121 @@ def save_to_csv(incidents, filename='uva_crime_log.csv'):
     print(f"Data saved to {filename}")
 
 
-def main():
-    output_file = 'uva_crime_log.csv'
+def monthly_urls_since(start, end):
+    """(URL, last day of the month) of the monthly crime logs for every month from start through end"""
+    urls = []
+    year, month = start.year, start.month
+    while (year, month) <= (end.year, end.month):
+        month_name = date(year, month, 1).strftime('%B').lower()
+        next_year, next_month = (year + 1, 1) if month == 12 else (year, month + 1)
+        urls.append((f"https://uvapolice.virginia.edu/crime-log/{month_name}-{year}",
+                     date(next_year, next_month, 1) - timedelta(days=1)))
+        year, month = next_year, next_month
+    return urls
+
+
+def is_final(store, url, last_day):
+    """
+    Whether a month's checkpoint can be kept: it was taken more than the overlap window after
+    the month ended, so the month had stopped growing and late disposition changes are in it
+    """
+    completed = store.completed(url)
+    return completed is not None and completed.date() - timedelta(days=OVERLAP_DAYS) > last_day
 
-    # Define specific URLs to scrape
-    monthly_urls = [
-        "https://uvapolice.virginia.edu/crime-log/march-2025",
-        "https://uvapolice.virginia.edu/crime-log/february-2025",
-        "https://uvapolice.virginia.edu/crime-log/january-2025",
-        "https://uvapolice.virginia.edu/crime-log/april-2025"
-    ]
 
-    # Set up Selenium WebDriver
-    driver = setup_driver()
+def format_log_time(value):
+    """Turn the log's time format (e.g. 0214 03-23-2025) into 03/23/2025 02:14"""
+    match = re.match(r'(\d{2})(\d{2})\s+(\d{2})-(\d{2})-(\d{4})', value or '')
+    if not match:
+        return value
+    hour, minute, month, day, year = match.groups()
+    return f"{month}/{day}/{year} {hour}:{minute}"
 
+
+def reported_on(daily_row):
+    """Date of a daily row's Date/Time Reported (MM/DD/YYYY HH:MM), None if it isn't one"""
     try:
-        # Create a new CSV file (overwrite if exists)
-        with open(output_file, 'w', newline='', encoding='utf-8') as csvfile:
-            fieldnames = [
-                'Month_Year', 'Incident_Type', 'Location', 'Case_Number',
-                'Description', 'Report_Time', 'Occurrence_Time', 'Occurrence_End', 'Case_Status'
-            ]
-            writer = csv.DictWriter(csvfile, fieldnames=fieldnames)
-            writer.writeheader()
+        return datetime.strptime(daily_row['Date/Time Reported'][:10], "%m/%d/%Y").date()
+    except (TypeError, ValueError):
+        return None
+
 
-        # Process each monthly page
-        all_incidents = []
-        for url in monthly_urls:
-            incidents = parse_crime_log(driver, url)
-            all_incidents.extend(incidents)
+def to_daily_row(incident):
+    """Convert a scraped incident to the column layout of data/daily/UVA.csv"""
+    return {
+        'Case Number': incident['Case_Number'],
+        'Date/Time Reported': format_log_time(incident['Report_Time']),
+        'Incident Type': incident['Incident_Type'],
+        'Date/Time Occurred': format_log_time(incident['Occurrence_Time']),
+        'Location': incident['Location'],
+        'Disposition': incident['Case_Status']
+    }
 
-            # Add a short delay to avoid overloading the server
-            time.sleep(2)
 
-        # Save all incidents to CSV
-        save_to_csv(all_incidents, output_file)
-        print(f"Scraping complete. Total incidents: {len(all_incidents)}")
+def main():
+    output_file = 'uva_crime_log.csv'
+    # Each month is checkpointed once parsed, so a rerun only scrapes months that are missing
+    store = CheckpointStore('uva_checkpoints.sqlite')
+
+    # Months since the watermark (minus overlap), or the initial backfill start, through this month
+    start_date, _ = fetch_since('UVA', date(2025, 1, 1))
+    months = monthly_urls_since(start_date, date.today())
+    monthly_urls = [url for url, _ in months]
+
+    # Months that are checkpointed and final are skipped, so an interrupted run (backfill or
+    # incremental) resumes; the current month and those still in the overlap window are refetched
+    remaining = [url for url, last_day in months if not is_final(store, url, last_day)]
+    print(f"{len(monthly_urls) - len(remaining)} months already checkpointed, {len(remaining)} to scrape")
+
+    # Set up Selenium WebDriver (only if there is anything left to scrape)
+    driver = setup_driver() if remaining else None
+
+    try:
+        # Process each monthly page; a month that fails or comes back empty isn't checkpointed,
+        # so the next run tries it again
+        failed = []
+        for url in remaining:
+            try:
+                incidents = parse_crime_log(driver, url)
+            except Exception as e:
+                print(f"Error scraping {url}: {e}")
+                failed.append(url)
+                continue
+            if not incidents:
+                print(f"No incidents found on {url}, not checkpointing it")
+                failed.append(url)
+                continue
+            store.save(url, incidents)
+
+        # Assemble the CSV from the checkpoints (overwrites any previous file)
+        fieldnames = [
+            'Month_Year', 'Incident_Type', 'Location', 'Case_Number',
+            'Description', 'Report_Time', 'Occurrence_Time', 'Occurrence_End', 'Case_Status'
+        ]
+        total = store.write_csv(output_file, fieldnames, units=monthly_urls)
+        print(f"Data saved to {output_file}")
+        print(f"Scraping complete. Total incidents: {total}")
+
+        # Merge into the dashboard data instead of regenerating it, then move the watermark
+        daily_rows = [to_daily_row(incident) for incident in store.rows(monthly_urls)]
+        added, updated = append_to_daily('UVA', daily_rows, key='Case Number')
+        print(f"data/daily/UVA.csv: {added} new rows, {updated} updated")
+
+        # The watermark moves to the newest report actually parsed, and only once every month
+        # is in (a stale checkpoint of a month that failed to refresh doesn't count), so the
+        # missing months are still in range next time
+        missing = [url for url in monthly_urls if store.completed(url) is None or url in failed]
+        reported = [day for day in map(reported_on, daily_rows) if day is not None]
+        if missing:
+            print(f"{len(missing)} months not scraped, leaving the watermark where it is")
+        elif reported:
+            save_watermark('UVA', last_date=max(reported))
 
     finally:
         # Always close the driver
-        driver.quit()
+        if driver is not None:
+            driver.quit()
+        store.close()
 
 
 if __name__ == "__main__":
@@ -0,0 +1,216 @@
+import csv
+import json
+import os
+import tempfile
+from contextlib import contextmanager
+from datetime import date, datetime, timedelta
+from seen_cases import SeenCases
+
+try:
+    import fcntl
+except ImportError:
+    fcntl = None
+    import msvcrt
+
+'''
+Per-source high-water marks for incremental scraping. Each scraper stores the last date it
+has collected for its university; the next run only fetches units newer than that, minus an
+overlap window so late disposition changes are picked up. New rows are merged into
+data/daily/<University>.csv (appended, or updated in place when a case already exists)
+instead of the file being regenerated, and their case numbers are remembered in
+seen_cases.py so parsers can skip them next time.
+
+Scrapers may run at the same time (the pipeline runner runs recipes in parallel workers), so
+saving a watermark holds a lock on watermarks.json.lock while it reads, updates and replaces
+the file, and writes through a temp file of its own.
+'''
+
+WATERMARK_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "watermarks.json")
+LOCK_FILE = WATERMARK_FILE + ".lock"
+DAILY_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "data", "daily")
+OVERLAP_DAYS = 7
+
+
+def _load_all():
+    if not os.path.exists(WATERMARK_FILE):
+        return {}
+    with open(WATERMARK_FILE, encoding='utf-8') as f:
+        return json.load(f)
+
+
+@contextmanager
+def _locked():
+    """Exclusive lock on LOCK_FILE, shared with other processes, for as long as the block runs"""
+    with open(LOCK_FILE, 'a+b') as f:
+        if fcntl is not None:
+            fcntl.flock(f, fcntl.LOCK_EX)
+        else:
+            f.seek(0)
+            msvcrt.locking(f.fileno(), msvcrt.LK_LOCK, 1)
+        try:
+            yield
+        finally:
+            if fcntl is not None:
+                fcntl.flock(f, fcntl.LOCK_UN)
+            else:
+                f.seek(0)
+                msvcrt.locking(f.fileno(), msvcrt.LK_UNLCK, 1)
+
+
+def load_watermark(source):
+    """Return the stored watermark for a source, e.g. {'last_date': '2025-03-26', 'last_case': ...}"""
+    return _load_all().get(source, {})
+
+
+def save_watermark(source, last_date=None, last_case=None):
+    """Move a source's watermark forward (it never moves backwards)"""
+    if isinstance(last_date, datetime):
+        last_date = last_date.date()
+
+    # Under the lock so another scraper saving at the same time can't drop this source's change
+    with _locked():
+        marks = _load_all()
+        mark = marks.get(source, {})
+
+        if last_date is not None:
+            if not mark.get('last_date') or last_date.isoformat() > mark['last_date']:
+                mark['last_date'] = last_date.isoformat()
+        if last_case is not None:
+            mark['last_case'] = str(last_case)
+        mark['updated'] = datetime.now().isoformat(timespec='seconds')
+        marks[source] = mark
+
+        # Write to a temp file first so a crash can't leave a half-written watermark file
+        fd, temp_file = tempfile.mkstemp(prefix="watermarks.", suffix=".tmp",
+                                         dir=os.path.dirname(WATERMARK_FILE))
+        try:
+            with os.fdopen(fd, 'w', encoding='utf-8') as f:
+                json.dump(marks, f, indent=2, sort_keys=True)
+            os.replace(temp_file, WATERMARK_FILE)
+        except BaseException:
+            os.remove(temp_file)
+            raise
+
+
+def fetch_since(source, default_start, overlap_days=OVERLAP_DAYS):
+    """
+    First date a run should fetch: the watermark minus the overlap window, or
+    default_start when the source has never been scraped.
+
+    Returns:
+        (start date, whether a watermark existed)
+    """
+    last_date = load_watermark(source).get('last_date')
+    if not last_date:
+        return default_start, False
+    return date.fromisoformat(last_date) - timedelta(days=overlap_days), True
+
+
+def _file_format(path):
+    """Detect the encoding (BOM or not), delimiter and line ending of an existing CSV"""
+    with open(path, 'rb') as f:
+        head = f.read(65536)
+    encoding = 'utf-8-sig' if head.startswith(b'\xef\xbb\xbf') else 'utf-8'
+
+    if b'\r\n' in head:
+        line_end = '\r\n'
+    elif b'\r' in head:
+        line_end = '\r'
+    else:
+        line_end = '\n'
+
+    first_line = head.replace(b'\r', b'\n').split(b'\n', 1)[0]
+    delimiter = '\t' if first_line.count(b'\t') > first_line.count(b',') else ','
+    return encoding, delimiter, line_end
+
+
+def append_to_daily(university, rows, key, rename=None):
+    """
+    Merge scraped rows into data/daily/<university>.csv.
+
+    Args:
+        university: file name without .csv, e.g. "UCSD"
+        rows: list of dicts from the scraper
+        key: column (after renaming) that identifies a case, e.g. "Case Number"
+        rename: optional {scraper column: daily CSV column} mapping
+
+    Returns:
+        (rows added, rows updated)
+    """
+    rename = rename or {}
+    rows = [{rename.get(col, col): value for col, value in row.items()} for row in rows]
+    if not rows:
+        return 0, 0
+
+    path = os.path.join(DAILY_DIR, f"{university}.csv")
+    if not os.path.exists(path):
+        fieldnames = list(rows[0].keys())
+        with open(path, 'w', newline='', encoding='utf-8') as f:
+            writer = csv.DictWriter(f, fieldnames=fieldnames, extrasaction='ignore')
+            writer.writeheader()
+            writer.writerows(rows)
+        _remember_cases(university, [row.get(key) for row in rows])
+        return len(rows), 0
+
+    encoding, delimiter, line_end = _file_format(path)
+    with open(path, newline='', encoding=encoding) as f:
+        reader = csv.reader(f, delimiter=delimiter)
+        header = next(reader, [])
+        existing = list(reader)
+
+    key_index = header.index(key) if key in header else None
+    by_key = {}
+    if key_index is not None:
+        for i, row in enumerate(existing):
+            if key_index < len(row) and row[key_index].strip():
+                by_key[row[key_index].strip()] = i
+    existing_rows = {tuple(row) for row in existing}
+
+    added, added_by_key, updated = [], {}, 0
+    for row in rows:
+        values = ["" if row.get(col) is None else str(row[col]) for col in header]
+        case = values[key_index].strip() if key_index is not None else ""
+        if case and case in by_key:
+            i = by_key[case]
+            # Columns the scraper doesn't produce keep whatever the file already had
+            old = existing[i] + [""] * (len(header) - len(existing[i]))
+            values = [value if col in row else old[j] for j, (col, value) in enumerate(zip(header, values))]
+            if existing[i] != values:
+                existing[i] = values
+                updated += 1
+        elif case and case in added_by_key:
+            added[added_by_key[case]] = values
+        elif tuple(values) not in existing_rows:
+            added.append(values)
+            existing_rows.add(tuple(values))
+            if case:
+                added_by_key[case] = len(added) - 1
+
+    if updated:
+        # Changed cases need the file rewritten; keep its original format
+        with open(path, 'w', newline='', encoding=encoding) as f:
+            writer = csv.writer(f, delimiter=delimiter, lineterminator=line_end)
+            writer.writerow(header)
+            writer.writerows(existing + added)
+    elif added:
+        with open(path, 'rb') as f:
+            f.seek(0, os.SEEK_END)
+            needs_newline = f.tell() > 0
+            if needs_newline:
+                f.seek(-1, os.SEEK_END)
+                needs_newline = f.read(1) not in (b'\n', b'\r')
+        with open(path, 'a', newline='', encoding='utf-8') as f:
+            if needs_newline:
+                f.write(line_end)
+            writer = csv.writer(f, delimiter=delimiter, lineterminator=line_end)
+            writer.writerows(added)
+
+    _remember_cases(university, list(by_key) + list(added_by_key))
+    return len(added), updated
+
+
+def _remember_cases(university, cases):
+    """Add the file's case numbers to its seen set (the whole file each time, so it fills in on first use)"""
+    seen = SeenCases(university)
+    seen.add(case for case in cases if case)
+    seen.close()